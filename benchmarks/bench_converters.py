@@ -0,0 +1,106 @@
+"""Benchmark the bulk converters against the per-object methods.
+
+Compares `triples_to_graph`, `graph_to_triples`, `entities_to_nodes` and
+`nodes_to_entities` with `Triple.to_relationship`,
+`Triple.from_relationship`, `Entity.to_node` and `Entity.from_node`.
+
+Usage::
+
+    python benchmarks/bench_converters.py --size 100000
+"""
+
+import argparse
+import gc
+import random
+import time
+from typing import Any, Callable
+
+from whyhow.schemas.common import (
+    Entity,
+    Graph,
+    Triple,
+    entities_to_nodes,
+    graph_to_triples,
+    nodes_to_entities,
+    triples_to_graph,
+)
+
+
+def make_triples(size: int, seed: int = 0) -> list[Triple]:
+    """Create triples between about `size / 4` distinct people."""
+    rng = random.Random(seed)
+    people = max(size // 4, 1)
+    return [
+        Triple(
+            head=f"Person {rng.randrange(people)}",
+            head_type="Person",
+            relationship="knows",
+            tail=f"Person {rng.randrange(people)}",
+            tail_type="Person",
+        )
+        for _ in range(size)
+    ]
+
+
+def timed(function: Callable[[], Any]) -> tuple[float, Any]:
+    """Return the seconds taken by a call and its result."""
+    gc.collect()
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    """Run the benchmark and print one line per conversion."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=100_000,
+        help="Number of triples and entities to convert.",
+    )
+    args = parser.parse_args()
+
+    triples = make_triples(args.size)
+    graph = Graph(
+        relationships=[triple.to_relationship() for triple in triples]
+    )
+    entities = [
+        Entity(text=triple.head, label=triple.head_type) for triple in triples
+    ]
+    nodes = [entity.to_node() for entity in entities]
+
+    cases = {
+        "triples -> graph": (
+            lambda: Graph(
+                relationships=[triple.to_relationship() for triple in triples]
+            ),
+            lambda: triples_to_graph(triples),
+        ),
+        "graph -> triples": (
+            lambda: [
+                Triple.from_relationship(relationship)
+                for relationship in graph.relationships
+            ],
+            lambda: graph_to_triples(graph),
+        ),
+        "entities -> nodes": (
+            lambda: [entity.to_node() for entity in entities],
+            lambda: entities_to_nodes(entities),
+        ),
+        "nodes -> entities": (
+            lambda: [Entity.from_node(node) for node in nodes],
+            lambda: nodes_to_entities(nodes),
+        ),
+    }
+    print(f"{'conversion':<20} {'per object s':>13} {'bulk s':>8} {'x':>6}")
+    for name, (per_object, bulk) in cases.items():
+        slow, expected = timed(per_object)
+        fast, result = timed(bulk)
+        if result != expected:
+            raise AssertionError(f"{name}: bulk result differs")
+        print(f"{name:<20} {slow:>13.3f} {fast:>8.3f} {slow / fast:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
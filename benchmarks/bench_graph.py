@@ -0,0 +1,74 @@
+"""Benchmark building a `Graph` from many relationships.
+
+Times node inference through validation (`Graph(relationships=...)`) and
+the bulk `Graph.from_relationships` constructor for growing numbers of
+relationships. The time per relationship should stay flat as the size
+grows.
+
+Usage::
+
+    python benchmarks/bench_graph.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import random
+import time
+
+from whyhow.schemas.common import Graph, Node, Relationship
+
+
+def make_relationships(size: int, seed: int = 0) -> list[Relationship]:
+    """Create relationships between about `size / 4` distinct people."""
+    rng = random.Random(seed)
+    people = [
+        Node(labels=["Person"], properties={"name": f"Person {i}"})
+        for i in range(max(size // 4, 1))
+    ]
+    return [
+        Relationship(
+            type="KNOWS",
+            start_node=rng.choice(people),
+            end_node=rng.choice(people),
+            properties={"since": 2000 + i % 25},
+        )
+        for i in range(size)
+    ]
+
+
+def main() -> None:
+    """Run the benchmark and print one line per size and constructor."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="Numbers of relationships to build graphs from.",
+    )
+    args = parser.parse_args()
+
+    constructors = {
+        "Graph(relationships=...)": lambda r: Graph(relationships=r),
+        "Graph.from_relationships": Graph.from_relationships,
+        "from_relationships(node_key)": lambda r: Graph.from_relationships(
+            r, node_key="name"
+        ),
+    }
+    print(
+        f"{'constructor':<30} {'size':>10} {'nodes':>9}"
+        f" {'s':>8} {'us/rel':>7}"
+    )
+    for size in args.sizes:
+        relationships = make_relationships(size)
+        for name, build in constructors.items():
+            start = time.perf_counter()
+            graph = build(relationships)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:<30} {size:>10} {len(graph.nodes):>9}"
+                f" {elapsed:>8.3f} {elapsed / size * 1e6:>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
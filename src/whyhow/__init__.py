@@ -1,6 +1,7 @@
 """WhyHow SDK."""
 
+from whyhow.cache import QueryCache, SQLiteQueryCache
 from whyhow.client import AsyncWhyHow, WhyHow
 
 __version__ = "v0.0.7"
-__all__ = ["AsyncWhyHow", "WhyHow"]
+__all__ = ["AsyncWhyHow", "QueryCache", "SQLiteQueryCache", "WhyHow"]
@@ -1,13 +1,64 @@
 """Interacting with the graph API."""
 
+import asyncio
 import csv
 import json
-import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from functools import partial
+from itertools import count
 from pathlib import Path
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    NamedTuple,
+    Optional,
+    TypeVar,
+    cast,
+)
 
-from whyhow.apis.base import APIBase
+from pydantic import PrivateAttr
+
+from whyhow.apis.base import APIBase, AsyncAPIBase
+from whyhow.cache import (
+    RESPONSE_MODELS,
+    SCHEMA_CACHE,
+    CacheBackend,
+    CacheKey,
+    SchemaCache,
+    make_key,
+    request_from_key,
+)
+from whyhow.documents import (
+    MAX_PDFS_PER_UPLOAD,
+    MAX_UPLOAD_BYTES,
+    SUPPORTED_SUFFIXES,
+    DocumentInfo,
+    DocumentSource,
+    InMemoryDocument,
+    PreflightReport,
+    document_name,
+    document_size,
+    pack_documents,
+    preflight_documents,
+)
+from whyhow.inference import (
+    JSON_SUFFIXES,
+    header_schema,
+    merge_schemas,
+    profile_documents,
+)
+from whyhow.manifest import DocumentManifest
+from whyhow.multipart import MultipartEncoder, ProgressCallback
+from whyhow.schemas.base import BaseResponse
 from whyhow.schemas.common import Schema as SchemaModel
 from whyhow.schemas.graph import (
+    AddDocumentsBatchReturn,
+    AddDocumentsBulkReturn,
     AddDocumentsResponse,
     CreateGraphResponse,
     CreateQuestionGraphRequest,
@@ -17,134 +68,729 @@ from whyhow.schemas.graph import (
     SpecificQueryGraphRequest,
     SpecificQueryGraphResponse,
 )
+from whyhow.singleflight import AsyncSingleFlight, SingleFlight
+from whyhow.validation import validate_csv
+
+SchemaMode = Literal["header", "profile"]
+
+
+def _validate_documents(
+    documents: list[DocumentSource],
+) -> tuple[list[Path | InMemoryDocument], list[int]]:
+    """Check the documents against the upload limits of the API.
+
+    Returns the documents, with paths as `Path`, and their sizes.
+    """
+    if not documents:
+        raise ValueError("No documents provided")
+
+    sources = [
+        document if isinstance(document, tuple) else Path(document)
+        for document in documents
+    ]
+    if not all(
+        source.exists() for source in sources if isinstance(source, Path)
+    ):
+        raise ValueError("Not all documents exist")
+
+    suffixes = [Path(document_name(source)).suffix for source in sources]
+    if not all(suffix in SUPPORTED_SUFFIXES for suffix in suffixes):
+        raise ValueError("Only PDFs and CSVs are supported")
+
+    sizes = [document_size(source) for source in sources]
+    if sum(sizes) > MAX_UPLOAD_BYTES:
+        raise ValueError(
+            "PDFs too large, please limit your total upload size to <8MB."
+        )
 
+    if any(suffix == ".csv" for suffix in suffixes):
+        if len(sources) > 1:
+            raise ValueError(
+                "Too many documents"
+                "Please limit CSV uploads to 1 file during the beta."
+            )
 
-class GraphAPI(APIBase):
-    """Interacting with the graph API synchronously."""
+    if len(sources) > MAX_PDFS_PER_UPLOAD:
+        raise ValueError(
+            "Too many documents"
+            "Please limit PDF uploads to 3 files during the beta."
+        )
 
-    def add_documents(self, namespace: str, documents: list[str]) -> str:
-        """Add documents to the graph.
+    return sources, sizes
+
+
+def _plan_bulk_upload(
+    namespace: str,
+    documents: list[str] | PreflightReport,
+    manifest: Optional[DocumentManifest],
+    force: bool,
+) -> tuple[list[list[DocumentInfo]], list[str], dict[str, str]]:
+    """Preflight, deduplicate and pack documents for a bulk upload.
+
+    Returns the batches to upload, the documents the manifest lists as
+    already uploaded and the documents rejected by the preflight checks.
+    """
+    if isinstance(documents, PreflightReport):
+        report = documents
+    else:
+        # The manifest hashes only the documents it has not seen unchanged.
+        report = preflight_documents(documents, compute_hash=False)
+
+    rejected = {info.path: cast(str, info.error) for info in report.invalid}
+    candidates = report.valid
+    skipped: list[str] = []
+    if manifest is not None and not force:
+        remaining = []
+        for info in candidates:
+            try:
+                uploaded, sha256 = manifest.lookup(
+                    namespace,
+                    info.path,
+                    size=info.size,
+                    mtime_ns=info.mtime_ns,
+                    sha256=info.sha256,
+                )
+            except OSError:
+                remaining.append(info)
+                continue
+
+            if uploaded:
+                skipped.append(info.path)
+            else:
+                remaining.append(info.model_copy(update={"sha256": sha256}))
+        candidates = remaining
+
+    by_path = {Path(info.path): info for info in candidates}
+    batches, too_large = pack_documents(
+        [(path, info.size) for path, info in by_path.items()]
+    )
+    rejected.update(too_large)
+
+    return (
+        [[by_path[path] for path in batch] for batch in batches],
+        skipped,
+        rejected,
+    )
+
+
+def _batch_return(
+    batch: list[DocumentInfo], result: str | Exception
+) -> AddDocumentsBatchReturn:
+    """Describe the outcome of uploading one batch."""
+    if isinstance(result, Exception):
+        return AddDocumentsBatchReturn(
+            documents=[info.path for info in batch],
+            error=f"{type(result).__name__}: {result}",
+        )
 
-        Parameters
-        ----------
-        namespace : str
-            The namespace of the graph.
+    return AddDocumentsBatchReturn(
+        documents=[info.path for info in batch], message=result
+    )
+
+
+def _generate_schema(
+    documents: list[str],
+    mode: SchemaMode = "header",
+    sample_size: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    schema_cache: Optional[SchemaCache] = None,
+) -> str:
+    """Generate a schema from CSV or JSON documents."""
+    if not documents:
+        raise ValueError("No documents provided")
+
+    document_paths = [Path(document) for document in documents]
+    if not all(document_path.exists() for document_path in document_paths):
+        raise ValueError("Not all documents exist")
+
+    if mode not in ("header", "profile"):
+        raise ValueError(f"Unknown schema generation mode {mode!r}")
+
+    # JSON records have no header row, so they can only be profiled.
+    suffixes = (".csv",) + (JSON_SUFFIXES if mode == "profile" else ())
+    if not all(
+        document_path.suffix in suffixes for document_path in document_paths
+    ):
+        raise ValueError(
+            "Only CSVs are supported"
+            "for local schema generation right now"
+            ' (and JSON or JSON Lines with mode="profile").'
+        )
 
-        documents : list[str]
-            The documents to add.
-        """
-        if not documents:
-            raise ValueError("No documents provided")
+    if mode == "header" and len(document_paths) > 1:
+        raise ValueError(
+            "Too many documents"
+            "can only generate schema for one document at a time"
+            ' unless mode="profile".'
+        )
+
+    if mode == "header":
+        with open(document_paths[0], newline="", encoding="utf-8-sig") as f:
+            return json.dumps(
+                header_schema(next(csv.reader(f), [])), indent=4
+            )
+
+    def profile() -> str:
+        profiles = profile_documents(
+            document_paths, sample_size=sample_size, max_workers=max_workers
+        )
+        return json.dumps(merge_schemas(profiles).model_dump(), indent=4)
 
-        document_paths = [Path(document) for document in documents]
-        if not all(document_path.exists() for document_path in document_paths):
-            raise ValueError("Not all documents exist")
+    if schema_cache is None:
+        return profile()
+
+    # Profiling reads every row, so unchanged documents are not re-scanned.
+    key = (
+        "profile",
+        sample_size,
+        tuple(
+            (path.suffix, schema_cache.digest(path))
+            for path in document_paths
+        ),
+    )
+    return schema_cache.get_or_compile(key, profile)
+
+
+class _CompiledSchema(NamedTuple):
+    """A validated schema and its serialized graph creation request."""
+
+    schema: SchemaModel
+    body: bytes
 
-        if not all(
-            document_path.suffix in [".pdf", ".csv"]
-            for document_path in document_paths
-        ):
-            raise ValueError("Only PDFs and CSVs are supported")
 
-        if (
-            sum(
-                os.path.getsize(document_path)
-                for document_path in document_paths
+def _compile_schema(schema: SchemaModel) -> _CompiledSchema:
+    """Serialize the request body creating a graph from a schema."""
+    request_body = CreateSchemaGraphRequest(graph_schema=schema)
+    return _CompiledSchema(
+        schema=schema, body=json.dumps(request_body.model_dump()).encode()
+    )
+
+
+def _load_schema(
+    schema_file: str, schema_cache: Optional[SchemaCache] = None
+) -> _CompiledSchema:
+    """Load a user-defined schema from a JSON file."""
+    if not schema_file:
+        raise ValueError("No schema provided")
+
+    def compile() -> _CompiledSchema:
+        with open(schema_file, "rb") as file:
+            schema_data = json.load(file)
+
+        return _compile_schema(SchemaModel(**schema_data))
+
+    if schema_cache is None:
+        return compile()
+
+    key = ("schema", schema_cache.digest(schema_file))
+    return schema_cache.get_or_compile(key, compile)
+
+
+def _load_csv_schema(
+    schema_file: str,
+    csv_file: Optional[str] = None,
+    schema_cache: Optional[SchemaCache] = None,
+) -> _CompiledSchema:
+    """Load a user-defined schema for a CSV graph from a JSON file.
+
+    If a CSV document is given, the schema is validated against it.
+    """
+    if not schema_file:
+        raise ValueError("No schema provided")
+
+    def compile() -> _CompiledSchema:
+        with open(schema_file, "r", encoding="utf-8-sig") as file:
+            schema_data = json.load(file)
+            for entity in schema_data["entities"]:
+                for property in entity["property_columns"]:
+                    if property.lower() in ["name", "namespace"]:
+                        raise ValueError(
+                            f"The values 'name' and 'namespace'"
+                            f"are not allowed in property_columns."
+                            f"Found '{property}'."
+                        )
+
+        return _compile_schema(SchemaModel(**schema_data))
+
+    report = None
+    if schema_cache is None:
+        compiled = compile()
+        if csv_file is not None:
+            report = validate_csv(csv_file, compiled.schema)
+    else:
+        schema_digest = schema_cache.digest(schema_file)
+        compiled = schema_cache.get_or_compile(
+            ("csv_schema", schema_digest), compile
+        )
+        if csv_file is not None:
+            report = schema_cache.get_or_compile(
+                ("validation", schema_digest, schema_cache.digest(csv_file)),
+                partial(validate_csv, csv_file, compiled.schema),
             )
-            > 8388600
-        ):
-            raise ValueError(
-                "PDFs too large, please limit your total upload size to <8MB."
+
+    if report is not None and not report.ok:
+        raise ValueError(
+            f"{csv_file} does not match the schema: "
+            + "; ".join(report.errors)
+        )
+
+    return compiled
+
+
+T = TypeVar("T")
+R = TypeVar("R", bound=BaseResponse)
+
+
+async def _bounded_as_completed(
+    calls: Iterable[Callable[[], Awaitable[T]]], concurrency: int
+) -> AsyncIterator[tuple[int, T | Exception]]:
+    """Run coroutine factories with at most `concurrency` in flight.
+
+    Factories are pulled from `calls` lazily, so arbitrarily long inputs
+    never materialize more than `concurrency` tasks at once. Results are
+    yielded as `(index, result)` in completion order; exceptions raised by
+    a call are yielded in place of its result instead of being raised.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    async def run(
+        index: int, call: Callable[[], Awaitable[T]]
+    ) -> tuple[int, T | Exception]:
+        try:
+            return index, await call()
+        except Exception as e:
+            return index, e
+
+    pending: set[asyncio.Task[tuple[int, T | Exception]]] = set()
+    iterator = iter(enumerate(calls))
+    try:
+        while True:
+            for index, call in iterator:
+                pending.add(asyncio.ensure_future(run(index, call)))
+                if len(pending) >= concurrency:
+                    break
+
+            if not pending:
+                return
+
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
             )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _threaded_as_completed(
+    calls: Iterable[Callable[[], T]], max_workers: int
+) -> Iterator[tuple[int, T | Exception]]:
+    """Run callables on a thread pool with at most `max_workers` in flight.
+
+    The thread counterpart of `_bounded_as_completed`: callables are pulled
+    lazily, results are yielded as `(index, result)` in completion order
+    and exceptions are yielded in place of results.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    def run(index: int, call: Callable[[], T]) -> tuple[int, T | Exception]:
+        try:
+            return index, call()
+        except Exception as e:
+            return index, e
+
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="whyhow"
+    )
+    pending: set[Future[tuple[int, T | Exception]]] = set()
+    iterator = iter(enumerate(calls))
+    try:
+        while True:
+            for index, call in iterator:
+                pending.add(executor.submit(run, index, call))
+                if len(pending) >= max_workers:
+                    break
+
+            if not pending:
+                return
+
+            done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
 
-        if any(
-            document_path.suffix == ".csv" for document_path in document_paths
-        ):
-            if len(document_paths) > 1:
-                raise ValueError(
-                    "Too many documents"
-                    "Please limit CSV uploads to 1 file during the beta."
-                )
 
-        if len(document_paths) > 3:
-            raise ValueError(
-                "Too many documents"
-                "Please limit PDF uploads to 3 files during the beta."
+class GraphAPI(APIBase):
+    """Interacting with the graph API synchronously.
+
+    Parameters
+    ----------
+    max_workers : int
+        The default number of threads used by `map_queries` and
+        `map_specific_queries`. `WhyHow` sizes the httpx connection pool
+        so that this many threads never wait on a free connection.
+
+    cache : CacheBackend, optional
+        Opt-in cache of `query_graph` and `query_graph_specific` responses.
+        Entries of a namespace are dropped whenever its graph is changed
+        through this API, and responses to queries in flight at that time
+        are not cached.
+
+    coalesce : bool
+        Whether identical queries that are in flight at the same time share
+        a single HTTP call.
+
+    schema_cache : SchemaCache, optional
+        Cache of the schema files parsed by `create_graph_from_schema` and
+        `create_graph_from_csv`, of their request bodies and of the
+        `generate_schema` results in "profile" mode, keyed by the content
+        of the files. Shared by all clients by default; ``None`` disables
+        it.
+    """
+
+    max_workers: int = 8
+    cache: Optional[CacheBackend] = None
+    coalesce: bool = True
+    schema_cache: Optional[SchemaCache] = SCHEMA_CACHE
+
+    _inflight: SingleFlight[BaseResponse] = PrivateAttr(
+        default_factory=SingleFlight
+    )
+    # Namespace -> generation, bumped by every invalidation so that
+    # responses to queries sent before it are not cached.
+    _generations: dict[str, int] = PrivateAttr(default_factory=dict)
+    _counter: Iterator[int] = PrivateAttr(
+        default_factory=lambda: count(1)
+    )
+    _invalidation_callbacks: list[Callable[[str], None]] = PrivateAttr(
+        default_factory=list
+    )
+
+    def add_invalidation_callback(
+        self, callback: Callable[[str], None]
+    ) -> None:
+        """Register a function called with a namespace whose graph changed.
+
+        Callbacks run after every successful `add_documents` and
+        `create_graph*` call, once the cached responses of the namespace
+        have been dropped.
+        """
+        self._invalidation_callbacks.append(callback)
+
+    def remove_invalidation_callback(
+        self, callback: Callable[[str], None]
+    ) -> None:
+        """Unregister a function added with `add_invalidation_callback`."""
+        self._invalidation_callbacks.remove(callback)
+
+    def _invalidate(self, namespace: str) -> None:
+        """Drop cached responses of a namespace whose graph changed."""
+        self._generations[namespace] = next(self._counter)
+        if self.cache is not None:
+            self.cache.invalidate(namespace)
+
+        for callback in list(self._invalidation_callbacks):
+            callback(namespace)
+
+    def _post_query(
+        self,
+        namespace: str,
+        endpoint: str,
+        request_body: QueryGraphRequest | SpecificQueryGraphRequest,
+        response_model: type[R],
+        refresh: bool = False,
+    ) -> R:
+        """Send a query request, answering it from the cache if possible.
+
+        Identical requests that are already in flight are coalesced into a
+        single HTTP call whose response is shared by all callers. With
+        `refresh`, the cache is not read but still updated. A response is
+        not cached if the namespace was invalidated while it was awaited.
+        """
+        key = make_key(namespace, endpoint, request_body)
+        generation = self._generations.get(namespace, 0)
+        if self.cache is not None and not refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cast(R, cached)
+
+        def send() -> BaseResponse:
+            raw_response = self.client.post(
+                f"{self.prefix}/{namespace}/{endpoint}",
+                json=request_body.model_dump(),
             )
 
-        files = [
+            raw_response.raise_for_status()
+
+            response = response_model.model_validate(raw_response.json())
+
+            if (
+                self.cache is not None
+                and self._generations.get(namespace, 0) == generation
+            ):
+                self.cache.set(key, response, request_body)
+
+            return response
+
+        if not self.coalesce:
+            return cast(R, send())
+
+        response, shared = self._inflight.do(
             (
-                "documents",
-                (document_path.name, open(document_path, "rb")),
-            )
-            for document_path in document_paths
-        ]
+                namespace,
+                endpoint,
+                request_body.model_dump_json(),
+                generation,
+            ),
+            send,
+        )
 
-        raw_response = self.client.post(
-            f"{self.prefix}/{namespace}/add_documents",
-            files=files,
+        return cast(R, response.model_copy(deep=True) if shared else response)
+
+    def refresh(self, key: CacheKey) -> BaseResponse:
+        """Re-run the query behind a cache key and store the fresh response.
+
+        The query is sent as it was originally asked when the cache kept
+        the request, and rebuilt from the normalized key otherwise.
+
+        Parameters
+        ----------
+        key : CacheKey
+            The key of the query to refresh.
+
+        Returns
+        -------
+        BaseResponse
+            The fresh `QueryGraphResponse` or `SpecificQueryGraphResponse`.
+
+        """
+        request = None if self.cache is None else self.cache.get_request(key)
+        if request is None:
+            request = request_from_key(key)
+
+        return self._post_query(
+            key.namespace,
+            key.endpoint,
+            request,
+            RESPONSE_MODELS[key.endpoint],
+            refresh=True,
         )
 
+    def add_documents(
+        self,
+        namespace: str,
+        documents: list[DocumentSource],
+        progress: Optional[ProgressCallback] = None,
+    ) -> str:
+        """Add documents to the graph.
+
+        The documents are streamed from disk in fixed-size chunks and every
+        file is closed once sent, even if the request fails. Documents held
+        in memory are sent straight from their buffer, without copies.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        documents : list[str | Path | tuple[str, Buffer | BinaryIO]]
+            The documents to add: paths, or `(filename, content)` pairs
+            where the content is `bytes`, a `memoryview`, an `mmap` or a
+            seekable binary file-like object. The filename extension
+            decides the document type.
+
+        progress : Callable[[int, int], None], optional
+            Called with the bytes sent so far and the total upload size.
+        """
+        sources, sizes = _validate_documents(documents)
+
+        return self._post_documents(namespace, sources, progress, sizes)
+
+    def _post_documents(
+        self,
+        namespace: str,
+        documents: list[Path | InMemoryDocument],
+        progress: Optional[ProgressCallback] = None,
+        sizes: Optional[list[int]] = None,
+    ) -> str:
+        """Upload documents that already passed validation."""
+        with MultipartEncoder(
+            [("documents", document) for document in documents],
+            progress=progress,
+            sizes=sizes,
+        ) as encoder:
+            raw_response = self.client.post(
+                f"{self.prefix}/{namespace}/add_documents",
+                content=encoder.iter_bytes(),
+                headers=encoder.headers,
+            )
+
         raw_response.raise_for_status()
+        self._invalidate(namespace)
 
         response = AddDocumentsResponse.model_validate(raw_response.json())
 
         return response.message
 
-    def generate_schema(self, documents: list[str]) -> str:
-        """Generate a schema from CSV document."""
-        if not documents:
+    def upload_batch(
+        self,
+        namespace: str,
+        batch: list[DocumentInfo],
+        progress: Optional[ProgressCallback] = None,
+    ) -> str:
+        """Upload a batch of documents that passed preflight in one request.
+
+        The documents are not checked again, so the batch must respect the
+        upload limits, e.g. a batch from `pack_documents`.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        batch : list[DocumentInfo]
+            The preflight results of the documents.
+
+        progress : Callable[[int, int], None], optional
+            Called with the bytes sent so far and the total upload size.
+
+        Raises
+        ------
+        ValueError
+            If the batch is empty or a document failed preflight.
+        """
+        if not batch:
             raise ValueError("No documents provided")
+        failed = [info.path for info in batch if info.error is not None]
+        if failed:
+            raise ValueError(f"Documents failed preflight: {failed}")
+
+        return self._post_documents(
+            namespace,
+            [Path(info.path) for info in batch],
+            progress,
+            sizes=[info.size for info in batch],
+        )
 
-        document_paths = [Path(document) for document in documents]
-        if not all(document_path.exists() for document_path in document_paths):
-            raise ValueError("Not all documents exist")
+    def add_documents_bulk(
+        self,
+        namespace: str,
+        documents: list[str] | PreflightReport,
+        concurrency: int = 4,
+        manifest: Optional[DocumentManifest] = None,
+        force: bool = False,
+    ) -> AddDocumentsBulkReturn:
+        """Add any number of documents to the graph in compliant batches.
+
+        The documents are checked in parallel (`preflight_documents`),
+        packed into batches that respect the upload limits of
+        `add_documents` (first-fit-decreasing by size) and the batches are
+        uploaded concurrently. A failing batch does not stop the others.
 
-        if not all(
-            document_path.suffix in [".csv"]
-            for document_path in document_paths
-        ):
-            raise ValueError(
-                "Only CSVs are supported"
-                "for local schema generation right now."
-            )
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
 
-        if any(
-            document_path.suffix == ".csv" for document_path in document_paths
-        ):
-            if len(document_paths) > 1:
-                raise ValueError(
-                    "Too many documents"
-                    "can only generate schema for one document at a time."
-                )
-        entities = []
-        patterns = []
+        documents : list[str] | PreflightReport
+            The documents to add, or the report of an earlier preflight so
+            that the documents are not checked again.
 
-        with open(document_paths[0], newline="", encoding="utf-8-sig") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                for i in range(len(row) - 1):
-                    _pattern = {
-                        "head": row[0],
-                        "relation": (
-                            f"has_{row[i+1].lower().replace(' ', '_')}"
-                        ),
-                        "tail": row[i + 1],
-                        "description": "",
-                    }
-                    patterns.append(_pattern)
-                for i in range(len(row)):
-                    _entity = {
-                        "name": row[i],
-                        "set_type_as": "",
-                        "property_columns": [],
-                        "description": "",
-                    }
-                    entities.append(_entity)
-                break
-
-        return json.dumps(
-            {"entities": entities, "patterns": patterns}, indent=4
+        concurrency : int
+            The maximum number of batches uploaded at once.
+
+        manifest : DocumentManifest, optional
+            Skip documents the manifest lists as already uploaded to the
+            namespace, and record the ones uploaded successfully.
+
+        force : bool
+            Upload every document even if the manifest lists it.
+
+        Returns
+        -------
+        AddDocumentsBulkReturn
+            The outcome of every batch, the documents skipped and the
+            documents that could not be uploaded at all.
+
+        """
+        batches, skipped, rejected = _plan_bulk_upload(
+            namespace, documents, manifest, force
+        )
+
+        def upload(batch: list[DocumentInfo]) -> str:
+            message = self.upload_batch(namespace, batch)
+            if manifest is not None:
+                for info in batch:
+                    manifest.record(
+                        namespace,
+                        info.path,
+                        info.sha256,
+                        size=info.size,
+                        mtime_ns=info.mtime_ns,
+                    )
+            return message
+
+        calls = (partial(upload, batch) for batch in batches)
+        results = dict(_threaded_as_completed(calls, concurrency))
+
+        return AddDocumentsBulkReturn(
+            namespace=namespace,
+            batches=[
+                _batch_return(batch, results[i])
+                for i, batch in enumerate(batches)
+            ],
+            skipped=skipped,
+            rejected=rejected,
+        )
+
+    def generate_schema(
+        self,
+        documents: list[str],
+        mode: SchemaMode = "header",
+        sample_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> str:
+        """Generate a schema from CSV documents.
+
+        Parameters
+        ----------
+        documents : list[str]
+            The CSV documents to generate the schema from. In "profile"
+            mode, JSON arrays of objects (`.json`) and JSON Lines
+            (`.jsonl`, `.ndjson`) are accepted too, with nested values
+            flattened into dotted paths like `address.city`. Only
+            "profile" mode accepts more than one document.
+
+        mode : {"header", "profile"}
+            With "header", every column of the header row becomes an entity
+            linked to the first column. With "profile", the whole document
+            is streamed in bounded memory to measure the type, null ratio
+            and cardinality of every column: repeated text values become
+            entities, while numbers, dates, flags and mostly unique text
+            become `property_columns` of the key entity.
+
+        sample_size : int, optional
+            In "profile" mode, profile a uniform reservoir sample of this
+            many rows instead of every row.
+
+        max_workers : int, optional
+            In "profile" mode, the number of processes profiling documents
+            in parallel. Defaults to the number of CPUs. The per-document
+            schemas are merged into one: entities with the same name are
+            unified, and columns shared across documents that are the key
+            of one of them become entities joining the documents.
+
+        Returns
+        -------
+        str
+            The schema as a JSON string.
+        """
+        return _generate_schema(
+            documents, mode, sample_size, max_workers, self.schema_cache
         )
 
     def create_graph(self, namespace: str, questions: list[str]) -> str:
@@ -168,6 +814,7 @@ class GraphAPI(APIBase):
         )
 
         raw_response.raise_for_status()
+        self._invalidate(namespace)
 
         response = CreateGraphResponse.model_validate(raw_response.json())
 
@@ -185,28 +832,27 @@ class GraphAPI(APIBase):
         schema_file : str
             The schema file to use to build the graph.
         """
-        if not schema_file:
-            raise ValueError("No schema provided")
-
-        with open(schema_file, "r") as file:
-            schema_data = json.load(file)
-
-        schema_model = SchemaModel(**schema_data)
-
-        request_body = CreateSchemaGraphRequest(graph_schema=schema_model)
+        compiled = _load_schema(schema_file, self.schema_cache)
 
         raw_response = self.client.post(
             f"{self.prefix}/{namespace}/create_graph_from_schema",
-            json=request_body.model_dump(),
+            content=compiled.body,
+            headers={"Content-Type": "application/json"},
         )
 
         raw_response.raise_for_status()
+        self._invalidate(namespace)
 
         response = CreateGraphResponse.model_validate(raw_response.json())
 
         return response.message
 
-    def create_graph_from_csv(self, namespace: str, schema_file: str) -> str:
+    def create_graph_from_csv(
+        self,
+        namespace: str,
+        schema_file: str,
+        csv_file: Optional[str] = None,
+    ) -> str:
         """Create a new graph using a CSV based on a user-defined schema.
 
         Parameters
@@ -215,31 +861,28 @@ class GraphAPI(APIBase):
             The namespace of the graph to create.
         schema_file : str
             The schema file to use to build the graph.
+        csv_file : str, optional
+            A local copy of the uploaded CSV. If given, it is validated
+            against the schema (see `whyhow.validation.validate_csv`)
+            before the graph is created.
+
+        Raises
+        ------
+        ValueError
+            If the CSV does not match the schema.
         """
-        if not schema_file:
-            raise ValueError("No schema provided")
-
-        with open(schema_file, "r", encoding="utf-8-sig") as file:
-            schema_data = json.load(file)
-            for entity in schema_data["entities"]:
-                for property in entity["property_columns"]:
-                    if property.lower() in ["name", "namespace"]:
-                        raise ValueError(
-                            f"The values 'name' and 'namespace'"
-                            f"are not allowed in property_columns."
-                            f"Found '{property}'."
-                        )
-
-        schema_model = SchemaModel(**schema_data)
-
-        request_body = CreateSchemaGraphRequest(graph_schema=schema_model)
+        compiled = _load_csv_schema(
+            schema_file, csv_file, self.schema_cache
+        )
 
         raw_response = self.client.post(
             f"{self.prefix}/{namespace}/create_graph_from_csv",
-            json=request_body.model_dump(),
+            content=compiled.body,
+            headers={"Content-Type": "application/json"},
         )
 
         raw_response.raise_for_status()
+        self._invalidate(namespace)
 
         response = CreateGraphResponse.model_validate(raw_response.json())
 
@@ -274,17 +917,10 @@ class GraphAPI(APIBase):
             include_chunks=include_chunks,
         )
 
-        raw_response = self.client.post(
-            f"{self.prefix}/{namespace}/query",
-            json=request_body.model_dump(),
+        response = self._post_query(
+            namespace, "query", request_body, QueryGraphResponse
         )
 
-        raw_response.raise_for_status()
-
-        response = QueryGraphResponse.model_validate(raw_response.json())
-
-        # retval = QueryGraphReturn(answer=response.answer)
-
         return response
 
     def query_graph_specific(
@@ -323,15 +959,818 @@ class GraphAPI(APIBase):
             include_chunks=include_chunks,
         )
 
-        raw_response = self.client.post(
-            f"{self.prefix}/{namespace}/specific_query",
-            json=request_body.model_dump(),
+        response = self._post_query(
+            namespace,
+            "specific_query",
+            request_body,
+            SpecificQueryGraphResponse,
         )
 
-        raw_response.raise_for_status()
+        return response
+
+    def iter_map_queries(
+        self,
+        namespace: str,
+        queries: Iterable[str],
+        max_workers: int | None = None,
+        include_triples: bool = False,
+        include_chunks: bool = False,
+    ) -> Iterator[tuple[int, QueryGraphResponse | Exception]]:
+        """Run `query_graph` on a thread pool, yielding as queries complete.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        queries : Iterable[str]
+            The queries to run. Consumed lazily.
+
+        max_workers : int, optional
+            The number of threads. Defaults to `self.max_workers`.
 
-        response = SpecificQueryGraphResponse.model_validate(
-            raw_response.json()
+        Yields
+        ------
+        tuple[int, QueryGraphResponse | Exception]
+            The position of the query in `queries` and either its response
+            or the exception raised while running it.
+
+        """
+        calls = (
+            partial(
+                self.query_graph,
+                namespace,
+                query,
+                include_triples=include_triples,
+                include_chunks=include_chunks,
+            )
+            for query in queries
         )
 
-        return response
+        yield from _threaded_as_completed(
+            calls, max_workers or self.max_workers
+        )
+
+    def map_queries(
+        self,
+        namespace: str,
+        queries: Iterable[str],
+        max_workers: int | None = None,
+        include_triples: bool = False,
+        include_chunks: bool = False,
+    ) -> list[QueryGraphResponse | Exception]:
+        """Run `query_graph` for many queries on a thread pool.
+
+        A failing query does not abort the batch; its exception is returned
+        in its slot instead.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        queries : Iterable[str]
+            The queries to run.
+
+        max_workers : int, optional
+            The number of threads. Defaults to `self.max_workers`.
+
+        Returns
+        -------
+        list[QueryGraphResponse | Exception]
+            One response or exception per query, in the order of `queries`.
+
+        """
+        results = dict(
+            self.iter_map_queries(
+                namespace,
+                queries,
+                max_workers=max_workers,
+                include_triples=include_triples,
+                include_chunks=include_chunks,
+            )
+        )
+
+        return [results[index] for index in range(len(results))]
+
+    def iter_map_specific_queries(
+        self,
+        namespace: str,
+        queries: Iterable[SpecificQueryGraphRequest],
+        max_workers: int | None = None,
+    ) -> Iterator[tuple[int, SpecificQueryGraphResponse | Exception]]:
+        """Run `query_graph_specific` on a thread pool, yielding as completed.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        queries : Iterable[SpecificQueryGraphRequest]
+            The queries to run, with their entities and relations.
+            Consumed lazily.
+
+        max_workers : int, optional
+            The number of threads. Defaults to `self.max_workers`.
+
+        Yields
+        ------
+        tuple[int, SpecificQueryGraphResponse | Exception]
+            The position of the query in `queries` and either its response
+            or the exception raised while running it.
+
+        """
+        calls = (
+            partial(
+                self.query_graph_specific,
+                namespace,
+                request.query,
+                entities=request.entities,
+                relations=request.relations,
+                include_triples=request.include_triples,
+                include_chunks=request.include_chunks,
+            )
+            for request in queries
+        )
+
+        yield from _threaded_as_completed(
+            calls, max_workers or self.max_workers
+        )
+
+    def map_specific_queries(
+        self,
+        namespace: str,
+        queries: Iterable[SpecificQueryGraphRequest],
+        max_workers: int | None = None,
+    ) -> list[SpecificQueryGraphResponse | Exception]:
+        """Run `query_graph_specific` for many queries on a thread pool.
+
+        A failing query does not abort the batch; its exception is returned
+        in its slot instead.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        queries : Iterable[SpecificQueryGraphRequest]
+            The queries to run, with their entities and relations.
+
+        max_workers : int, optional
+            The number of threads. Defaults to `self.max_workers`.
+
+        Returns
+        -------
+        list[SpecificQueryGraphResponse | Exception]
+            One response or exception per query, in the order of `queries`.
+
+        """
+        results = dict(
+            self.iter_map_specific_queries(
+                namespace, queries, max_workers=max_workers
+            )
+        )
+
+        return [results[index] for index in range(len(results))]
+
+
+class AsyncGraphAPI(AsyncAPIBase):
+    """Interacting with the graph API asynchronously.
+
+    Mirrors `GraphAPI` method for method. Local file work (reading
+    documents, loading schemas, scanning CSVs) is offloaded to a worker
+    thread so that it never blocks the event loop.
+
+    Parameters
+    ----------
+    cache : CacheBackend, optional
+        Opt-in cache of `query_graph` and `query_graph_specific` responses.
+        Entries of a namespace are dropped whenever its graph is changed
+        through this API, and responses to queries in flight at that time
+        are not cached.
+
+    coalesce : bool
+        Whether identical queries that are in flight at the same time share
+        a single HTTP call.
+
+    schema_cache : SchemaCache, optional
+        Cache of the schema files parsed by `create_graph_from_schema` and
+        `create_graph_from_csv`, of their request bodies and of the
+        `generate_schema` results in "profile" mode, keyed by the content
+        of the files. Shared by all clients by default; ``None`` disables
+        it.
+    """
+
+    cache: Optional[CacheBackend] = None
+    coalesce: bool = True
+    schema_cache: Optional[SchemaCache] = SCHEMA_CACHE
+
+    _inflight: AsyncSingleFlight[BaseResponse] = PrivateAttr(
+        default_factory=AsyncSingleFlight
+    )
+    # Namespace -> generation, bumped by every invalidation so that
+    # responses to queries sent before it are not cached.
+    _generations: dict[str, int] = PrivateAttr(default_factory=dict)
+    _counter: Iterator[int] = PrivateAttr(
+        default_factory=lambda: count(1)
+    )
+    _invalidation_callbacks: list[Callable[[str], None]] = PrivateAttr(
+        default_factory=list
+    )
+
+    def add_invalidation_callback(
+        self, callback: Callable[[str], None]
+    ) -> None:
+        """Register a function called with a namespace whose graph changed.
+
+        Callbacks run after every successful `add_documents` and
+        `create_graph*` call, once the cached responses of the namespace
+        have been dropped.
+        """
+        self._invalidation_callbacks.append(callback)
+
+    def remove_invalidation_callback(
+        self, callback: Callable[[str], None]
+    ) -> None:
+        """Unregister a function added with `add_invalidation_callback`."""
+        self._invalidation_callbacks.remove(callback)
+
+    def _invalidate(self, namespace: str) -> None:
+        """Drop cached responses of a namespace whose graph changed."""
+        self._generations[namespace] = next(self._counter)
+        if self.cache is not None:
+            self.cache.invalidate(namespace)
+
+        for callback in list(self._invalidation_callbacks):
+            callback(namespace)
+
+    async def _post_query(
+        self,
+        namespace: str,
+        endpoint: str,
+        request_body: QueryGraphRequest | SpecificQueryGraphRequest,
+        response_model: type[R],
+        refresh: bool = False,
+    ) -> R:
+        """Send a query request, answering it from the cache if possible.
+
+        Identical requests that are already in flight are coalesced into a
+        single HTTP call whose response is shared by all callers. With
+        `refresh`, the cache is not read but still updated. A response is
+        not cached if the namespace was invalidated while it was awaited.
+        """
+        key = make_key(namespace, endpoint, request_body)
+        generation = self._generations.get(namespace, 0)
+        if self.cache is not None and not refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cast(R, cached)
+
+        async def send() -> BaseResponse:
+            raw_response = await self.client.post(
+                f"{self.prefix}/{namespace}/{endpoint}",
+                json=request_body.model_dump(),
+            )
+
+            raw_response.raise_for_status()
+
+            response = response_model.model_validate(raw_response.json())
+
+            if (
+                self.cache is not None
+                and self._generations.get(namespace, 0) == generation
+            ):
+                self.cache.set(key, response, request_body)
+
+            return response
+
+        if not self.coalesce:
+            return cast(R, await send())
+
+        response, shared = await self._inflight.do(
+            (
+                namespace,
+                endpoint,
+                request_body.model_dump_json(),
+                generation,
+            ),
+            send,
+        )
+
+        return cast(R, response.model_copy(deep=True) if shared else response)
+
+    async def refresh(self, key: CacheKey) -> BaseResponse:
+        """Re-run the query behind a cache key and store the fresh response.
+
+        The query is sent as it was originally asked when the cache kept
+        the request, and rebuilt from the normalized key otherwise.
+
+        Parameters
+        ----------
+        key : CacheKey
+            The key of the query to refresh.
+
+        Returns
+        -------
+        BaseResponse
+            The fresh `QueryGraphResponse` or `SpecificQueryGraphResponse`.
+
+        """
+        request = None if self.cache is None else self.cache.get_request(key)
+        if request is None:
+            request = request_from_key(key)
+
+        return await self._post_query(
+            key.namespace,
+            key.endpoint,
+            request,
+            RESPONSE_MODELS[key.endpoint],
+            refresh=True,
+        )
+
+    async def add_documents(
+        self,
+        namespace: str,
+        documents: list[DocumentSource],
+        progress: Optional[ProgressCallback] = None,
+    ) -> str:
+        """Add documents to the graph.
+
+        The documents are streamed from disk in fixed-size chunks and every
+        file is closed once sent, even if the request fails. Documents held
+        in memory are sent straight from their buffer, without copies.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        documents : list[str | Path | tuple[str, Buffer | BinaryIO]]
+            The documents to add: paths, or `(filename, content)` pairs
+            where the content is `bytes`, a `memoryview`, an `mmap` or a
+            seekable binary file-like object. The filename extension
+            decides the document type.
+
+        progress : Callable[[int, int], None], optional
+            Called with the bytes sent so far and the total upload size.
+        """
+        sources, sizes = await asyncio.to_thread(
+            _validate_documents, documents
+        )
+
+        return await self._post_documents(namespace, sources, progress, sizes)
+
+    async def _post_documents(
+        self,
+        namespace: str,
+        documents: list[Path | InMemoryDocument],
+        progress: Optional[ProgressCallback] = None,
+        sizes: Optional[list[int]] = None,
+    ) -> str:
+        """Upload documents that already passed validation."""
+        with MultipartEncoder(
+            [("documents", document) for document in documents],
+            progress=progress,
+            sizes=sizes,
+        ) as encoder:
+            raw_response = await self.client.post(
+                f"{self.prefix}/{namespace}/add_documents",
+                content=encoder.aiter_bytes(),
+                headers=encoder.headers,
+            )
+
+        raw_response.raise_for_status()
+        self._invalidate(namespace)
+
+        response = AddDocumentsResponse.model_validate(raw_response.json())
+
+        return response.message
+
+    async def upload_batch(
+        self,
+        namespace: str,
+        batch: list[DocumentInfo],
+        progress: Optional[ProgressCallback] = None,
+    ) -> str:
+        """Upload a batch of documents that passed preflight in one request.
+
+        The documents are not checked again, so the batch must respect the
+        upload limits, e.g. a batch from `pack_documents`.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        batch : list[DocumentInfo]
+            The preflight results of the documents.
+
+        progress : Callable[[int, int], None], optional
+            Called with the bytes sent so far and the total upload size.
+
+        Raises
+        ------
+        ValueError
+            If the batch is empty or a document failed preflight.
+        """
+        if not batch:
+            raise ValueError("No documents provided")
+        failed = [info.path for info in batch if info.error is not None]
+        if failed:
+            raise ValueError(f"Documents failed preflight: {failed}")
+
+        return await self._post_documents(
+            namespace,
+            [Path(info.path) for info in batch],
+            progress,
+            sizes=[info.size for info in batch],
+        )
+
+    async def add_documents_bulk(
+        self,
+        namespace: str,
+        documents: list[str] | PreflightReport,
+        concurrency: int = 4,
+        manifest: Optional[DocumentManifest] = None,
+        force: bool = False,
+    ) -> AddDocumentsBulkReturn:
+        """Add any number of documents to the graph in compliant batches.
+
+        The documents are checked in parallel (`preflight_documents`),
+        packed into batches that respect the upload limits of
+        `add_documents` (first-fit-decreasing by size) and the batches are
+        uploaded concurrently. A failing batch does not stop the others.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        documents : list[str] | PreflightReport
+            The documents to add, or the report of an earlier preflight so
+            that the documents are not checked again.
+
+        concurrency : int
+            The maximum number of batches uploaded at once.
+
+        manifest : DocumentManifest, optional
+            Skip documents the manifest lists as already uploaded to the
+            namespace, and record the ones uploaded successfully.
+
+        force : bool
+            Upload every document even if the manifest lists it.
+
+        Returns
+        -------
+        AddDocumentsBulkReturn
+            The outcome of every batch, the documents skipped and the
+            documents that could not be uploaded at all.
+
+        """
+        batches, skipped, rejected = await asyncio.to_thread(
+            _plan_bulk_upload, namespace, documents, manifest, force
+        )
+
+        async def upload(batch: list[DocumentInfo]) -> str:
+            message = await self.upload_batch(namespace, batch)
+            if manifest is not None:
+                for info in batch:
+                    await asyncio.to_thread(
+                        manifest.record,
+                        namespace,
+                        info.path,
+                        info.sha256,
+                        size=info.size,
+                        mtime_ns=info.mtime_ns,
+                    )
+            return message
+
+        calls = (partial(upload, batch) for batch in batches)
+        results = {
+            index: result
+            async for index, result in _bounded_as_completed(
+                calls, concurrency
+            )
+        }
+
+        return AddDocumentsBulkReturn(
+            namespace=namespace,
+            batches=[
+                _batch_return(batch, results[i])
+                for i, batch in enumerate(batches)
+            ],
+            skipped=skipped,
+            rejected=rejected,
+        )
+
+    async def generate_schema(
+        self,
+        documents: list[str],
+        mode: SchemaMode = "header",
+        sample_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> str:
+        """Generate a schema from CSV documents.
+
+        Parameters
+        ----------
+        documents : list[str]
+            The CSV documents to generate the schema from. In "profile"
+            mode, JSON arrays of objects (`.json`) and JSON Lines
+            (`.jsonl`, `.ndjson`) are accepted too, with nested values
+            flattened into dotted paths like `address.city`. Only
+            "profile" mode accepts more than one document.
+
+        mode : {"header", "profile"}
+            With "header", every column of the header row becomes an entity
+            linked to the first column. With "profile", the whole document
+            is streamed in bounded memory to measure the type, null ratio
+            and cardinality of every column: repeated text values become
+            entities, while numbers, dates, flags and mostly unique text
+            become `property_columns` of the key entity.
+
+        sample_size : int, optional
+            In "profile" mode, profile a uniform reservoir sample of this
+            many rows instead of every row.
+
+        max_workers : int, optional
+            In "profile" mode, the number of processes profiling documents
+            in parallel. Defaults to the number of CPUs. The per-document
+            schemas are merged into one: entities with the same name are
+            unified, and columns shared across documents that are the key
+            of one of them become entities joining the documents.
+
+        Returns
+        -------
+        str
+            The schema as a JSON string.
+        """
+        return await asyncio.to_thread(
+            _generate_schema,
+            documents,
+            mode,
+            sample_size,
+            max_workers,
+            self.schema_cache,
+        )
+
+    async def create_graph(self, namespace: str, questions: list[str]) -> str:
+        """Create a new graph.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph to create.
+        questions : list[str]
+            The seed concepts to initialize the graph with.
+        """
+        if not questions:
+            raise ValueError("No questions provided")
+
+        request_body = CreateQuestionGraphRequest(questions=questions)
+
+        raw_response = await self.client.post(
+            f"{self.prefix}/{namespace}/create_graph",
+            json=request_body.model_dump(),
+        )
+
+        raw_response.raise_for_status()
+        self._invalidate(namespace)
+
+        response = CreateGraphResponse.model_validate(raw_response.json())
+
+        return response.message
+
+    async def create_graph_from_schema(
+        self, namespace: str, schema_file: str
+    ) -> str:
+        """Create a new graph based on a user-defined schema.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph to create.
+        schema_file : str
+            The schema file to use to build the graph.
+        """
+        compiled = await asyncio.to_thread(
+            _load_schema, schema_file, self.schema_cache
+        )
+
+        raw_response = await self.client.post(
+            f"{self.prefix}/{namespace}/create_graph_from_schema",
+            content=compiled.body,
+            headers={"Content-Type": "application/json"},
+        )
+
+        raw_response.raise_for_status()
+        self._invalidate(namespace)
+
+        response = CreateGraphResponse.model_validate(raw_response.json())
+
+        return response.message
+
+    async def create_graph_from_csv(
+        self,
+        namespace: str,
+        schema_file: str,
+        csv_file: Optional[str] = None,
+    ) -> str:
+        """Create a new graph using a CSV based on a user-defined schema.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph to create.
+        schema_file : str
+            The schema file to use to build the graph.
+        csv_file : str, optional
+            A local copy of the uploaded CSV. If given, it is validated
+            against the schema (see `whyhow.validation.validate_csv`)
+            before the graph is created.
+
+        Raises
+        ------
+        ValueError
+            If the CSV does not match the schema.
+        """
+        compiled = await asyncio.to_thread(
+            _load_csv_schema, schema_file, csv_file, self.schema_cache
+        )
+
+        raw_response = await self.client.post(
+            f"{self.prefix}/{namespace}/create_graph_from_csv",
+            content=compiled.body,
+            headers={"Content-Type": "application/json"},
+        )
+
+        raw_response.raise_for_status()
+        self._invalidate(namespace)
+
+        response = CreateGraphResponse.model_validate(raw_response.json())
+
+        return response.message
+
+    async def query_graph(
+        self,
+        namespace: str,
+        query: str,
+        include_triples: bool = False,
+        include_chunks: bool = False,
+    ) -> QueryGraphResponse:
+        """Query the graph.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        query : str
+            The query to run.
+
+        Returns
+        -------
+        QueryGraphResponse
+            The namespace, answer, triples, and chunks and Cypher query.
+
+        """
+        request_body = QueryGraphRequest(
+            query=query,
+            include_triples=include_triples,
+            include_chunks=include_chunks,
+        )
+
+        response = await self._post_query(
+            namespace, "query", request_body, QueryGraphResponse
+        )
+
+        return response
+
+    async def query_graph_specific(
+        self,
+        namespace: str,
+        query: str,
+        entities: list[str] = [],
+        relations: list[str] = [],
+        include_triples: bool = False,
+        include_chunks: bool = False,
+    ) -> SpecificQueryGraphResponse:
+        """Query the graph with specific entities and relations.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        entities : list[str]
+            The entities to query.
+
+        relations : list[str]
+            The relations to query.
+
+        Returns
+        -------
+        SpecificQueryGraphResponse
+            The namespace, answer, triples, and chunks.
+
+        """
+        request_body = SpecificQueryGraphRequest(
+            query=query,
+            entities=entities,
+            relations=relations,
+            include_triples=include_triples,
+            include_chunks=include_chunks,
+        )
+
+        response = await self._post_query(
+            namespace,
+            "specific_query",
+            request_body,
+            SpecificQueryGraphResponse,
+        )
+
+        return response
+
+    async def iter_query_graph_many(
+        self,
+        namespace: str,
+        queries: Iterable[str],
+        concurrency: int = 10,
+        include_triples: bool = False,
+        include_chunks: bool = False,
+    ) -> AsyncIterator[tuple[int, QueryGraphResponse | Exception]]:
+        """Query the graph with many queries, yielding as they complete.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        queries : Iterable[str]
+            The queries to run. Consumed lazily.
+
+        concurrency : int
+            The maximum number of requests in flight at once.
+
+        Yields
+        ------
+        tuple[int, QueryGraphResponse | Exception]
+            The position of the query in `queries` and either its response
+            or the exception raised while running it.
+
+        """
+        calls = (
+            partial(
+                self.query_graph,
+                namespace,
+                query,
+                include_triples=include_triples,
+                include_chunks=include_chunks,
+            )
+            for query in queries
+        )
+
+        async for item in _bounded_as_completed(calls, concurrency):
+            yield item
+
+    async def query_graph_many(
+        self,
+        namespace: str,
+        queries: Iterable[str],
+        concurrency: int = 10,
+        include_triples: bool = False,
+        include_chunks: bool = False,
+    ) -> list[QueryGraphResponse | Exception]:
+        """Query the graph with many queries concurrently.
+
+        A failing query does not abort the batch; its exception is returned
+        in its slot instead.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        queries : Iterable[str]
+            The queries to run.
+
+        concurrency : int
+            The maximum number of requests in flight at once.
+
+        Returns
+        -------
+        list[QueryGraphResponse | Exception]
+            One response or exception per query, in the order of `queries`.
+
+        """
+        results: dict[int, QueryGraphResponse | Exception] = {}
+        async for index, result in self.iter_query_graph_many(
+            namespace,
+            queries,
+            concurrency=concurrency,
+            include_triples=include_triples,
+            include_chunks=include_chunks,
+        ):
+            results[index] = result
+
+        return [results[index] for index in range(len(results))]
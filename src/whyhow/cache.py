@@ -0,0 +1,754 @@
+"""Client-side caching of query responses."""
+
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    NamedTuple,
+    Optional,
+    TypeVar,
+    cast,
+)
+
+from whyhow.manifest import hash_file
+from whyhow.schemas.base import BaseResponse
+from whyhow.schemas.graph import (
+    QueryGraphRequest,
+    QueryGraphResponse,
+    SpecificQueryGraphRequest,
+    SpecificQueryGraphResponse,
+)
+
+QueryRequest = QueryGraphRequest | SpecificQueryGraphRequest
+
+# Response schema of every cacheable endpoint, used to deserialize entries.
+RESPONSE_MODELS: dict[str, type[BaseResponse]] = {
+    "query": QueryGraphResponse,
+    "specific_query": SpecificQueryGraphResponse,
+}
+
+# Request schema of every cacheable endpoint.
+REQUEST_MODELS: dict[str, type[QueryRequest]] = {
+    "query": QueryGraphRequest,
+    "specific_query": SpecificQueryGraphRequest,
+}
+
+
+class CacheKey(NamedTuple):
+    """Key identifying a cached query response."""
+
+    namespace: str
+    endpoint: str
+    query: str
+    entities: tuple[str, ...]
+    relations: tuple[str, ...]
+    include_triples: bool
+    include_chunks: bool
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so that trivially different spellings share a key.
+
+    Leading, trailing and repeated whitespace is collapsed and the text is
+    case-folded.
+    """
+    return " ".join(query.split()).casefold()
+
+
+def request_from_key(key: CacheKey) -> QueryRequest:
+    """Rebuild a request that maps to the given cache key.
+
+    The query text is the normalized one stored in the key, so prefer the
+    original request kept by the cache (see `CacheBackend.get_request`).
+    """
+    if key.endpoint == "specific_query":
+        return SpecificQueryGraphRequest(
+            query=key.query,
+            entities=list(key.entities),
+            relations=list(key.relations),
+            include_triples=key.include_triples,
+            include_chunks=key.include_chunks,
+        )
+
+    return QueryGraphRequest(
+        query=key.query,
+        include_triples=key.include_triples,
+        include_chunks=key.include_chunks,
+    )
+
+
+def make_key(
+    namespace: str,
+    endpoint: str,
+    request: QueryRequest,
+) -> CacheKey:
+    """Build the cache key of a query request.
+
+    Parameters
+    ----------
+    namespace : str
+        The namespace of the graph.
+
+    endpoint : str
+        The endpoint the request is sent to, e.g. ``"query"``.
+
+    request : QueryGraphRequest | SpecificQueryGraphRequest
+        The request body.
+
+    Returns
+    -------
+    CacheKey
+        The key. Entities and relations are order-insensitive.
+
+    """
+    entities: tuple[str, ...] = ()
+    relations: tuple[str, ...] = ()
+    if isinstance(request, SpecificQueryGraphRequest):
+        entities = tuple(sorted(set(request.entities)))
+        relations = tuple(sorted(set(request.relations)))
+
+    return CacheKey(
+        namespace=namespace,
+        endpoint=endpoint,
+        query=normalize_query(request.query),
+        entities=entities,
+        relations=relations,
+        include_triples=request.include_triples,
+        include_chunks=request.include_chunks,
+    )
+
+
+class CacheBackend(ABC):
+    """Base class for query response caches.
+
+    Attributes
+    ----------
+    hits : int
+        The number of lookups answered from the cache by this process.
+
+    misses : int
+        The number of lookups that were not in the cache or had expired.
+
+    ttl : float, optional
+        Seconds after which an entry expires. ``None`` disables expiry.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    ttl: Optional[float] = None
+
+    @abstractmethod
+    def get(self, key: CacheKey) -> Optional[BaseResponse]:
+        """Return the cached response, or None on a miss."""
+
+    @abstractmethod
+    def set(
+        self,
+        key: CacheKey,
+        value: BaseResponse,
+        request: Optional[QueryRequest] = None,
+    ) -> None:
+        """Store a response, and the request it answers if given."""
+
+    def get_request(self, key: CacheKey) -> Optional[QueryRequest]:
+        """Return the request stored with an entry, if any.
+
+        Backends that do not store requests return None, in which case the
+        request is rebuilt with `request_from_key`.
+        """
+        return None
+
+    @abstractmethod
+    def invalidate(self, namespace: str) -> None:
+        """Drop every response cached for a namespace."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every response and reset the counters."""
+
+    @abstractmethod
+    def top_keys(
+        self, k: int, namespace: Optional[str] = None
+    ) -> list[CacheKey]:
+        """Return the keys of the `k` most frequently hit entries."""
+
+
+class QueryCache(CacheBackend):
+    """In-memory LRU cache of query responses with per-entry TTL.
+
+    The cache is thread-safe and can be shared between a `WhyHow` and an
+    `AsyncWhyHow` client.
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum number of responses kept. The least recently used
+        response is evicted once it is exceeded.
+
+    ttl : float, optional
+        Seconds after which an entry expires. ``None`` disables expiry.
+
+    Attributes
+    ----------
+    hits : int
+        The number of lookups answered from the cache.
+
+    misses : int
+        The number of lookups that were not in the cache or had expired.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300.0):
+        """Initialize the cache."""
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Key -> (expiry time, response, original request).
+        self._entries: OrderedDict[
+            CacheKey, tuple[float, BaseResponse, Optional[QueryRequest]]
+        ] = OrderedDict()
+        self._key_hits: dict[CacheKey, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of entries, including expired ones."""
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[BaseResponse]:
+        """Return a copy of the cached response, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                    del self._key_hits[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._key_hits[key] += 1
+            self.hits += 1
+
+        return entry[1].model_copy(deep=True)
+
+    def set(
+        self,
+        key: CacheKey,
+        value: BaseResponse,
+        request: Optional[QueryRequest] = None,
+    ) -> None:
+        """Store a response, evicting the least recently used if full."""
+        expires_at = (
+            float("inf") if self.ttl is None else time.monotonic() + self.ttl
+        )
+        value = value.model_copy(deep=True)
+        if request is not None:
+            request = request.model_copy(deep=True)
+        with self._lock:
+            if request is None and key in self._entries:
+                request = self._entries[key][2]
+            self._entries[key] = (expires_at, value, request)
+            self._entries.move_to_end(key)
+            self._key_hits.setdefault(key, 0)
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                del self._key_hits[evicted]
+
+    def get_request(self, key: CacheKey) -> Optional[QueryRequest]:
+        """Return a copy of the request stored with an entry, if any."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[2] is None:
+            return None
+        return entry[2].model_copy(deep=True)
+
+    def invalidate(self, namespace: str) -> None:
+        """Drop every response cached for a namespace."""
+        with self._lock:
+            for key in [k for k in self._entries if k.namespace == namespace]:
+                del self._entries[key]
+                del self._key_hits[key]
+
+    def clear(self) -> None:
+        """Drop every response and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._key_hits.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def top_keys(
+        self, k: int, namespace: Optional[str] = None
+    ) -> list[CacheKey]:
+        """Return the keys of the `k` most frequently hit entries."""
+        with self._lock:
+            counts = [
+                (hits, key)
+                for key, hits in self._key_hits.items()
+                if namespace is None or key.namespace == namespace
+            ]
+
+        return [key for _, key in heapq.nlargest(k, counts)]
+
+
+class SQLiteQueryCache(CacheBackend):
+    """Persistent query cache stored in a SQLite database.
+
+    Responses are stored as JSON, so the cache survives restarts and can be
+    shared by every process on a host (e.g. gunicorn workers). The database
+    runs in WAL mode so readers never block writers, and entries are looked
+    up one at a time, so opening a large cache is instant.
+
+    Lookups only read the database. Recency is approximate: the access time
+    of an entry is written at most once per `access_interval`, along with
+    the hits counted in memory since, and expired entries are deleted by
+    the next `set`.
+
+    Parameters
+    ----------
+    path : str | Path
+        The database file. Created if it does not exist.
+
+    max_bytes : int
+        Budget for the stored JSON. Least recently used entries are evicted
+        once it is exceeded.
+
+    ttl : float, optional
+        Seconds after which an entry expires. ``None`` disables expiry.
+
+    timeout : float
+        Seconds to wait for a lock held by another process.
+
+    access_interval : float
+        Seconds after which a hit writes the access time of an entry again.
+        ``0`` writes on every hit, for exact LRU eviction.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: Optional[float] = 300.0,
+        timeout: float = 30.0,
+        access_interval: float = 60.0,
+    ):
+        """Initialize the cache and create its tables."""
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.timeout = timeout
+        self.access_interval = access_interval
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        # Hits per serialized key not written to the database yet.
+        self._pending_hits: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        connection = self._connection()
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                request TEXT
+            );
+            CREATE INDEX IF NOT EXISTS responses_namespace
+                ON responses (namespace);
+            CREATE INDEX IF NOT EXISTS responses_accessed_at
+                ON responses (accessed_at);
+            CREATE INDEX IF NOT EXISTS responses_expires_at
+                ON responses (expires_at);
+            CREATE TABLE IF NOT EXISTS usage (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                total_size INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO usage VALUES (0, 0);
+            CREATE TRIGGER IF NOT EXISTS responses_insert
+                AFTER INSERT ON responses BEGIN
+                    UPDATE usage SET total_size = total_size + NEW.size;
+                END;
+            CREATE TRIGGER IF NOT EXISTS responses_update
+                AFTER UPDATE OF size ON responses BEGIN
+                    UPDATE usage
+                    SET total_size = total_size - OLD.size + NEW.size;
+                END;
+            CREATE TRIGGER IF NOT EXISTS responses_delete
+                AFTER DELETE ON responses BEGIN
+                    UPDATE usage SET total_size = total_size - OLD.size;
+                END;
+            """)
+        # Databases created before requests were stored lack the column.
+        columns = connection.execute("PRAGMA table_info(responses)")
+        if "request" not in {column[1] for column in columns}:
+            try:
+                connection.execute(
+                    "ALTER TABLE responses ADD COLUMN request TEXT"
+                )
+            except sqlite3.OperationalError as e:
+                # Another process added it first.
+                if "duplicate column" not in str(e):
+                    raise
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread and process."""
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    @staticmethod
+    def _serialize_key(key: CacheKey) -> str:
+        return json.dumps(list(key), separators=(",", ":"))
+
+    @staticmethod
+    def _deserialize_key(serialized_key: str) -> CacheKey:
+        namespace, endpoint, query, entities, relations, triples, chunks = (
+            json.loads(serialized_key)
+        )
+        return CacheKey(
+            namespace,
+            endpoint,
+            query,
+            tuple(entities),
+            tuple(relations),
+            triples,
+            chunks,
+        )
+
+    @property
+    def total_bytes(self) -> int:
+        """Return the size of the stored JSON in bytes."""
+        (total,) = (
+            self._connection()
+            .execute("SELECT total_size FROM usage WHERE id = 0")
+            .fetchone()
+        )
+        return int(total)
+
+    def __len__(self) -> int:
+        """Return the number of entries, including expired ones."""
+        (count,) = (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM responses")
+            .fetchone()
+        )
+        return int(count)
+
+    def get(self, key: CacheKey) -> Optional[BaseResponse]:
+        """Return the cached response, or None on a miss."""
+        connection = self._connection()
+        serialized_key = self._serialize_key(key)
+        now = time.time()
+        row = connection.execute(
+            "SELECT endpoint, value, expires_at, accessed_at FROM responses"
+            " WHERE key = ?",
+            (serialized_key,),
+        ).fetchone()
+
+        if row is None or row[2] < now:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._pending_hits[serialized_key] = (
+                self._pending_hits.get(serialized_key, 0) + 1
+            )
+        if now - row[3] >= self.access_interval:
+            self._write_hits(connection, now)
+
+        return RESPONSE_MODELS[row[0]].model_validate_json(row[1])
+
+    def _write_hits(self, connection: sqlite3.Connection, now: float) -> None:
+        """Write the pending hits and mark their entries as accessed."""
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+        if not pending:
+            return
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "UPDATE responses"
+                " SET hits = hits + ?, accessed_at = MAX(accessed_at, ?)"
+                " WHERE key = ?",
+                [(hits, now, key) for key, hits in pending.items()],
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def set(
+        self,
+        key: CacheKey,
+        value: BaseResponse,
+        request: Optional[QueryRequest] = None,
+    ) -> None:
+        """Store a response, evicting least recently used entries if full.
+
+        A response larger than `max_bytes` is not stored, and the entry it
+        would have replaced is dropped.
+        """
+        serialized_value = value.model_dump_json()
+        serialized_request = (
+            None if request is None else request.model_dump_json()
+        )
+        size = len(serialized_value.encode())
+        if size > self.max_bytes:
+            self._connection().execute(
+                "DELETE FROM responses WHERE key = ?",
+                (self._serialize_key(key),),
+            )
+            return
+
+        now = time.time()
+        expires_at = float("inf") if self.ttl is None else now + self.ttl
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                """
+                INSERT INTO responses (
+                    key, namespace, endpoint, value, size, expires_at,
+                    accessed_at, request
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    value = excluded.value,
+                    size = excluded.size,
+                    expires_at = excluded.expires_at,
+                    accessed_at = excluded.accessed_at,
+                    request = COALESCE(excluded.request, request)
+                """,
+                (
+                    self._serialize_key(key),
+                    key.namespace,
+                    key.endpoint,
+                    serialized_value,
+                    size,
+                    expires_at,
+                    now,
+                    serialized_request,
+                ),
+            )
+            connection.execute(
+                "DELETE FROM responses WHERE expires_at < ?", (now,)
+            )
+            self._evict(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def get_request(self, key: CacheKey) -> Optional[QueryRequest]:
+        """Return the request stored with an entry, if any."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT endpoint, request FROM responses WHERE key = ?",
+                (self._serialize_key(key),),
+            )
+            .fetchone()
+        )
+        if row is None or row[1] is None:
+            return None
+        return REQUEST_MODELS[row[0]].model_validate_json(row[1])
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """Delete least recently used entries until within budget."""
+        (total,) = connection.execute(
+            "SELECT total_size FROM usage WHERE id = 0"
+        ).fetchone()
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+
+        victims = []
+        rows = connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        )
+        for key, size in rows:
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+
+        connection.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def invalidate(self, namespace: str) -> None:
+        """Drop every response cached for a namespace."""
+        self._connection().execute(
+            "DELETE FROM responses WHERE namespace = ?", (namespace,)
+        )
+
+    def clear(self) -> None:
+        """Drop every response and reset the counters."""
+        self._connection().execute("DELETE FROM responses")
+        with self._lock:
+            self._pending_hits.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def top_keys(
+        self, k: int, namespace: Optional[str] = None
+    ) -> list[CacheKey]:
+        """Return the keys of the `k` most frequently hit entries."""
+        self._write_hits(self._connection(), time.time())
+        if namespace is None:
+            rows = self._connection().execute(
+                "SELECT key FROM responses ORDER BY hits DESC LIMIT ?", (k,)
+            )
+        else:
+            rows = self._connection().execute(
+                "SELECT key FROM responses WHERE namespace = ?"
+                " ORDER BY hits DESC LIMIT ?",
+                (namespace, k),
+            )
+
+        return [self._deserialize_key(key) for (key,) in rows]
+
+
+T = TypeVar("T")
+
+
+class SchemaCache:
+    """In-memory LRU cache of values compiled from local files.
+
+    Used to keep parsed schemas, their serialized request bodies and
+    generated schemas across calls. Values are keyed by the SHA-256 of the
+    files they were built from, so an unchanged file under another path
+    is a hit too. The digest of each path is remembered with its size and
+    modification time, and the file is only hashed again once those
+    change.
+
+    The cache is thread-safe. Cached values are shared between callers
+    and must not be mutated.
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum number of compiled values kept. The least recently
+        used value is evicted once it is exceeded.
+
+    max_files : int
+        The maximum number of file digests remembered.
+
+    Attributes
+    ----------
+    hits : int
+        The number of lookups answered from the cache.
+
+    misses : int
+        The number of lookups that had to compile the value.
+    """
+
+    def __init__(self, maxsize: int = 128, max_files: int = 4096):
+        """Initialize the cache."""
+        if maxsize < 1 or max_files < 1:
+            raise ValueError("maxsize and max_files must be at least 1")
+
+        self.maxsize = maxsize
+        self.max_files = max_files
+        self.hits = 0
+        self.misses = 0
+        self._values: OrderedDict[Hashable, Any] = OrderedDict()
+        self._digests: OrderedDict[str, tuple[int, int, str]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of compiled values."""
+        return len(self._values)
+
+    def digest(self, path: str | Path) -> str:
+        """Return the SHA-256 hex digest of a file.
+
+        The file is not read if its size and modification time match the
+        last time it was hashed.
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        with self._lock:
+            known = self._digests.get(key)
+            if known is not None and known[:2] == (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                self._digests.move_to_end(key)
+                return known[2]
+
+        digest = hash_file(key)
+        with self._lock:
+            self._digests[key] = (stat.st_size, stat.st_mtime_ns, digest)
+            self._digests.move_to_end(key)
+            while len(self._digests) > self.max_files:
+                self._digests.popitem(last=False)
+
+        return digest
+
+    def get_or_compile(self, key: Hashable, compile: Callable[[], T]) -> T:
+        """Return the value cached under `key`, compiling it on a miss.
+
+        Keys are expected to include the digests of the files the value
+        depends on. Exceptions raised by `compile` are not cached.
+        """
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                self.hits += 1
+                return cast(T, self._values[key])
+            self.misses += 1
+
+        value = compile()
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+        return value
+
+    def clear(self) -> None:
+        """Drop every value and digest and reset the counters."""
+        with self._lock:
+            self._values.clear()
+            self._digests.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared by every client unless one is given its own `schema_cache`.
+SCHEMA_CACHE = SchemaCache()
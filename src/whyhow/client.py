@@ -1,11 +1,13 @@
 """Implementation of the client logic."""
 
 import os
-from typing import Any, Generator, Optional
+from types import TracebackType
+from typing import Any, Generator, Optional, Type
 
-from httpx import AsyncClient, Auth, Client, Request, Response
+from httpx import AsyncClient, Auth, Client, Limits, Request, Response
 
-from whyhow.apis.graph import GraphAPI
+from whyhow.apis.graph import AsyncGraphAPI, GraphAPI
+from whyhow.cache import CacheBackend
 
 
 class APIKeyAuth(Auth):
@@ -103,6 +105,16 @@ class WhyHow:
     httpx_kwargs : dict, optional
         Additional keyword arguments to pass to the httpx client.
 
+    max_workers : int, optional
+        The default thread count of `graph.map_queries` and
+        `graph.map_specific_queries`. Unless `limits` is passed in
+        `httpx_kwargs`, the connection pool is sized to hold at least this
+        many connections.
+
+    cache : CacheBackend, optional
+        Opt-in client-side cache of query responses, e.g. a
+        `QueryCache` or a `SQLiteQueryCache`.
+
     Attributes
     ----------
     httpx_client : httpx.Client
@@ -127,6 +139,8 @@ class WhyHow:
             str = "https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com",
         use_azure: Optional[bool] = False,
         httpx_kwargs: dict[str, Any] | None = None,
+        max_workers: int = 8,
+        cache: CacheBackend | None = None,
     ) -> None:
         """Initialize the client."""
         if httpx_kwargs is None:
@@ -243,13 +257,26 @@ class WhyHow:
 
         httpx_kwargs["timeout"] = 60.0  # Set timeout to 30 seconds
 
+        if "limits" not in httpx_kwargs:
+            # Grow the httpx defaults (100 / 20) so that every worker thread
+            # can hold on to a keep-alive connection.
+            httpx_kwargs["limits"] = Limits(
+                max_connections=max(max_workers, 100),
+                max_keepalive_connections=max(max_workers, 20),
+            )
+
         self.httpx_client = Client(
             base_url=base_url,
             auth=auth,
             **httpx_kwargs,
         )
 
-        self.graph = GraphAPI(client=self.httpx_client, prefix="/graphs")
+        self.graph = GraphAPI(
+            client=self.httpx_client,
+            prefix="/graphs",
+            max_workers=max_workers,
+            cache=cache,
+        )
 
 
 class AsyncWhyHow:
@@ -267,10 +294,25 @@ class AsyncWhyHow:
     httpx_kwargs : dict, optional
         Additional keyword arguments to pass to the httpx async client.
 
+    cache : CacheBackend, optional
+        Opt-in client-side cache of query responses, e.g. a
+        `QueryCache` or a `SQLiteQueryCache`.
+
     Attributes
     ----------
     httpx_client : httpx.AsyncClient
         An async httpx client.
+
+    graph : AsyncGraphAPI
+        Coroutine counterparts of the `WhyHow.graph` methods.
+
+    Examples
+    --------
+    The client can be used as an async context manager so that the
+    connection pool is closed once the event loop is done with it.
+
+    >>> async with AsyncWhyHow() as client:  # doctest: +SKIP
+    ...     await client.graph.query_graph("my-namespace", "Who is Alice?")
     """
 
     def __init__(
@@ -285,6 +327,7 @@ class AsyncWhyHow:
         base_url:
             str = "https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com",
         httpx_kwargs: dict[str, Any] | None = None,
+        cache: CacheBackend | None = None,
     ) -> None:
         """Initialize the client."""
         if httpx_kwargs is None:
@@ -337,20 +380,44 @@ class AsyncWhyHow:
                 raise ValueError("NEO4J_URL must be set.")
 
         auth = APIKeyAuth(
-            api_key,
-            pinecone_api_key,
-            openai_api_key,
-            neo4j_user,
-            neo4j_password,
-            neo4j_url,
-            model_type,
+            api_key=api_key,
+            pinecone_api_key=pinecone_api_key,
+            neo4j_url=neo4j_url,
+            neo4j_user=neo4j_user,
+            neo4j_password=neo4j_password,
+            model_type=model_type,
+            openai_api_key=openai_api_key,
         )
 
         if "base_url" in httpx_kwargs:
             raise ValueError("base_url cannot be set in httpx_kwargs.")
 
+        httpx_kwargs.setdefault("timeout", 60.0)
+
         self.httpx_client = AsyncClient(
             base_url=base_url,
             auth=auth,
             **httpx_kwargs,
         )
+
+        self.graph = AsyncGraphAPI(
+            client=self.httpx_client, prefix="/graphs", cache=cache
+        )
+
+    async def aclose(self) -> None:
+        """Close the underlying httpx client and its connection pool."""
+        await self.httpx_client.aclose()
+
+    async def __aenter__(self) -> "AsyncWhyHow":
+        """Enter the async context manager."""
+        await self.httpx_client.__aenter__()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Exit the async context manager and close the client."""
+        await self.httpx_client.__aexit__(exc_type, exc_value, traceback)
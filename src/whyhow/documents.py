@@ -0,0 +1,279 @@
+"""Upload limits, preflight checks and batching of documents."""
+
+import hashlib
+import io
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Iterable, Literal, Optional, Sequence, Union
+
+from whyhow.schemas.base import BaseReturn
+
+# Limits enforced by the add documents endpoint during the beta.
+MAX_UPLOAD_BYTES = 8388600
+MAX_PDFS_PER_UPLOAD = 3
+SUPPORTED_SUFFIXES = (".pdf", ".csv")
+
+# PDF readers accept the header anywhere in the first kilobyte.
+PDF_MAGIC = b"%PDF-"
+
+# Control characters that do not appear in text, whatever its encoding.
+_CONTROL_BYTES = bytes(set(range(32)) - set(b"\t\n\v\f\r\x1a\x1b")) + b"\x7f"
+SNIFF_BYTES = 8192
+
+DocumentKind = Literal["pdf", "csv"]
+
+# Documents held in memory are passed as a filename and their content.
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+InMemoryDocument = tuple[str, Union[Buffer, BinaryIO]]
+DocumentSource = Union[str, Path, InMemoryDocument]
+
+
+def document_name(document: Path | InMemoryDocument) -> str:
+    """Return the filename a document is uploaded under."""
+    if isinstance(document, Path):
+        return document.name
+
+    return document[0]
+
+
+def document_size(document: Path | InMemoryDocument) -> int:
+    """Return the number of bytes a document uploads.
+
+    File-like objects upload from their current position to the end, so
+    they must be seekable for their size to be known up front.
+    """
+    if isinstance(document, Path):
+        return os.path.getsize(document)
+
+    filename, content = document
+    if isinstance(content, (bytes, bytearray, memoryview, mmap.mmap)):
+        with memoryview(content) as view:
+            return view.nbytes
+
+    if not hasattr(content, "read"):
+        raise ValueError(
+            f"Content of {filename!r} must be bytes, a memoryview, an mmap"
+            " or a binary file-like object"
+        )
+
+    try:
+        position = content.tell()
+        end = content.seek(0, io.SEEK_END)
+        content.seek(position)
+    except (AttributeError, OSError) as e:
+        raise ValueError(
+            f"File-like document {filename!r} must be seekable"
+        ) from e
+
+    return end - position
+
+
+class DocumentInfo(BaseReturn):
+    """Schema for the preflight result of a single document."""
+
+    path: str
+    kind: Optional[DocumentKind] = None
+    size: int = 0
+    mtime_ns: int = 0
+    sha256: Optional[str] = None
+    error: Optional[str] = None
+
+
+class PreflightReport(BaseReturn):
+    """Schema for the preflight result of a set of documents."""
+
+    documents: list[DocumentInfo]
+
+    @property
+    def valid(self) -> list[DocumentInfo]:
+        """Return the documents that can be uploaded."""
+        return [info for info in self.documents if info.error is None]
+
+    @property
+    def invalid(self) -> list[DocumentInfo]:
+        """Return the documents that failed a check."""
+        return [info for info in self.documents if info.error is not None]
+
+
+def sniff_kind(head: bytes) -> Optional[DocumentKind]:
+    """Guess the kind of a document from its first bytes.
+
+    A document is a PDF if the PDF header appears in its first kilobyte,
+    and a CSV if it is text: it has no NUL byte and few other control
+    characters. Any ASCII-compatible encoding is accepted, e.g. UTF-8 or
+    Latin-1. Returns None for anything else.
+    """
+    if PDF_MAGIC in head[:1024]:
+        return "pdf"
+
+    if head and b"\x00" not in head:
+        controls = len(head) - len(head.translate(None, _CONTROL_BYTES))
+        if controls * 100 <= len(head):
+            return "csv"
+
+    return None
+
+
+def inspect_document(
+    document: str | Path,
+    compute_hash: bool = True,
+    chunk_size: int = 1024 * 1024,
+) -> DocumentInfo:
+    """Check a document in a single pass over the file.
+
+    The file is opened once to read its size and modification time, sniff
+    its first bytes and, optionally, stream it through SHA-256.
+
+    Parameters
+    ----------
+    document : str | Path
+        The document to check.
+
+    compute_hash : bool
+        Whether to compute the SHA-256 digest of the content.
+
+    chunk_size : int
+        The number of bytes read at a time while hashing.
+
+    Returns
+    -------
+    DocumentInfo
+        The facts gathered, with `error` set if a check failed.
+
+    """
+    path = Path(document)
+    info = DocumentInfo(path=str(document))
+    if path.suffix not in SUPPORTED_SUFFIXES:
+        info.error = "Only PDFs and CSVs are supported"
+        return info
+
+    try:
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            info.size = stat.st_size
+            info.mtime_ns = stat.st_mtime_ns
+
+            head = f.read(chunk_size if compute_hash else SNIFF_BYTES)
+            if compute_hash:
+                digest = hashlib.sha256(head)
+                while chunk := f.read(chunk_size):
+                    digest.update(chunk)
+                info.sha256 = digest.hexdigest()
+    except FileNotFoundError:
+        info.error = "Document does not exist"
+        return info
+    except OSError as e:
+        info.error = f"Document cannot be read: {e}"
+        return info
+
+    if info.size == 0:
+        info.error = "Document is empty"
+    elif info.size > MAX_UPLOAD_BYTES:
+        info.error = (
+            f"Document too large, the upload limit is {MAX_UPLOAD_BYTES}"
+            " bytes."
+        )
+    elif sniff_kind(head[:SNIFF_BYTES]) != path.suffix[1:]:
+        info.error = f"Content does not match the {path.suffix} extension"
+    else:
+        info.kind = "pdf" if path.suffix == ".pdf" else "csv"
+
+    return info
+
+
+def preflight_documents(
+    documents: Iterable[str | Path],
+    max_workers: int = 8,
+    compute_hash: bool = True,
+) -> PreflightReport:
+    """Check many documents in parallel before uploading them.
+
+    Parameters
+    ----------
+    documents : Iterable[str | Path]
+        The documents to check.
+
+    max_workers : int
+        The number of threads checking documents.
+
+    compute_hash : bool
+        Whether to compute the SHA-256 digest of every document.
+
+    Returns
+    -------
+    PreflightReport
+        One `DocumentInfo` per document, in input order. It can be passed
+        to `add_documents_bulk` instead of the paths.
+
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        infos = list(
+            executor.map(
+                partial(inspect_document, compute_hash=compute_hash),
+                documents,
+            )
+        )
+
+    return PreflightReport(documents=infos)
+
+
+def pack_documents(
+    documents: Sequence[tuple[Path, int]],
+) -> tuple[list[list[Path]], dict[str, str]]:
+    """Pack documents into batches that each satisfy the upload limits.
+
+    PDFs are packed first-fit-decreasing by size into batches of at most
+    `MAX_PDFS_PER_UPLOAD` files and `MAX_UPLOAD_BYTES` bytes. Every CSV is
+    uploaded on its own.
+
+    Parameters
+    ----------
+    documents : Sequence[tuple[Path, int]]
+        The path and size in bytes of each document.
+
+    Returns
+    -------
+    tuple[list[list[Path]], dict[str, str]]
+        The batches, and the documents that cannot be uploaded at all
+        mapped to the reason why.
+
+    """
+    batches: list[list[Path]] = []
+    rejected: dict[str, str] = {}
+    # PDF batches that can still take another document, with their size.
+    open_batches: list[tuple[list[Path], int]] = []
+
+    ordered = sorted(documents, key=lambda document: document[1], reverse=True)
+    for path, size in ordered:
+        if path.suffix not in SUPPORTED_SUFFIXES:
+            rejected[str(path)] = "Only PDFs and CSVs are supported"
+            continue
+
+        if size > MAX_UPLOAD_BYTES:
+            rejected[str(path)] = (
+                f"Document too large, the upload limit is {MAX_UPLOAD_BYTES}"
+                " bytes."
+            )
+            continue
+
+        if path.suffix == ".csv":
+            batches.append([path])
+            continue
+
+        for i, (batch, batch_size) in enumerate(open_batches):
+            if batch_size + size <= MAX_UPLOAD_BYTES:
+                batch.append(path)
+                if len(batch) < MAX_PDFS_PER_UPLOAD:
+                    open_batches[i] = (batch, batch_size + size)
+                else:
+                    del open_batches[i]
+                break
+        else:
+            batch = [path]
+            batches.append(batch)
+            open_batches.append((batch, size))
+
+    return batches, rejected
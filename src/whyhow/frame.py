@@ -0,0 +1,405 @@
+"""Columnar in-memory representation of large graphs."""
+
+from array import array
+from typing import Any, Generic, Hashable, Iterable, Optional, TypeVar
+
+from whyhow.schemas.common import (
+    Graph,
+    Node,
+    Relationship,
+    Triple,
+    node_identity,
+)
+from whyhow.schemas.graph import (
+    GetGraphResponse,
+    QueryGraphResponse,
+    QueryGraphReturn,
+    QueryGraphTripleResponse,
+    SpecificQueryGraphResponse,
+)
+
+H = TypeVar("H", bound=Hashable)
+
+# Label given to nodes of query triples, which carry no type.
+DEFAULT_LABEL = "Entity"
+
+# Row of a missing name in the name column.
+NO_NAME = -1
+
+
+class InternTable(Generic[H]):
+    """Table storing each distinct value once, referred to by its row."""
+
+    def __init__(self, values: Iterable[H] = ()) -> None:
+        """Initialize the table with distinct values."""
+        self.values: list[H] = []
+        self._rows: dict[H, int] = {}
+        for value in values:
+            self.intern(value)
+
+    def __len__(self) -> int:
+        """Return the number of distinct values."""
+        return len(self.values)
+
+    def __getitem__(self, row: int) -> H:
+        """Return the value stored at a row."""
+        return self.values[row]
+
+    def intern(self, value: H) -> int:
+        """Return the row of a value, adding it if it is new."""
+        row = self._rows.get(value)
+        if row is None:
+            row = self._rows[value] = len(self.values)
+            self.values.append(value)
+        return row
+
+    def find(self, value: H) -> Optional[int]:
+        """Return the row of a value, or None if it is not in the table."""
+        return self._rows.get(value)
+
+
+class GraphFrame:
+    """Graph stored in array-backed columns.
+
+    Nodes and edges are rows. Labels, relationship types and names are
+    interned: every distinct string is stored once and the columns hold
+    integer rows of the string tables. Edges point to their nodes by row.
+    Other properties are kept in sparse columns mapping a row to its
+    value, so a property set on few rows costs nothing on the others.
+
+    Nodes are deduplicated as in `Graph.from_relationships`.
+
+    Parameters
+    ----------
+    node_key : str, optional
+        A property identifying nodes together with their labels, e.g.
+        ``"name"``. By default nodes are the same only if all of their
+        properties are equal.
+
+    Attributes
+    ----------
+    strings : InternTable[str]
+        The relationship types and node names.
+
+    label_sets : InternTable[tuple[str, ...]]
+        The distinct label lists of the nodes.
+
+    node_labels, node_names : array
+        The label set and name (``NO_NAME`` if none) of every node.
+
+    node_properties : dict[str, dict[int, Any]]
+        The sparse columns of the other node properties.
+
+    edge_types, edge_starts, edge_ends : array
+        The type, start node and end node of every edge.
+
+    edge_properties : dict[str, dict[int, Any]]
+        The sparse columns of the edge properties.
+    """
+
+    def __init__(self, node_key: Optional[str] = None):
+        """Initialize an empty frame."""
+        self.node_key = node_key
+        self.strings: InternTable[str] = InternTable()
+        self.label_sets: InternTable[tuple[str, ...]] = InternTable()
+        self.node_labels = array("q")
+        self.node_names = array("q")
+        self.node_properties: dict[str, dict[int, Any]] = {}
+        self.edge_types = array("q")
+        self.edge_starts = array("q")
+        self.edge_ends = array("q")
+        self.edge_properties: dict[str, dict[int, Any]] = {}
+        # Row of every node identity, built on first use for loaded frames.
+        self._node_rows: Optional[dict[Hashable, int]] = {}
+
+    @property
+    def num_nodes(self) -> int:
+        """Return the number of nodes."""
+        return len(self.node_labels)
+
+    @property
+    def num_edges(self) -> int:
+        """Return the number of edges."""
+        return len(self.edge_types)
+
+    def add_node(self, labels: list[str], properties: dict[str, Any]) -> int:
+        """Add a node unless an identical one exists and return its row."""
+        if self._node_rows is None:
+            self._node_rows = {}
+            for node in range(self.num_nodes):
+                self._node_rows.setdefault(
+                    node_identity(
+                        list(self.label_sets[self.node_labels[node]]),
+                        self.get_node_properties(node),
+                        self.node_key,
+                    ),
+                    node,
+                )
+
+        identity = node_identity(labels, properties, self.node_key)
+        row = self._node_rows.get(identity)
+        if row is not None:
+            return row
+
+        row = self._node_rows[identity] = len(self.node_labels)
+        self.node_labels.append(self.label_sets.intern(tuple(labels)))
+        name = properties.get("name")
+        if isinstance(name, str):
+            self.node_names.append(self.strings.intern(name))
+        else:
+            self.node_names.append(NO_NAME)
+        for key, value in properties.items():
+            if key != "name" or not isinstance(value, str):
+                self.node_properties.setdefault(key, {})[row] = value
+
+        return row
+
+    def add_edge(
+        self,
+        type: str,
+        start: int,
+        end: int,
+        properties: Optional[dict[str, Any]] = None,
+    ) -> int:
+        """Add an edge between two node rows and return its row."""
+        if not (0 <= start < self.num_nodes and 0 <= end < self.num_nodes):
+            raise ValueError("start and end must be rows of existing nodes")
+
+        row = len(self.edge_types)
+        self.edge_types.append(self.strings.intern(type))
+        self.edge_starts.append(start)
+        self.edge_ends.append(end)
+        for key, value in (properties or {}).items():
+            self.edge_properties.setdefault(key, {})[row] = value
+
+        return row
+
+    def add_relationship(self, relationship: Relationship) -> int:
+        """Add a relationship and its nodes and return the edge row."""
+        start, end = relationship.start_node, relationship.end_node
+        return self.add_edge(
+            relationship.type,
+            self.add_node(start.labels, start.properties),
+            self.add_node(end.labels, end.properties),
+            relationship.properties,
+        )
+
+    def get_node_properties(self, row: int) -> dict[str, Any]:
+        """Return the properties of a node, name first."""
+        properties = {}
+        if self.node_names[row] != NO_NAME:
+            properties["name"] = self.strings[self.node_names[row]]
+        for key, column in self.node_properties.items():
+            if row in column:
+                properties[key] = column[row]
+        return properties
+
+    def get_node(self, row: int) -> Node:
+        """Return a node as a `Node` model."""
+        return Node(
+            labels=list(self.label_sets[self.node_labels[row]]),
+            properties=self.get_node_properties(row),
+        )
+
+    def get_edge_properties(self, row: int) -> dict[str, Any]:
+        """Return the properties of an edge."""
+        return {
+            key: column[row]
+            for key, column in self.edge_properties.items()
+            if row in column
+        }
+
+    def get_relationship(self, row: int) -> Relationship:
+        """Return an edge as a `Relationship` model."""
+        return Relationship(
+            type=self.strings[self.edge_types[row]],
+            start_node=self.get_node(self.edge_starts[row]),
+            end_node=self.get_node(self.edge_ends[row]),
+            properties=self.get_edge_properties(row),
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        strings: Iterable[str],
+        label_sets: Iterable[tuple[str, ...]],
+        node_labels: Iterable[int],
+        node_names: Iterable[int],
+        node_properties: dict[str, dict[int, Any]],
+        edge_types: Iterable[int],
+        edge_starts: Iterable[int],
+        edge_ends: Iterable[int],
+        edge_properties: dict[str, dict[int, Any]],
+        node_key: Optional[str] = None,
+    ) -> "GraphFrame":
+        """Build a frame from its columns, e.g. loaded from a file.
+
+        The columns are copied but not checked.
+        """
+        frame = cls(node_key=node_key)
+        frame.strings = InternTable(strings)
+        frame.label_sets = InternTable(label_sets)
+        frame.node_labels = array("q", node_labels)
+        frame.node_names = array("q", node_names)
+        frame.node_properties = node_properties
+        frame.edge_types = array("q", edge_types)
+        frame.edge_starts = array("q", edge_starts)
+        frame.edge_ends = array("q", edge_ends)
+        frame.edge_properties = edge_properties
+        frame._node_rows = None
+        return frame
+
+    @classmethod
+    def from_relationships(
+        cls,
+        relationships: Iterable[Relationship],
+        node_key: Optional[str] = None,
+    ) -> "GraphFrame":
+        """Build a frame from relationships."""
+        frame = cls(node_key=node_key)
+        for relationship in relationships:
+            frame.add_relationship(relationship)
+        return frame
+
+    @classmethod
+    def from_graph(
+        cls, graph: Graph, node_key: Optional[str] = None
+    ) -> "GraphFrame":
+        """Build a frame from a graph, keeping nodes without edges."""
+        frame = cls(node_key=node_key)
+        for node in graph.nodes:
+            frame.add_node(node.labels, node.properties)
+        for relationship in graph.relationships:
+            frame.add_relationship(relationship)
+        return frame
+
+    def to_graph(self) -> Graph:
+        """Convert the frame to a `Graph`.
+
+        Every node is built once and shared by its relationships.
+        """
+        nodes = [self.get_node(row) for row in range(self.num_nodes)]
+        types = self.strings.values
+        relationships = [
+            Relationship(
+                type=types[self.edge_types[row]],
+                start_node=nodes[self.edge_starts[row]],
+                end_node=nodes[self.edge_ends[row]],
+                properties=self.get_edge_properties(row),
+            )
+            for row in range(self.num_edges)
+        ]
+        return Graph.model_construct(relationships=relationships, nodes=nodes)
+
+    @classmethod
+    def from_triples(
+        cls, triples: Iterable[Triple], node_key: Optional[str] = None
+    ) -> "GraphFrame":
+        """Build a frame from triples."""
+        frame = cls(node_key=node_key)
+        for triple in triples:
+            frame.add_edge(
+                triple.relationship,
+                frame.add_node([triple.head_type], {"name": triple.head}),
+                frame.add_node([triple.tail_type], {"name": triple.tail}),
+                triple.properties,
+            )
+        return frame
+
+    def to_triples(self) -> list[Triple]:
+        """Convert the edges to triples.
+
+        Raises
+        ------
+        ValueError
+            If a node has no name.
+        """
+        names = self.strings.values
+        label_sets = self.label_sets.values
+        triples = []
+        for row in range(self.num_edges):
+            start, end = self.edge_starts[row], self.edge_ends[row]
+            head, tail = self.node_names[start], self.node_names[end]
+            if head == NO_NAME:
+                raise ValueError("Start node must have a name property.")
+            if tail == NO_NAME:
+                raise ValueError("End node must have a name property.")
+
+            triples.append(
+                Triple(
+                    head=names[head],
+                    head_type=label_sets[self.node_labels[start]][0],
+                    relationship=names[self.edge_types[row]],
+                    tail=names[tail],
+                    tail_type=label_sets[self.node_labels[end]][0],
+                    properties=self.get_edge_properties(row),
+                )
+            )
+        return triples
+
+    @classmethod
+    def from_response(
+        cls,
+        response: (
+            GetGraphResponse
+            | QueryGraphResponse
+            | QueryGraphReturn
+            | SpecificQueryGraphResponse
+        ),
+        node_key: Optional[str] = None,
+    ) -> "GraphFrame":
+        """Build a frame from the graph or triples of an API response.
+
+        Query triples only name their nodes, which get the label of
+        `head_type` and `tail_type` if present and ``"Entity"`` otherwise.
+
+        Raises
+        ------
+        ValueError
+            If a triple has no head, relation or tail.
+        """
+        if isinstance(response, GetGraphResponse):
+            return cls.from_graph(response.graph, node_key=node_key)
+
+        frame = cls(node_key=node_key)
+        for triple in response.triples:
+            if isinstance(triple, QueryGraphTripleResponse):
+                values = triple.model_dump()
+            else:
+                values = triple
+                missing = [
+                    key
+                    for key in ("head", "relation", "tail")
+                    if key not in values
+                ]
+                if missing:
+                    raise ValueError(
+                        f"Triple {values!r} has no {', '.join(missing)}"
+                    )
+            head_type = values.get("head_type", DEFAULT_LABEL)
+            tail_type = values.get("tail_type", DEFAULT_LABEL)
+            frame.add_edge(
+                values["relation"],
+                frame.add_node([head_type], {"name": values["head"]}),
+                frame.add_node([tail_type], {"name": values["tail"]}),
+            )
+        return frame
+
+    def to_query_triples(self) -> list[QueryGraphTripleResponse]:
+        """Convert the edges to the triples of query responses."""
+        names = self.strings.values
+        node_names = self.node_names
+        triples = []
+        for row in range(self.num_edges):
+            head = node_names[self.edge_starts[row]]
+            tail = node_names[self.edge_ends[row]]
+            if NO_NAME in (head, tail):
+                raise ValueError("Start and end nodes must have a name.")
+            triples.append(
+                QueryGraphTripleResponse(
+                    head=names[head],
+                    relation=names[self.edge_types[row]],
+                    tail=names[tail],
+                )
+            )
+        return triples
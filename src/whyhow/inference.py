@@ -0,0 +1,839 @@
+"""Schema inference from the content of documents."""
+
+import csv
+import hashlib
+import heapq
+import json
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+from pathlib import Path
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    Literal,
+    Optional,
+    Sequence,
+    TextIO,
+    TypeVar,
+)
+
+from whyhow.schemas.base import BaseReturn
+from whyhow.schemas.common import (
+    Schema,
+    SchemaEntity,
+    SchemaRelation,
+    TriplePattern,
+)
+
+ColumnType = Literal["empty", "boolean", "integer", "float", "date", "string"]
+
+NULL_VALUES = frozenset({"", "na", "n/a", "nan", "none", "null", "-"})
+BOOLEAN_VALUES = frozenset({"true", "false", "yes", "no"})
+
+JSON_SUFFIXES = (".json", ".jsonl", ".ndjson")
+
+T = TypeVar("T")
+
+# Types of the columns that can identify rows and join documents.
+JOINABLE_TYPES = frozenset({"string", "integer"})
+
+# Currency symbols and thousands separators are ignored for numbers.
+_NUMBER_RE = re.compile(r"^[-+]?[$€£¥]?[-+]?(\d{1,3}(,\d{3})+|\d*)(\.\d+)?$")
+
+
+def _merge_types(a: ColumnType, b: ColumnType) -> ColumnType:
+    """Return the most general of two types, e.g. float for integers."""
+    if a == b or b == "empty":
+        return a
+    if a == "empty":
+        return b
+    if {a, b} == {"integer", "float"}:
+        return "float"
+    return "string"
+
+
+def classify_value(value: str) -> ColumnType:
+    """Return the narrowest type of a single CSV value."""
+    stripped = value.strip()
+    if stripped.casefold() in NULL_VALUES:
+        return "empty"
+
+    if stripped.casefold() in BOOLEAN_VALUES:
+        return "boolean"
+
+    if any(c.isdigit() for c in stripped) and _NUMBER_RE.match(stripped):
+        if "." in stripped:
+            return "float"
+        return "integer"
+
+    if len(stripped) == 10 and stripped[4] == "-":
+        try:
+            date.fromisoformat(stripped)
+        except ValueError:
+            pass
+        else:
+            return "date"
+
+    return "string"
+
+
+class DistinctCounter:
+    """Estimate the number of distinct values in bounded memory.
+
+    A k-minimum-values sketch: the `k` smallest 64-bit hashes are kept, so
+    the count is exact below `k` distinct values and an estimate with
+    about `1 / sqrt(k)` relative error above.
+    """
+
+    def __init__(self, k: int = 1024) -> None:
+        """Initialize an empty sketch."""
+        self.k = k
+        self._heap: list[int] = []  # negated, so the largest is on top
+        self._members: set[int] = set()
+
+    def add(self, value: str) -> None:
+        """Add a value to the sketch."""
+        self.update((value,))
+
+    def update(self, values: Iterable[str]) -> None:
+        """Add many values to the sketch."""
+        heap, members, k = self._heap, self._members, self.k
+        blake2b, from_bytes = hashlib.blake2b, int.from_bytes
+        for value in values:
+            digest = blake2b(value.encode(), digest_size=8).digest()
+            h = from_bytes(digest, "big")
+            if h in members:
+                continue
+
+            if len(heap) < k:
+                heapq.heappush(heap, -h)
+                members.add(h)
+            elif h < -heap[0]:
+                members.discard(-heapq.heapreplace(heap, -h))
+                members.add(h)
+
+    def __len__(self) -> int:
+        """Return the (estimated) number of distinct values."""
+        if len(self._heap) < self.k:
+            return len(self._heap)
+
+        return int((self.k - 1) * 2**64 / -self._heap[0])
+
+
+class ColumnProfile(BaseReturn):
+    """Schema for the statistics of one column."""
+
+    name: str
+    count: int = 0
+    nulls: int = 0
+    distinct: int = 0
+    type: ColumnType = "empty"
+    examples: list[str] = []
+
+    @property
+    def null_ratio(self) -> float:
+        """Return the fraction of rows where the column is empty."""
+        total = self.count + self.nulls
+        return self.nulls / total if total else 1.0
+
+    @property
+    def uniqueness(self) -> float:
+        """Return the distinct values per non-empty value, at most 1."""
+        return min(1.0, self.distinct / self.count) if self.count else 0.0
+
+
+class DocumentProfile(BaseReturn):
+    """Schema for the statistics of a CSV or JSON document.
+
+    The columns of a JSON document are the dotted paths of the values in
+    its records.
+    """
+
+    path: str
+    rows: int
+    profiled_rows: int
+    columns: list[ColumnProfile]
+
+    def get_column(self, name: str) -> Optional[ColumnProfile]:
+        """Return the profile of a column by name if it exists."""
+        for column in self.columns:
+            if column.name == name:
+                return column
+        return None
+
+
+class _ColumnStats:
+    """Accumulator behind a `ColumnProfile`."""
+
+    def __init__(self, name: str, sketch_size: int, examples: int) -> None:
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.type: ColumnType = "empty"
+        self.distinct = DistinctCounter(sketch_size)
+        self.examples: list[str] = []
+        self.max_examples = examples
+
+    def add(self, value: Optional[str]) -> bool:
+        """Add a value and return whether it was non-empty."""
+        value_type = "empty" if value is None else classify_value(value)
+        if value is None or value_type == "empty":
+            self.nulls += 1
+            return False
+
+        value = value.strip()
+        self.count += 1
+        self.type = _merge_types(self.type, value_type)
+        self.distinct.add(value)
+        if len(self.examples) < self.max_examples and (
+            value not in self.examples
+        ):
+            self.examples.append(value)
+        return True
+
+    def profile(self) -> ColumnProfile:
+        return ColumnProfile(
+            name=self.name,
+            count=self.count,
+            nulls=self.nulls,
+            distinct=len(self.distinct),
+            type=self.type,
+            examples=self.examples,
+        )
+
+
+def _reservoir(
+    rows: Iterable[T], size: int, seed: int
+) -> tuple[list[T], int]:
+    """Return a uniform sample of rows and the total number of rows."""
+    rng = random.Random(seed)  # nosec B311
+    sample: list[T] = []
+    total = 0
+    for total, row in enumerate(rows, start=1):
+        if len(sample) < size:
+            sample.append(row)
+        else:
+            i = rng.randrange(total)
+            if i < size:
+                sample[i] = row
+
+    return sample, total
+
+
+def profile_csv(
+    path: str | Path,
+    sample_size: Optional[int] = None,
+    sketch_size: int = 1024,
+    examples: int = 5,
+    seed: int = 0,
+) -> DocumentProfile:
+    """Stream a CSV document and profile every column.
+
+    Memory use is bounded by `sketch_size` (and `sample_size`), not by the
+    number of rows.
+
+    Parameters
+    ----------
+    path : str | Path
+        The CSV document, with a header row.
+
+    sample_size : int, optional
+        Profile a uniform reservoir sample of this many rows instead of
+        every row. The whole file is still read once.
+
+    sketch_size : int
+        The number of hashes kept per column to count distinct values.
+        Counts are exact below this number.
+
+    examples : int
+        The number of distinct example values kept per column.
+
+    seed : int
+        The seed of the reservoir sample, so that profiles are repeatable.
+
+    Returns
+    -------
+    DocumentProfile
+        The statistics of every named column.
+
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        # Trailing delimiters produce unnamed columns, which are skipped.
+        named = [(i, name) for i, name in enumerate(header) if name.strip()]
+        columns = [
+            _ColumnStats(name, sketch_size, examples) for _, name in named
+        ]
+
+        rows: Iterable[list[str]] = reader
+        total = 0
+        if sample_size is not None:
+            rows, total = _reservoir(reader, sample_size, seed)
+
+        profiled = 0
+        for profiled, row in enumerate(rows, start=1):
+            for (i, _), column in zip(named, columns):
+                column.add(row[i] if i < len(row) else None)
+
+    return DocumentProfile(
+        path=str(path),
+        rows=total if sample_size is not None else profiled,
+        profiled_rows=profiled,
+        columns=[column.profile() for column in columns],
+    )
+
+
+def _read_past_whitespace(
+    f: TextIO, buffer: str, pos: int, chunk_size: int
+) -> tuple[str, int, int]:
+    """Skip whitespace, reading more of the file when the buffer runs out.
+
+    Returns the buffer, trimmed of what was consumed, the position of the
+    next character, which is past the end only at the end of file, and
+    the number of characters trimmed.
+    """
+    trimmed = 0
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos < len(buffer):
+            return buffer, pos, trimmed
+
+        trimmed += len(buffer)
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return "", 0, trimmed
+        buffer, pos = chunk, 0
+
+
+def _peek(buffer: str, pos: int) -> str:
+    """Return the character at a position, or "" past the end."""
+    return buffer[pos] if pos < len(buffer) else ""
+
+
+def iter_json_records(
+    path: str | Path,
+    chunk_size: int = 64 * 1024,
+    max_record_size: int = 16 * 1024 * 1024,
+) -> Iterator[dict[str, Any]]:
+    """Parse the records of a JSON document incrementally.
+
+    The document is either a JSON array of objects or a sequence of
+    objects separated by whitespace (JSON Lines). Only the record being
+    parsed is held in memory, so the size of the document does not
+    matter.
+
+    Parameters
+    ----------
+    path : str | Path
+        The JSON or JSON Lines document.
+
+    chunk_size : int
+        The number of characters read at a time.
+
+    max_record_size : int
+        The maximum number of characters of a record. Invalid JSON cannot
+        be told apart from an incomplete record, so reading stops there.
+
+    Yields
+    ------
+    dict[str, Any]
+        Every record, in document order.
+
+    Raises
+    ------
+    ValueError
+        If the document is not valid JSON, a record is not an object or
+        is longer than `max_record_size`. The message gives the character
+        offset of the error.
+
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig") as f:
+        # Number of characters before the buffer.
+        offset = 0
+        buffer, pos, trimmed = _read_past_whitespace(f, "", 0, chunk_size)
+        offset += trimmed
+        in_array = _peek(buffer, pos) == "["
+        if in_array:
+            buffer, pos, trimmed = _read_past_whitespace(
+                f, buffer, pos + 1, chunk_size
+            )
+            offset += trimmed
+            if _peek(buffer, pos) == "]":
+                return
+
+        while pos < len(buffer):
+            if buffer[pos] != "{":
+                raise ValueError(
+                    f"{path}: records must be JSON objects"
+                    f" (at character {offset + pos})"
+                )
+
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # An incomplete object: read more, growing geometrically
+                # so that large records are not re-parsed too often.
+                pending = len(buffer) - pos
+                size = min(max(chunk_size, pending), max_record_size - pending)
+                chunk = f.read(size) if size > 0 else ""
+                if not chunk:
+                    too_long = (
+                        f" or a record longer than {max_record_size}"
+                        " characters"
+                        if pending >= max_record_size
+                        else ""
+                    )
+                    raise ValueError(
+                        f"{path}: invalid JSON{too_long} at character"
+                        f" {offset + e.pos}: {e.msg}"
+                    ) from e
+                buffer, pos, offset = buffer[pos:] + chunk, 0, offset + pos
+                continue
+
+            yield record
+            buffer, pos, trimmed = _read_past_whitespace(
+                f, buffer, end, chunk_size
+            )
+            offset += trimmed
+            if not in_array:
+                continue
+
+            separator = _peek(buffer, pos)
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(
+                    f"{path}: expected ',' or ']' in the array"
+                    f" (at character {offset + pos})"
+                )
+            buffer, pos, trimmed = _read_past_whitespace(
+                f, buffer, pos + 1, chunk_size
+            )
+            offset += trimmed
+
+        if in_array:
+            raise ValueError(f"{path}: unterminated JSON array")
+
+
+def flatten_record(
+    value: Any, prefix: str = ""
+) -> Iterator[tuple[str, Any]]:
+    """Yield the scalar values of a record with their dotted paths.
+
+    Nested objects extend the path (`{"a": {"b": 1}}` gives `a.b`), and
+    the items of arrays share the path of the array, so an array of
+    strings becomes a column with several values per record.
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            path = f"{prefix}.{key}" if prefix else str(key)
+            yield from flatten_record(item, path)
+    elif isinstance(value, list):
+        for item in value:
+            yield from flatten_record(item, prefix)
+    else:
+        yield prefix, value
+
+
+def _json_text(value: Any) -> Optional[str]:
+    """Return a JSON scalar as the text it would have in a CSV."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def profile_json(
+    path: str | Path,
+    sample_size: Optional[int] = None,
+    sketch_size: int = 1024,
+    examples: int = 5,
+    seed: int = 0,
+) -> DocumentProfile:
+    """Stream a JSON or JSON Lines document and profile every path.
+
+    Records are parsed one at a time (`iter_json_records`) and flattened
+    into dotted paths (`flatten_record`), each of which is profiled like a
+    CSV column. A path is empty in the records where it is missing or
+    null. Memory use is bounded by `sketch_size` (and `sample_size`) and
+    the number of distinct paths, not by the number of records.
+
+    Parameters
+    ----------
+    path : str | Path
+        The JSON array of objects or JSON Lines document.
+
+    sample_size, sketch_size, examples, seed
+        As in `profile_csv`.
+
+    Returns
+    -------
+    DocumentProfile
+        The statistics of every path, in order of first appearance.
+
+    """
+    records: Iterable[dict[str, Any]] = iter_json_records(path)
+    total = 0
+    if sample_size is not None:
+        records, total = _reservoir(records, sample_size, seed)
+
+    columns: dict[str, _ColumnStats] = {}
+    present: dict[str, int] = {}
+    profiled = 0
+    for profiled, record in enumerate(records, start=1):
+        seen = set()
+        for key, value in flatten_record(record):
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = _ColumnStats(
+                    key, sketch_size, examples
+                )
+                present[key] = 0
+            if column.add(_json_text(value)):
+                seen.add(key)
+        for key in seen:
+            present[key] += 1
+
+    profiles = []
+    for key, column in columns.items():
+        profile = column.profile()
+        profile.nulls = profiled - present[key]
+        profiles.append(profile)
+
+    return DocumentProfile(
+        path=str(path),
+        rows=total if sample_size is not None else profiled,
+        profiled_rows=profiled,
+        columns=profiles,
+    )
+
+
+def profile_document(
+    path: str | Path, sample_size: Optional[int] = None
+) -> DocumentProfile:
+    """Profile a CSV or JSON document, depending on its extension."""
+    if Path(path).suffix in JSON_SUFFIXES:
+        return profile_json(path, sample_size=sample_size)
+
+    return profile_csv(path, sample_size=sample_size)
+
+
+def profile_documents(
+    paths: Sequence[str | Path],
+    sample_size: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> list[DocumentProfile]:
+    """Profile many CSV and JSON documents in a process pool.
+
+    Parameters
+    ----------
+    paths : Sequence[str | Path]
+        The CSV, JSON or JSON Lines documents.
+
+    sample_size : int, optional
+        Passed to `profile_document`.
+
+    max_workers : int, optional
+        The number of processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    list[DocumentProfile]
+        The profiles in the order of `paths`, however the work was
+        scheduled.
+
+    """
+    profile = partial(profile_document, sample_size=sample_size)
+    if len(paths) <= 1 or max_workers == 1:
+        return [profile(path) for path in paths]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(profile, paths))
+
+
+def _relation_name(column: str) -> str:
+    return f"has_{column.lower().replace(' ', '_')}"
+
+
+def _path_relation_name(column: str) -> str:
+    # Dots separate the levels of flattened JSON paths.
+    return _relation_name(column.replace(".", "_"))
+
+
+def _describe(column: ColumnProfile) -> str:
+    examples = ", ".join(column.examples[:3])
+    plural = "" if column.distinct == 1 else "s"
+    return (
+        f"{column.distinct} distinct {column.type} value{plural}"
+        + (f", e.g. {examples}" if examples else "")
+        + "."
+    )
+
+
+def choose_key_column(
+    profile: DocumentProfile, min_uniqueness: float = 0.95
+) -> ColumnProfile:
+    """Return the column whose values identify the rows.
+
+    This is the leftmost text or integer column that is never empty and
+    nearly unique, or the first column if there is none.
+    """
+    if not profile.columns:
+        raise ValueError(f"{profile.path} has no named columns")
+
+    for column in profile.columns:
+        if (
+            column.type in JOINABLE_TYPES
+            and column.nulls == 0
+            and column.uniqueness >= min_uniqueness
+        ):
+            return column
+
+    return profile.columns[0]
+
+
+def is_entity_column(
+    column: ColumnProfile,
+    max_uniqueness: float = 0.5,
+    max_null_ratio: float = 0.95,
+) -> bool:
+    """Return whether a column holds entities rather than literal values.
+
+    Entities are text values that repeat across rows, like cities or
+    categories. Numbers, dates, flags and mostly unique text (free text,
+    identifiers) stay properties, since turning them into nodes would
+    create one useless node per row.
+    """
+    return (
+        column.type == "string"
+        and column.count > 0
+        and column.null_ratio <= max_null_ratio
+        and column.uniqueness <= max_uniqueness
+    )
+
+
+def infer_schema(
+    profile: DocumentProfile,
+    max_uniqueness: float = 0.5,
+    max_null_ratio: float = 0.95,
+) -> dict[str, Any]:
+    """Build a graph schema from the profile of a document.
+
+    The key column becomes the head entity, entity-like columns become
+    tail entities linked with `has_<column>` patterns (with the dots of
+    nested JSON paths replaced by underscores), and the remaining
+    non-empty columns become `property_columns` of the key entity.
+
+    Parameters
+    ----------
+    profile : DocumentProfile
+        The profile of the document.
+
+    max_uniqueness : float
+        The maximum distinct values per row of an entity column.
+
+    max_null_ratio : float
+        The maximum fraction of empty rows of an entity column.
+
+    Returns
+    -------
+    dict[str, Any]
+        The schema, with `entities` and `patterns`.
+
+    """
+    key = choose_key_column(profile)
+    entities: list[dict[str, Any]] = []
+    patterns: list[dict[str, Any]] = []
+    properties: list[str] = []
+    for column in profile.columns:
+        if column.name == key.name or column.count == 0:
+            continue
+
+        if is_entity_column(column, max_uniqueness, max_null_ratio):
+            entities.append(
+                {
+                    "name": column.name,
+                    "set_type_as": "",
+                    "property_columns": [],
+                    "description": _describe(column),
+                }
+            )
+            patterns.append(
+                {
+                    "head": key.name,
+                    "relation": _path_relation_name(column.name),
+                    "tail": column.name,
+                    "description": "",
+                }
+            )
+        elif column.name.lower() not in ("name", "namespace"):
+            properties.append(column.name)
+
+    entities.insert(
+        0,
+        {
+            "name": key.name,
+            "set_type_as": "",
+            "property_columns": properties,
+            "description": _describe(key),
+        },
+    )
+
+    return {"entities": entities, "patterns": patterns}
+
+
+def header_schema(header: Sequence[str]) -> dict[str, Any]:
+    """Build a schema with one entity per column from a CSV header."""
+    entities = []
+    patterns = []
+    for i in range(len(header) - 1):
+        patterns.append(
+            {
+                "head": header[0],
+                "relation": _relation_name(header[i + 1]),
+                "tail": header[i + 1],
+                "description": "",
+            }
+        )
+    for name in header:
+        entities.append(
+            {
+                "name": name,
+                "set_type_as": "",
+                "property_columns": [],
+                "description": "",
+            }
+        )
+
+    return {"entities": entities, "patterns": patterns}
+
+
+def find_join_columns(profiles: Sequence[DocumentProfile]) -> list[str]:
+    """Return the columns that link documents together.
+
+    A join column appears in at least two documents, holds text or
+    integers in all of them and is the key column of at least one, like a
+    `customer_id` in both `customers.csv` and `orders.csv`.
+    """
+    keys = {choose_key_column(profile).name for profile in profiles}
+    documents: dict[str, list[ColumnProfile]] = {}
+    for profile in profiles:
+        for column in profile.columns:
+            documents.setdefault(column.name, []).append(column)
+
+    return [
+        name
+        for name, columns in documents.items()
+        if len(columns) > 1
+        and name in keys
+        and all(column.type in JOINABLE_TYPES for column in columns)
+    ]
+
+
+def _add_entity(
+    entities: dict[str, SchemaEntity], entity: dict[str, Any]
+) -> None:
+    """Add an entity, unifying it with an entity of the same name."""
+    existing = entities.get(entity["name"])
+    if existing is None:
+        entities[entity["name"]] = SchemaEntity(**entity)
+        return
+
+    columns = existing.property_columns or []
+    columns.extend(
+        column
+        for column in entity["property_columns"]
+        if column not in columns
+    )
+    existing.property_columns = columns
+    existing.set_type_as = existing.set_type_as or entity["set_type_as"]
+    existing.description = existing.description or entity["description"]
+
+
+def merge_schemas(
+    profiles: Sequence[DocumentProfile],
+    max_uniqueness: float = 0.5,
+    max_null_ratio: float = 0.95,
+) -> Schema:
+    """Merge the inferred schemas of related documents into one.
+
+    Every document is inferred with `infer_schema`. Entities with the
+    same name are unified (their `property_columns` are combined), and
+    every join column (see `find_join_columns`) becomes an entity linked
+    from the key entity of each document that references it. The result
+    only depends on the order of `profiles`.
+
+    Parameters
+    ----------
+    profiles : Sequence[DocumentProfile]
+        The profiles of the documents.
+
+    max_uniqueness, max_null_ratio : float
+        Passed to `infer_schema`.
+
+    Returns
+    -------
+    Schema
+        The merged schema.
+
+    """
+    joins = set(find_join_columns(profiles))
+    entities: dict[str, SchemaEntity] = {}
+    patterns: dict[tuple[str, str, str], TriplePattern] = {}
+
+    def link(head: str, tail: str, description: str = "") -> None:
+        relation = _path_relation_name(tail)
+        patterns.setdefault(
+            (head, relation, tail),
+            TriplePattern(
+                head=head,
+                relation=relation,
+                tail=tail,
+                description=description,
+            ),
+        )
+
+    for profile in profiles:
+        schema = infer_schema(profile, max_uniqueness, max_null_ratio)
+        key, *others = schema["entities"]
+        references = [c for c in key["property_columns"] if c in joins]
+        key["property_columns"] = [
+            c for c in key["property_columns"] if c not in joins
+        ]
+
+        _add_entity(entities, key)
+        for entity in others:
+            _add_entity(entities, entity)
+        for pattern in schema["patterns"]:
+            link(pattern["head"], pattern["tail"], pattern["description"])
+
+        for name in references:
+            column = profile.get_column(name)
+            _add_entity(
+                entities,
+                {
+                    "name": name,
+                    "set_type_as": "",
+                    "property_columns": [],
+                    "description": _describe(column) if column else "",
+                },
+            )
+            link(key["name"], name)
+
+    relations = dict.fromkeys(p.relation for p in patterns.values())
+
+    return Schema(
+        entities=list(entities.values()),
+        relations=[
+            SchemaRelation(name=name, description="") for name in relations
+        ],
+        patterns=list(patterns.values()),
+    )
@@ -0,0 +1,499 @@
+"""Resumable ingestion of a directory tree of documents."""
+
+import argparse
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures import wait as wait_futures
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence, TypeVar
+
+import httpx
+
+from whyhow.apis.graph import GraphAPI
+from whyhow.documents import (
+    SUPPORTED_SUFFIXES,
+    DocumentInfo,
+    inspect_document,
+    pack_documents,
+)
+from whyhow.manifest import DocumentManifest
+from whyhow.schemas.base import BaseReturn
+from whyhow.schemas.graph import AddDocumentsBatchReturn
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_CHECKPOINT = ".whyhow-ingest.sqlite"
+
+
+class IngestStats(BaseReturn):
+    """Schema for the progress and outcome of an ingestion."""
+
+    namespace: str
+    files_uploaded: int = 0
+    bytes_uploaded: int = 0
+    files_skipped: int = 0
+    batches_uploaded: int = 0
+    batches_retried: int = 0
+    rejected: dict[str, str] = {}
+    failed: list[AddDocumentsBatchReturn] = []
+    elapsed: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        """Return the number of files uploaded per second."""
+        return self.files_uploaded / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        """Return the number of megabytes uploaded per second."""
+        if not self.elapsed:
+            return 0.0
+        return self.bytes_uploaded / 1e6 / self.elapsed
+
+
+def iter_documents(directory: str | Path) -> Iterator[Path]:
+    """Yield the supported documents under a directory, depth first.
+
+    Entries are visited in name order so that runs over the same tree see
+    the documents in the same order. Symbolic links to directories are
+    not followed.
+    """
+    stack = [Path(directory)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            ordered = sorted(entries, key=lambda entry: entry.name)
+
+        directories = []
+        for entry in ordered:
+            if entry.is_dir(follow_symlinks=False):
+                directories.append(Path(entry.path))
+            elif (
+                entry.is_file()
+                and Path(entry.name).suffix in SUPPORTED_SUFFIXES
+            ):
+                yield Path(entry.path)
+
+        stack.extend(reversed(directories))
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Return whether a failed upload is worth retrying."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+
+    return isinstance(error, httpx.TransportError)
+
+
+class IngestPipeline:
+    """Upload every document under a directory, resuming after a crash.
+
+    The pipeline runs three stages connected by bounded queues, so a slow
+    stage makes the previous ones wait instead of piling up work:
+
+    1. preflight: walk the tree and check every document
+       (`inspect_document`, including its SHA-256 digest) in a thread or
+       process pool;
+    2. packing: pack the valid documents into batches that respect the
+       upload limits, first-fit-decreasing over windows of documents;
+    3. upload: `upload_workers` threads upload the batches, retrying
+       transient failures with exponential backoff.
+
+    The checkpoint is a `DocumentManifest`: every uploaded batch is
+    recorded in it, and documents it lists as unchanged are skipped
+    without being read, so an interrupted run resumes where it stopped.
+
+    Parameters
+    ----------
+    graph : GraphAPI
+        The graph API to upload with.
+
+    namespace : str
+        The namespace of the graph.
+
+    directory : str | Path
+        The root of the tree to ingest.
+
+    checkpoint : str | Path | DocumentManifest, optional
+        The checkpoint file, or an open manifest. Defaults to
+        `.whyhow-ingest.sqlite` in `directory`.
+
+    preflight_workers : int, optional
+        The size of the preflight pool. Defaults to the number of CPUs.
+
+    use_processes : bool
+        Run the preflight in processes instead of threads. Threads are
+        usually enough since hashing releases the GIL.
+
+    upload_workers : int
+        The number of batches uploaded at once.
+
+    queue_size : int
+        The capacity of each queue between stages.
+
+    pack_window : int
+        The number of documents packed together.
+
+    max_retries : int
+        The number of times a failing batch is retried.
+
+    backoff : float
+        Seconds before the first retry, doubled after every attempt.
+
+    progress : Callable[[IngestStats], None], optional
+        Called with the current stats after every batch.
+    """
+
+    def __init__(
+        self,
+        graph: GraphAPI,
+        namespace: str,
+        directory: str | Path,
+        checkpoint: Optional[str | Path | DocumentManifest] = None,
+        preflight_workers: Optional[int] = None,
+        use_processes: bool = False,
+        upload_workers: int = 4,
+        queue_size: int = 256,
+        pack_window: int = 64,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        progress: Optional[Callable[[IngestStats], None]] = None,
+    ) -> None:
+        """Initialize the pipeline."""
+        if upload_workers < 1:
+            raise ValueError("upload_workers must be at least 1")
+
+        if queue_size < 1 or pack_window < 1:
+            raise ValueError("queue_size and pack_window must be positive")
+
+        self.graph = graph
+        self.namespace = namespace
+        self.directory = Path(directory)
+        if checkpoint is None:
+            checkpoint = self.directory / DEFAULT_CHECKPOINT
+        self.manifest = (
+            checkpoint
+            if isinstance(checkpoint, DocumentManifest)
+            else DocumentManifest(checkpoint)
+        )
+        self.preflight_workers = preflight_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.upload_workers = upload_workers
+        self.queue_size = queue_size
+        self.pack_window = pack_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.progress = progress
+
+        self._infos: queue.Queue[Optional[DocumentInfo]] = queue.Queue(
+            queue_size
+        )
+        self._batches: queue.Queue[Optional[list[DocumentInfo]]] = (
+            queue.Queue(queue_size)
+        )
+        self._stop = threading.Event()
+        self._errors: list[BaseException] = []
+        self._lock = threading.Lock()
+        self._stats = IngestStats(namespace=namespace)
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    def stats(self) -> IngestStats:
+        """Return a snapshot of the progress so far."""
+        with self._lock:
+            stats = self._stats.model_copy(deep=True)
+
+        if self._started is not None:
+            finished = self._finished or time.monotonic()
+            stats.elapsed = finished - self._started
+        return stats
+
+    def run(self) -> IngestStats:
+        """Run the pipeline until every document was handled.
+
+        Returns
+        -------
+        IngestStats
+            The final stats. Batches that still failed after all retries
+            are listed in `failed` and are retried by the next run.
+
+        Raises
+        ------
+        Exception
+            The first unexpected error of any stage, after the other
+            stages were stopped.
+
+        """
+        self._started = time.monotonic()
+        self._finished = None
+        threads = [
+            threading.Thread(
+                target=self._stage,
+                args=(self._preflight,),
+                name="whyhow-ingest-preflight",
+            ),
+            threading.Thread(
+                target=self._stage,
+                args=(self._pack,),
+                name="whyhow-ingest-pack",
+            ),
+        ]
+        threads.extend(
+            threading.Thread(
+                target=self._stage,
+                args=(self._upload,),
+                name=f"whyhow-ingest-upload-{i}",
+            )
+            for i in range(self.upload_workers)
+        )
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                thread.join()
+        except BaseException:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            raise
+        finally:
+            self._finished = time.monotonic()
+
+        if self._errors:
+            raise self._errors[0]
+
+        return self.stats()
+
+    def stop(self) -> None:
+        """Ask every stage to stop after its current item."""
+        self._stop.set()
+
+    def _stage(self, target: Callable[[], None]) -> None:
+        try:
+            target()
+        except BaseException as e:
+            logger.error("Ingestion stage failed", exc_info=True)
+            self._errors.append(e)
+            self._stop.set()
+
+    def _put(self, q: "queue.Queue[T]", item: T) -> bool:
+        """Put an item, giving up if the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+
+        return False
+
+    def _get(self, q: "queue.Queue[Optional[T]]") -> Optional[T]:
+        """Get an item, or None once the stage upstream is done."""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+        return None
+
+    def _preflight(self) -> None:
+        executor: Executor = (
+            ProcessPoolExecutor(self.preflight_workers)
+            if self.use_processes
+            else ThreadPoolExecutor(self.preflight_workers)
+        )
+        pending: set[Future[DocumentInfo]] = set()
+
+        def drain(futures: set[Future[DocumentInfo]]) -> None:
+            for future in futures:
+                self._put(self._infos, future.result())
+
+        try:
+            for path in iter_documents(self.directory):
+                if self._stop.is_set():
+                    return
+
+                try:
+                    stat = path.stat()
+                except OSError:
+                    pass
+                else:
+                    if self.manifest.is_unchanged(
+                        self.namespace, path, stat.st_size, stat.st_mtime_ns
+                    ):
+                        with self._lock:
+                            self._stats.files_skipped += 1
+                        continue
+
+                if len(pending) >= self.queue_size:
+                    done, pending = wait_futures(
+                        pending, return_when=FIRST_COMPLETED
+                    )
+                    drain(done)
+                pending.add(executor.submit(inspect_document, path))
+
+            drain(wait_futures(pending).done)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=self._stop.is_set())
+            self._put(self._infos, None)
+
+    def _pack(self) -> None:
+        window: list[DocumentInfo] = []
+        try:
+            while (info := self._get(self._infos)) is not None:
+                if info.error is not None:
+                    with self._lock:
+                        self._stats.rejected[info.path] = info.error
+                    continue
+
+                # Content already uploaded under another path or mtime.
+                uploaded, _ = self.manifest.lookup(
+                    self.namespace,
+                    info.path,
+                    size=info.size,
+                    mtime_ns=info.mtime_ns,
+                    sha256=info.sha256,
+                )
+                if uploaded:
+                    with self._lock:
+                        self._stats.files_skipped += 1
+                    continue
+
+                window.append(info)
+                if len(window) >= self.pack_window:
+                    self._flush(window)
+                    window = []
+
+            self._flush(window)
+        finally:
+            for _ in range(self.upload_workers):
+                self._put(self._batches, None)
+
+    def _flush(self, window: Sequence[DocumentInfo]) -> None:
+        by_path = {Path(info.path): info for info in window}
+        batches, rejected = pack_documents(
+            [(path, info.size) for path, info in by_path.items()]
+        )
+        if rejected:
+            with self._lock:
+                self._stats.rejected.update(rejected)
+
+        for batch in batches:
+            self._put(self._batches, [by_path[path] for path in batch])
+
+    def _upload(self) -> None:
+        while (batch := self._get(self._batches)) is not None:
+            self._upload_batch(batch)
+            if self.progress is not None:
+                self.progress(self.stats())
+
+    def _upload_batch(self, batch: list[DocumentInfo]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                message = self.graph.upload_batch(self.namespace, batch)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    logger.warning("Failed to upload %s", batch, exc_info=True)
+                    with self._lock:
+                        self._stats.failed.append(
+                            AddDocumentsBatchReturn(
+                                documents=[info.path for info in batch],
+                                error=f"{type(e).__name__}: {e}",
+                            )
+                        )
+                    return
+
+                with self._lock:
+                    self._stats.batches_retried += 1
+                if self._stop.wait(self.backoff * 2**attempt):
+                    return
+            else:
+                break
+
+        for info in batch:
+            self.manifest.record(
+                self.namespace,
+                info.path,
+                info.sha256,
+                size=info.size,
+                mtime_ns=info.mtime_ns,
+            )
+        logger.debug("Uploaded %s: %s", batch, message)
+        with self._lock:
+            self._stats.files_uploaded += len(batch)
+            self._stats.bytes_uploaded += sum(info.size for info in batch)
+            self._stats.batches_uploaded += 1
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Ingest a directory from the command line."""
+    from whyhow.client import WhyHow
+
+    parser = argparse.ArgumentParser(
+        prog="whyhow-ingest",
+        description="Upload every PDF and CSV under a directory to a graph.",
+    )
+    parser.add_argument("namespace", help="the namespace of the graph")
+    parser.add_argument("directory", type=Path, help="the tree to ingest")
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        help=f"the checkpoint file (default: DIRECTORY/{DEFAULT_CHECKPOINT})",
+    )
+    parser.add_argument("--upload-workers", type=int, default=4)
+    parser.add_argument("--preflight-workers", type=int)
+    parser.add_argument(
+        "--processes",
+        action="store_true",
+        help="run the preflight in processes instead of threads",
+    )
+    parser.add_argument("--max-retries", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    def report(stats: IngestStats) -> None:
+        print(
+            f"\r{stats.files_uploaded} uploaded, {stats.files_skipped}"
+            f" skipped, {len(stats.rejected)} rejected,"
+            f" {len(stats.failed)} failed batches"
+            f" ({stats.files_per_second:.1f} files/s,"
+            f" {stats.mb_per_second:.2f} MB/s)",
+            end="",
+            file=sys.stderr,
+        )
+
+    client = WhyHow(max_workers=args.upload_workers)
+    with client.httpx_client:
+        stats = IngestPipeline(
+            client.graph,
+            args.namespace,
+            args.directory,
+            checkpoint=args.checkpoint,
+            preflight_workers=args.preflight_workers,
+            use_processes=args.processes,
+            upload_workers=args.upload_workers,
+            max_retries=args.max_retries,
+            progress=report,
+        ).run()
+    report(stats)
+    print(file=sys.stderr)
+
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
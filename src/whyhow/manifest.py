@@ -0,0 +1,206 @@
+"""Local record of documents already added to a namespace."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def hash_file(path: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class DocumentManifest:
+    """SQLite manifest of the documents uploaded to each namespace.
+
+    Every successfully uploaded document is recorded with its content hash,
+    size and modification time. A document counts as uploaded if its
+    path, size and modification time are unchanged (no hashing needed) or
+    if a document with the same content hash was uploaded to the
+    namespace before.
+
+    Parameters
+    ----------
+    path : str | Path
+        The database file. Created if it does not exist.
+    """
+
+    def __init__(self, path: str | Path):
+        """Initialize the manifest and create its table."""
+        self.path = Path(path)
+        self._local = threading.local()
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                namespace TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                uploaded_at REAL NOT NULL,
+                PRIMARY KEY (namespace, path)
+            );
+            CREATE INDEX IF NOT EXISTS documents_sha256
+                ON documents (namespace, sha256);
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread and process."""
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=30.0, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    def lookup(
+        self,
+        namespace: str,
+        path: str | Path,
+        size: Optional[int] = None,
+        mtime_ns: Optional[int] = None,
+        sha256: Optional[str] = None,
+    ) -> tuple[bool, str]:
+        """Check whether a document was already uploaded to a namespace.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        path : str | Path
+            The document.
+
+        size, mtime_ns : int, optional
+            The size and modification time of the document, if already
+            known (e.g. from a preflight). Read from disk if not given.
+
+        sha256 : str, optional
+            The digest of the document, if already known.
+
+        Returns
+        -------
+        tuple[bool, str]
+            Whether the document was uploaded, and its SHA-256 digest.
+
+        """
+        key = str(Path(path).resolve())
+        if size is None or mtime_ns is None:
+            stat = os.stat(key)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+
+        recorded = self._unchanged(namespace, key, size, mtime_ns)
+        if recorded is not None:
+            return True, recorded
+
+        if sha256 is None:
+            sha256 = hash_file(key)
+        row = self._connection().execute(
+            "SELECT 1 FROM documents WHERE namespace = ? AND sha256 = ?",
+            (namespace, sha256),
+        ).fetchone()
+
+        return row is not None, sha256
+
+    def is_unchanged(
+        self, namespace: str, path: str | Path, size: int, mtime_ns: int
+    ) -> bool:
+        """Check whether a document was uploaded and not modified since.
+
+        Unlike `lookup`, this never reads the document, so it is a cheap
+        way to skip documents on a resumed run.
+        """
+        key = str(Path(path).resolve())
+        return self._unchanged(namespace, key, size, mtime_ns) is not None
+
+    def _unchanged(
+        self, namespace: str, key: str, size: int, mtime_ns: int
+    ) -> Optional[str]:
+        """Return the recorded digest if the path, size and mtime match."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT size, mtime_ns, sha256 FROM documents"
+                " WHERE namespace = ? AND path = ?",
+                (namespace, key),
+            )
+            .fetchone()
+        )
+        if row is not None and tuple(row[:2]) == (size, mtime_ns):
+            return str(row[2])
+
+        return None
+
+    def record(
+        self,
+        namespace: str,
+        path: str | Path,
+        sha256: Optional[str] = None,
+        size: Optional[int] = None,
+        mtime_ns: Optional[int] = None,
+    ) -> None:
+        """Record a document as uploaded to a namespace.
+
+        Parameters
+        ----------
+        namespace : str
+            The namespace of the graph.
+
+        path : str | Path
+            The document.
+
+        sha256 : str, optional
+            The digest returned by `lookup`. Computed if not given.
+
+        size, mtime_ns : int, optional
+            The size and modification time of the document. Read from disk
+            if not given.
+
+        """
+        key = str(Path(path).resolve())
+        if size is None or mtime_ns is None:
+            stat = os.stat(key)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        if sha256 is None:
+            sha256 = hash_file(key)
+
+        self._connection().execute(
+            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                namespace,
+                key,
+                size,
+                mtime_ns,
+                sha256,
+                time.time(),
+            ),
+        )
+
+    def forget(self, namespace: str) -> None:
+        """Drop every record of a namespace."""
+        self._connection().execute(
+            "DELETE FROM documents WHERE namespace = ?", (namespace,)
+        )
+
+    def __len__(self) -> int:
+        """Return the number of recorded documents."""
+        (count,) = (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM documents")
+            .fetchone()
+        )
+        return int(count)
@@ -0,0 +1,214 @@
+"""Streaming multipart/form-data encoding of file uploads."""
+
+import asyncio
+import mimetypes
+import secrets
+from pathlib import Path
+from types import TracebackType
+from typing import (
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Iterator,
+    Optional,
+    Sequence,
+    Type,
+    cast,
+)
+
+from whyhow.documents import InMemoryDocument, document_name, document_size
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _quote(value: str) -> str:
+    """Escape a form parameter value like browsers and httpx do."""
+    return value.replace("\\", "\\\\").replace('"', "%22")
+
+
+class MultipartEncoder:
+    """Encode files as a multipart/form-data body streamed from disk.
+
+    Files are opened one at a time, read in fixed-size chunks and closed as
+    soon as they have been sent, so memory use does not depend on the
+    document sizes. The total length is known up front and sent as the
+    Content-Length header.
+
+    Documents held in memory are sent as `memoryview` slices of their
+    buffer, without copying. File-like objects are read in chunks from
+    their current position and left open for the caller to close.
+
+    Parameters
+    ----------
+    files : list[tuple[str, Path | tuple[str, Buffer | BinaryIO]]]
+        The form field name and the path, or the filename and content, of
+        each file.
+
+    chunk_size : int
+        The number of bytes read from disk at a time.
+
+    progress : Callable[[int, int], None], optional
+        Called with the number of bytes sent so far and the total number of
+        bytes after every chunk.
+
+    sizes : Sequence[int], optional
+        The size of each file, if already known. Read from disk otherwise.
+
+    Attributes
+    ----------
+    bytes_sent : int
+        The number of body bytes handed to the transport so far.
+    """
+
+    def __init__(
+        self,
+        files: list[tuple[str, Path | InMemoryDocument]],
+        chunk_size: int = 64 * 1024,
+        progress: Optional[ProgressCallback] = None,
+        sizes: Optional[Sequence[int]] = None,
+    ) -> None:
+        """Initialize the encoder and compute the body length."""
+        if sizes is None:
+            sizes = [document_size(document) for _, document in files]
+        elif len(sizes) != len(files):
+            raise ValueError("sizes must have one entry per file")
+
+        self.boundary = secrets.token_hex(16)
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.bytes_sent = 0
+        self._parts = [
+            (self._part_header(name, document_name(document)), document, size)
+            for (name, document), size in zip(files, sizes)
+        ]
+        self._footer = f"--{self.boundary}--\r\n".encode()
+        self._file: Optional[BinaryIO] = None
+        self._views: list[memoryview] = []
+
+        self.content_length = len(self._footer) + sum(
+            len(header) + size + 2 for header, _, size in self._parts
+        )
+
+    def _part_header(self, name: str, filename: str) -> bytes:
+        content_type = (
+            mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        )
+        return (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote(name)}"; '
+            f'filename="{_quote(filename)}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Return the Content-Type and Content-Length headers of the body."""
+        return {
+            "Content-Type": f"multipart/form-data; boundary={self.boundary}",
+            "Content-Length": str(self.content_length),
+        }
+
+    def _sent(self, chunk: bytes) -> bytes:
+        self.bytes_sent += len(chunk)
+        if self.progress is not None:
+            self.progress(self.bytes_sent, self.content_length)
+        return chunk
+
+    def _view(self, content: object) -> Optional[memoryview]:
+        """Return a flat byte view of an in-memory buffer, if it is one."""
+        try:
+            view = memoryview(content)  # type: ignore[arg-type]
+        except TypeError:
+            return None
+
+        self._views.append(view)
+        if view.format != "B" or view.ndim != 1:
+            view = view.cast("B")
+            self._views.append(view)
+        return view
+
+    def _iter_view(self, view: memoryview, size: int) -> Iterator[bytes]:
+        # The transports write any bytes-like chunk, so slices of the view
+        # are sent as they are instead of being copied into bytes.
+        for start in range(0, size, self.chunk_size):
+            end = start + self.chunk_size
+            yield self._sent(cast(bytes, view[start:end]))
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        """Yield the body in chunks, reading files synchronously."""
+        for header, document, size in self._parts:
+            yield self._sent(header)
+            if isinstance(document, Path):
+                with open(document, "rb") as self._file:
+                    while chunk := self._file.read(self.chunk_size):
+                        yield self._sent(chunk)
+                self._file = None
+            elif (view := self._view(document[1])) is not None:
+                yield from self._iter_view(view, size)
+            else:
+                content = cast(BinaryIO, document[1])
+                remaining = size
+                while remaining and (
+                    chunk := content.read(min(self.chunk_size, remaining))
+                ):
+                    remaining -= len(chunk)
+                    yield self._sent(chunk)
+            yield self._sent(b"\r\n")
+
+        yield self._sent(self._footer)
+
+    async def aiter_bytes(self) -> AsyncIterator[bytes]:
+        """Yield the body in chunks, reading files in a worker thread."""
+        for header, document, size in self._parts:
+            yield self._sent(header)
+            if isinstance(document, Path):
+                self._file = await asyncio.to_thread(open, document, "rb")
+                try:
+                    while chunk := await asyncio.to_thread(
+                        self._file.read, self.chunk_size
+                    ):
+                        yield self._sent(chunk)
+                finally:
+                    self._file.close()
+                    self._file = None
+            elif (view := self._view(document[1])) is not None:
+                for part in self._iter_view(view, size):
+                    yield part
+            else:
+                content = cast(BinaryIO, document[1])
+                remaining = size
+                while remaining and (
+                    chunk := await asyncio.to_thread(
+                        content.read, min(self.chunk_size, remaining)
+                    )
+                ):
+                    remaining -= len(chunk)
+                    yield self._sent(chunk)
+            yield self._sent(b"\r\n")
+
+        yield self._sent(self._footer)
+
+    def close(self) -> None:
+        """Close the file being sent and release views of buffers.
+
+        Releasing the views lets the caller close or resize the buffers
+        (e.g. an `mmap`) afterwards.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        while self._views:
+            self._views.pop().release()
+
+    def __enter__(self) -> "MultipartEncoder":
+        """Enter the context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the file being sent and release views of buffers."""
+        self.close()
@@ -1,8 +1,17 @@
 """Shared schemas."""
 
-from typing import Any, List, Optional
+import weakref
+from typing import (
+    Any,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    SupportsIndex,
+    TypeVar,
+)
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class Node(BaseModel):
@@ -27,6 +36,65 @@ class Relationship(BaseModel):
     properties: dict[str, Any] = Field(default_factory=dict)
 
 
+def _freeze(value: Any) -> Hashable:
+    """Return a hashable value equal for equal (nested) property values."""
+    if isinstance(value, dict):
+        return frozenset((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def node_identity(
+    labels: list[str], properties: dict[str, Any], key: Optional[str] = None
+) -> Hashable:
+    """Return a hashable identity of a node.
+
+    Nodes with equal labels and properties get the same identity. If `key`
+    is given and is one of the properties, only the labels and that
+    property are used, e.g. ``key="name"`` merges nodes with the same
+    labels and name.
+    """
+    if key is not None and key in properties:
+        return tuple(labels), _freeze(properties[key])
+
+    try:
+        return tuple(labels), frozenset(properties.items())
+    except TypeError:  # a property holds a list or a dict
+        return tuple(labels), _freeze(properties)
+
+
+def _imply_nodes(
+    relationships: Iterable[Any], key: Optional[str]
+) -> list[Any]:
+    """Return the distinct start and end nodes, in order of appearance."""
+    nodes: dict[Hashable, Any] = {}
+    for rel in relationships:
+        if isinstance(rel, Relationship):
+            ends = (rel.start_node, rel.end_node)
+        else:
+            ends = (rel["start_node"], rel["end_node"])
+
+        for node in ends:
+            if isinstance(node, Node):
+                labels, properties = node.labels, node.properties
+            else:
+                labels = node["labels"]
+                properties = node.get("properties") or {}
+
+            identity = node_identity(labels, properties, key)
+            if identity not in nodes:
+                nodes[identity] = node
+
+    return list(nodes.values())
+
+
 class Graph(BaseModel):
     """Schema for a graph.
 
@@ -39,21 +107,46 @@ class Graph(BaseModel):
     @model_validator(mode="before")
     @classmethod
     def imply_nodes(cls, data: dict[str, Any]) -> dict[str, Any]:
-        """Implies nodes from relationships if not provided."""
-        if "nodes" not in data or data["nodes"] is None:
-            nodes = []
-            for rel in data.get("relationships", []):
-                start = rel.start_node
-                end = rel.end_node
-                if start not in nodes:
-                    nodes.append(start)
-                if end not in nodes:
-                    nodes.append(end)
+        """Implies nodes from relationships if not provided.
 
-            data["nodes"] = nodes
+        Nodes with the same labels and properties are only listed once.
+        """
+        if "nodes" not in data or data["nodes"] is None:
+            data["nodes"] = _imply_nodes(data.get("relationships", []), None)
 
         return data
 
+    @classmethod
+    def from_relationships(
+        cls,
+        relationships: Iterable[Relationship],
+        node_key: Optional[str] = None,
+    ) -> "Graph":
+        """Build a graph from many relationships in linear time.
+
+        The relationships are not validated again.
+
+        Parameters
+        ----------
+        relationships : Iterable[Relationship]
+            The relationships of the graph.
+
+        node_key : str, optional
+            A property identifying nodes together with their labels, e.g.
+            ``"name"``. By default nodes are the same only if all of their
+            properties are equal.
+
+        Returns
+        -------
+        Graph
+            The graph, with the distinct nodes in order of appearance.
+        """
+        relationships = list(relationships)
+        return cls.model_construct(
+            relationships=relationships,
+            nodes=_imply_nodes(relationships, node_key),
+        )
+
 
 class Entity(BaseModel):
     """Schema for a single entity.
@@ -137,8 +230,257 @@ class Triple(BaseModel):
         )
 
 
+# BULK CONVERSION
+# Nodes are built once per identity and shared by every relationship that
+# uses them. Relationships and nodes given as input are trusted and not
+# validated again; the triples and entities built from them are.
+
+
+def triples_to_graph(triples: Iterable[Triple]) -> Graph:
+    """Convert triples to a graph, with one node per type and name."""
+    nodes: dict[tuple[str, str], Node] = {}
+
+    def node(label: str, name: str) -> Node:
+        found = nodes.get((label, name))
+        if found is None:
+            found = nodes[label, name] = Node(
+                labels=[label], properties={"name": name}
+            )
+        return found
+
+    relationships = [
+        Relationship(
+            type=triple.relationship,
+            start_node=node(triple.head_type, triple.head),
+            end_node=node(triple.tail_type, triple.tail),
+            properties=triple.properties,
+        )
+        for triple in triples
+    ]
+    return Graph.model_construct(
+        relationships=relationships, nodes=list(nodes.values())
+    )
+
+
+def graph_to_triples(graph: Graph) -> list[Triple]:
+    """Convert the relationships of a graph to triples.
+
+    Raises
+    ------
+    ValueError
+        If a start or end node has no name property, or a triple built
+        from them is not valid, e.g. as a name is not a string.
+    """
+    triples = []
+    for relationship in graph.relationships:
+        start = relationship.start_node
+        end = relationship.end_node
+        if "name" not in start.properties:
+            raise ValueError("Start node must have a name property.")
+        if "name" not in end.properties:
+            raise ValueError("End node must have a name property.")
+
+        triples.append(
+            Triple(
+                head=start.properties["name"],
+                head_type=start.labels[0],
+                relationship=relationship.type,
+                tail=end.properties["name"],
+                tail_type=end.labels[0],
+                properties=relationship.properties,
+            )
+        )
+    return triples
+
+
+def entities_to_nodes(entities: Iterable[Entity]) -> list[Node]:
+    """Convert entities to nodes, sharing one node between equal entities."""
+    nodes: dict[Hashable, Node] = {}
+    converted = []
+    for entity in entities:
+        identity: Hashable = (entity.label, entity.text)
+        if entity.properties:
+            identity = node_identity(
+                [entity.label], {**entity.properties, "name": entity.text}
+            )
+        node = nodes.get(identity)
+        if node is None:
+            node = nodes[identity] = entity.to_node()
+        converted.append(node)
+    return converted
+
+
+def nodes_to_entities(nodes: Iterable[Node]) -> list[Entity]:
+    """Convert nodes to entities, converting each node object once.
+
+    Raises
+    ------
+    ValueError
+        If a node has no name property, or an entity built from it is not
+        valid, e.g. as its name is not a string.
+    """
+    # Keyed by object, as nodes shared by relationships are common. The
+    # nodes are kept in a list so that their ids cannot be reused.
+    nodes = list(nodes)
+    entities: dict[int, Entity] = {}
+    converted = []
+    for node in nodes:
+        entity = entities.get(id(node))
+        if entity is None:
+            properties = node.properties.copy()
+            if "name" not in properties:
+                raise ValueError("Node must have a name property.")
+            entity = entities[id(node)] = Entity(
+                text=properties.pop("name"),
+                label=node.labels[0],
+                properties=properties,
+            )
+        converted.append(entity)
+    return converted
+
+
 # GRAPH SCHEMA
-class SchemaEntity(BaseModel):
+class _SchemaItem(BaseModel):
+    """Base model of the items of a schema, kept in `_ItemList` indexes."""
+
+    # Id -> weak reference of the lists holding the item, whose indexes on
+    # a field are dropped when the field is assigned. A slot keeps it out
+    # of the fields, equality and copies of the item.
+    __slots__ = ("_lists",)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set a field and drop the indexes on it."""
+        super().__setattr__(name, value)
+        lists: dict[int, weakref.ref[_ItemList[Any]]] = getattr(
+            self, "_lists", {}
+        )
+        for reference in lists.values():
+            items = reference()
+            if items is not None:
+                items._indexes.pop(name, None)
+
+
+T = TypeVar("T", bound=_SchemaItem)
+
+
+class _ItemList(List[T]):
+    """List of schema items, indexed by field on demand.
+
+    Appended items are added to the indexes; any other change of the list
+    drops them, and assigning a field of an item drops the indexes on
+    that field.
+    """
+
+    __slots__ = ("_indexes", "__weakref__")
+
+    def __init__(self, items: Iterable[T] = ()) -> None:
+        """Initialize the list, without indexes."""
+        super().__init__(items)
+        self._indexes: dict[str, dict[Any, list[T]]] = {}
+        for item in self:
+            self._hold(item)
+
+    def _hold(self, item: T) -> None:
+        """Register the list with an item."""
+        if not isinstance(item, _SchemaItem):
+            return
+        lists = getattr(item, "_lists", None)
+        if lists is None:
+            lists = {}
+            object.__setattr__(item, "_lists", lists)
+        lists[id(self)] = weakref.ref(self)
+
+    def _changed(self) -> None:
+        """Register the list with its items again and drop the indexes."""
+        self._indexes.clear()
+        for item in self:
+            self._hold(item)
+
+    def lookup(self, field: str, value: Any) -> list[T]:
+        """Return the items whose `field` equals `value`, in order."""
+        index = self._indexes.get(field)
+        if index is None:
+            index = self._indexes[field] = {}
+            for item in self:
+                index.setdefault(getattr(item, field), []).append(item)
+        return list(index.get(value, ()))
+
+    def append(self, item: T) -> None:
+        """Append an item and add it to the indexes."""
+        super().append(item)
+        self._hold(item)
+        for field, index in self._indexes.items():
+            index.setdefault(getattr(item, field), []).append(item)
+
+    def extend(self, items: Iterable[T]) -> None:
+        """Append items and add them to the indexes."""
+        for item in list(items):
+            self.append(item)
+
+    def __iadd__(  # type: ignore[override,misc]
+        self, items: Iterable[T]
+    ) -> "_ItemList[T]":
+        """Append items and add them to the indexes."""
+        self.extend(items)
+        return self
+
+    def insert(self, index: SupportsIndex, item: T) -> None:
+        """Insert an item and drop the indexes."""
+        super().insert(index, item)
+        self._changed()
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        """Replace items and drop the indexes."""
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index: Any) -> None:
+        """Delete items and drop the indexes."""
+        super().__delitem__(index)
+        self._indexes.clear()
+
+    def pop(self, index: SupportsIndex = -1) -> T:
+        """Remove and return an item and drop the indexes."""
+        item = super().pop(index)
+        self._indexes.clear()
+        return item
+
+    def remove(self, item: T) -> None:
+        """Remove the first occurrence of an item and drop the indexes."""
+        super().remove(item)
+        self._indexes.clear()
+
+    def clear(self) -> None:
+        """Remove all items and drop the indexes."""
+        super().clear()
+        self._indexes.clear()
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:
+        """Sort the items and drop the indexes."""
+        super().sort(*args, **kwargs)
+        self._indexes.clear()
+
+    def reverse(self) -> None:
+        """Reverse the items and drop the indexes."""
+        super().reverse()
+        self._indexes.clear()
+
+    def __imul__(self, count: SupportsIndex) -> "_ItemList[T]":
+        """Repeat the items and drop the indexes."""
+        super().__imul__(count)
+        self._indexes.clear()
+        return self
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Any:
+        """Copy and pickle the items only, as their lists are not copied."""
+        return type(self), (list(self),)
+
+
+# Fields of a schema holding `_ItemList`s.
+_ITEM_LISTS = ("entities", "relations", "patterns")
+
+
+class SchemaEntity(_SchemaItem):
     """Schema Entity model."""
 
     name: str
@@ -147,14 +489,14 @@ class SchemaEntity(BaseModel):
     description: str
 
 
-class SchemaRelation(BaseModel):
+class SchemaRelation(_SchemaItem):
     """Schema Relation model."""
 
     name: str
     description: str
 
 
-class TriplePattern(BaseModel):
+class TriplePattern(_SchemaItem):
     """Schema Triple Pattern model."""
 
     head: str
@@ -164,22 +506,64 @@ class TriplePattern(BaseModel):
 
 
 class Schema(BaseModel):
-    """Schema model."""
+    """Schema model.
+
+    Lookups by name, and of patterns by head, relation or tail, use dict
+    indexes built on first use and kept up to date as the lists and the
+    fields of their items change. Lists given to a schema are copied,
+    also when assigned.
+    """
 
     entities: List[SchemaEntity] = Field(default_factory=list)
     relations: List[SchemaRelation] = Field(default_factory=list)
     patterns: List[TriplePattern] = Field(default_factory=list)
 
+    @field_validator(*_ITEM_LISTS)
+    @classmethod
+    def index_items(cls, items: list[T]) -> list[T]:
+        """Hold the items in a list keeping their lookup indexes."""
+        return _ItemList(items)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set a field, holding assigned items in an indexed list."""
+        if name in _ITEM_LISTS and not isinstance(value, _ItemList):
+            value = _ItemList(value)
+        super().__setattr__(name, value)
+
+    def _lookup(self, attribute: str, field: str, value: str) -> list[Any]:
+        """Return the items of a list whose `field` equals `value`."""
+        items = getattr(self, attribute)
+        if not isinstance(items, _ItemList):
+            # E.g. a schema built with `model_construct`.
+            items = self.__dict__[attribute] = _ItemList(items)
+        return items.lookup(field, value)
+
     def get_entity(self, name: str) -> Optional[SchemaEntity]:
         """Return an entity by name if it exists in the schema."""
-        for entity in self.entities:
-            if entity.name == name:
-                return entity
-        return None  # Return None if no entity with that name is found
+        entities = self._lookup("entities", "name", name)
+        return entities[0] if entities else None
 
     def get_relation(self, name: str) -> Optional[SchemaRelation]:
         """Return a relation by name if it exists in the schema."""
-        for relation in self.relations:
-            if relation.name == name:
-                return relation
-        return None  # Return None if no relation with that name is found
+        relations = self._lookup("relations", "name", name)
+        return relations[0] if relations else None
+
+    def patterns_from(self, entity: str) -> list[TriplePattern]:
+        """Return the patterns whose head is an entity."""
+        return self._lookup("patterns", "head", entity)
+
+    def patterns_to(self, entity: str) -> list[TriplePattern]:
+        """Return the patterns whose tail is an entity."""
+        return self._lookup("patterns", "tail", entity)
+
+    def patterns_with(self, relation: str) -> list[TriplePattern]:
+        """Return the patterns using a relation."""
+        return self._lookup("patterns", "relation", relation)
+
+    def patterns_between(self, head: str, tail: str) -> list[TriplePattern]:
+        """Return the patterns going from one entity to another."""
+        return [
+            pattern
+            for pattern in self.patterns_from(head)
+            if pattern.tail == tail
+        ]
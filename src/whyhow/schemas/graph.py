@@ -1,6 +1,6 @@
 """Collection of schemas for the API."""
 
-from typing import Literal
+from typing import Literal, Optional
 
 from whyhow.schemas.base import BaseRequest, BaseResponse, BaseReturn
 from whyhow.schemas.common import Graph, Schema
@@ -16,6 +16,28 @@ class AddDocumentsResponse(BaseResponse):
     message: str
 
 
+class AddDocumentsBatchReturn(BaseReturn):
+    """Schema for the outcome of one batch of a bulk document upload."""
+
+    documents: list[str]
+    message: Optional[str] = None
+    error: Optional[str] = None
+
+
+class AddDocumentsBulkReturn(BaseReturn):
+    """Schema for the return value of a bulk document upload."""
+
+    namespace: str
+    batches: list[AddDocumentsBatchReturn]
+    skipped: list[str] = []
+    rejected: dict[str, str] = {}
+
+    @property
+    def failed(self) -> list[AddDocumentsBatchReturn]:
+        """Return the batches whose upload failed."""
+        return [batch for batch in self.batches if batch.error is not None]
+
+
 class CreateQuestionGraphRequest(BaseRequest):
     """Schema for the request body of the create graph endpoint."""
 
@@ -0,0 +1,125 @@
+"""Coalescing of identical in-flight calls."""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    """An in-flight call and the number of callers waiting on it."""
+
+    def __init__(self) -> None:
+        self.future: Future[T] = Future()
+        self.callers = 1
+
+
+class SingleFlight(Generic[T]):
+    """Run at most one call per key at a time across threads.
+
+    The first caller of a key (the leader) runs the function; callers that
+    arrive with the same key while it is running wait for the leader's
+    result instead of running it again. Exceptions are re-raised in every
+    waiting caller.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the registry of in-flight calls."""
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call[T]] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> tuple[T, bool]:
+        """Run `fn` unless a call with the same key is already in flight.
+
+        Parameters
+        ----------
+        key : Hashable
+            Identity of the call.
+
+        fn : Callable[[], T]
+            The function to run.
+
+        Returns
+        -------
+        tuple[T, bool]
+            The result and whether it was handed to more than one caller.
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.callers += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            return call.future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            call.future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._calls[key]
+        call.future.set_result(result)
+
+        return result, call.callers > 1
+
+
+class AsyncSingleFlight(Generic[T]):
+    """Run at most one coroutine per key at a time on an event loop.
+
+    The asyncio counterpart of `SingleFlight`. The call runs in its own
+    task, so cancelling the caller that started it does not cancel it for
+    the other waiters.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the registry of in-flight calls."""
+        self._calls: dict[Hashable, tuple["asyncio.Task[T]", list[int]]] = {}
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[T]]
+    ) -> tuple[T, bool]:
+        """Await `fn` unless a call with the same key is already in flight.
+
+        Parameters
+        ----------
+        key : Hashable
+            Identity of the call.
+
+        fn : Callable[[], Awaitable[T]]
+            The coroutine function to run.
+
+        Returns
+        -------
+        tuple[T, bool]
+            The result and whether it was handed to more than one caller.
+
+        """
+        entry = self._calls.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(fn())
+            entry = self._calls[key] = (task, [0])
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        task, callers = entry
+        callers[0] += 1
+        result = await asyncio.shield(task)
+
+        return result, callers[0] > 1
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[T]") -> None:
+        """Unregister a finished call and mark its exception as retrieved."""
+        if self._calls.get(key, (None,))[0] is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,331 @@
+"""Streaming sinks writing query results to disk as they arrive."""
+
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any, Iterable, Optional, Type
+
+from whyhow.schemas.graph import (
+    QueryGraphResponse,
+    QueryGraphReturn,
+    SpecificQueryGraphResponse,
+)
+
+QueryResult = (
+    QueryGraphResponse
+    | QueryGraphReturn
+    | SpecificQueryGraphResponse
+    | Exception
+)
+
+TRIPLE_FIELDS = ("head", "relation", "tail")
+CHUNK_FIELDS = ("head", "relation", "tail", "chunk_ids", "chunk_texts")
+
+
+def _result_record(
+    result: QueryResult, index: int, query: Optional[str]
+) -> dict[str, Any]:
+    """Return a query result as a JSON-compatible record.
+
+    A failed query is recorded with its error and no answer.
+    """
+    if isinstance(result, Exception):
+        return {
+            "index": index,
+            "query": query,
+            "namespace": None,
+            "answer": None,
+            "error": f"{type(result).__name__}: {result}",
+            "triples": [],
+            "chunks": [],
+        }
+
+    triples = [
+        (
+            triple
+            if isinstance(triple, dict)
+            else {field: getattr(triple, field) for field in TRIPLE_FIELDS}
+        )
+        for triple in result.triples
+    ]
+    chunks = [
+        {field: getattr(chunk, field) for field in CHUNK_FIELDS}
+        for chunk in getattr(result, "chunks", [])
+    ]
+    return {
+        "index": index,
+        "query": query,
+        "namespace": result.namespace,
+        "answer": result.answer,
+        "error": None,
+        "triples": triples,
+        "chunks": chunks,
+    }
+
+
+class ResultSink(ABC):
+    """Base class of the sinks of query results.
+
+    Results are written one at a time, so that a batch of queries, e.g.
+    from `AsyncGraphAPI.iter_query_graph_many`, never needs to be held
+    in memory. Use a sink as a context manager, or call `close`, once
+    done.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the sink."""
+        self.count = 0
+
+    def write(
+        self,
+        result: QueryResult,
+        query: Optional[str] = None,
+        index: Optional[int] = None,
+    ) -> None:
+        """Write a query result.
+
+        Parameters
+        ----------
+        result : QueryGraphResponse | QueryGraphReturn |
+                 SpecificQueryGraphResponse | Exception
+            The result of a query, or the exception it raised.
+
+        query : str, optional
+            The query that was run.
+
+        index : int, optional
+            The position of the query in its batch. Defaults to the number
+            of results written before.
+        """
+        if index is None:
+            index = self.count
+        self._write(_result_record(result, index, query))
+        self.count += 1
+
+    def write_all(
+        self,
+        results: Iterable[QueryResult],
+        queries: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Write results in order, with their queries if given."""
+        if queries is None:
+            for result in results:
+                self.write(result)
+        else:
+            for result, query in zip(results, queries, strict=True):
+                self.write(result, query=query)
+
+    @abstractmethod
+    def _write(self, record: dict[str, Any]) -> None:
+        """Write a result record."""
+
+    def close(self) -> None:
+        """Flush and close the output."""
+
+    def __enter__(self) -> "ResultSink":
+        """Return the sink."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the sink."""
+        self.close()
+
+
+class NDJSONSink(ResultSink):
+    """Sink writing every result as one line of JSON.
+
+    Each line holds the ``index``, ``query``, ``namespace``, ``answer`` and
+    ``error`` of a result along with its ``triples`` and ``chunks``.
+
+    Parameters
+    ----------
+    file : str | Path | IO[str]
+        The output file, or an open text stream which is left open.
+
+    append : bool
+        Whether to append to an existing file instead of overwriting it.
+
+    flush : bool
+        Whether to flush after every result, e.g. to follow the file while
+        a batch runs.
+    """
+
+    def __init__(
+        self,
+        file: str | Path | IO[str],
+        append: bool = False,
+        flush: bool = False,
+    ):
+        """Open the output."""
+        super().__init__()
+        self._owned = isinstance(file, (str, Path))
+        if isinstance(file, (str, Path)):
+            self._file: IO[str] = open(
+                file, "a" if append else "w", encoding="utf-8"
+            )
+        else:
+            self._file = file
+        self._flush = flush
+
+    def _write(self, record: dict[str, Any]) -> None:
+        """Write a result record as a line."""
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if self._flush:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Flush the stream and close it if it was opened by the sink."""
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class ParquetSink(ResultSink):
+    """Sink writing results to flat Parquet tables.
+
+    Requires ``pyarrow``, installed with the ``parquet`` extra. Three files
+    are written to a directory, joined on ``index``:
+
+    - ``results.parquet``: ``index``, ``query``, ``namespace``, ``answer``
+      and ``error``.
+    - ``triples.parquet``: ``index``, ``position``, ``head``, ``relation``
+      and ``tail``.
+    - ``chunks.parquet``: ``index``, ``position``, ``head``, ``relation``,
+      ``tail``, ``chunk_ids`` and ``chunk_texts``.
+
+    Rows are buffered and written as a row group every `batch_size`
+    results, so memory use does not grow with the number of results.
+
+    Parameters
+    ----------
+    directory : str | Path
+        The output directory, created if needed. Existing tables are
+        overwritten.
+
+    batch_size : int
+        The number of results per row group.
+
+    compression : str
+        The Parquet compression codec.
+
+    Raises
+    ------
+    ImportError
+        If pyarrow is not installed.
+
+    ValueError
+        If `batch_size` is not positive.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        batch_size: int = 1024,
+        compression: str = "snappy",
+    ):
+        """Create the directory and open the tables."""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "ParquetSink requires pyarrow, install it with"
+                " `pip install whyhow[parquet]`"
+            ) from e
+
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+
+        super().__init__()
+        self._pa = pa
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+
+        string = pa.string()
+        keys = [("index", pa.int64())]
+        self._schemas = {
+            "results": pa.schema(
+                keys
+                + [
+                    ("query", string),
+                    ("namespace", string),
+                    ("answer", string),
+                    ("error", string),
+                ]
+            ),
+            "triples": pa.schema(
+                keys
+                + [("position", pa.int64())]
+                + [(field, string) for field in TRIPLE_FIELDS]
+            ),
+            "chunks": pa.schema(
+                keys
+                + [("position", pa.int64())]
+                + [(field, string) for field in TRIPLE_FIELDS]
+                + [
+                    ("chunk_ids", pa.list_(string)),
+                    ("chunk_texts", pa.list_(string)),
+                ]
+            ),
+        }
+        self._writers = {
+            name: pq.ParquetWriter(
+                self.directory / f"{name}.parquet",
+                schema,
+                compression=compression,
+            )
+            for name, schema in self._schemas.items()
+        }
+        self._columns: dict[str, dict[str, list[Any]]] = {}
+        self._clear()
+
+    def _clear(self) -> None:
+        """Empty the buffered columns."""
+        self._columns = {
+            name: {field: [] for field in schema.names}
+            for name, schema in self._schemas.items()
+        }
+        self._buffered = 0
+
+    def _write(self, record: dict[str, Any]) -> None:
+        """Buffer the rows of a result record."""
+        for field, values in self._columns["results"].items():
+            values.append(record[field])
+        for table in ("triples", "chunks"):
+            columns = self._columns[table]
+            for position, row in enumerate(record[table]):
+                columns["index"].append(record["index"])
+                columns["position"].append(position)
+                for field, values in columns.items():
+                    if field not in ("index", "position"):
+                        values.append(row.get(field))
+
+        self._buffered += 1
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows as a row group of every table."""
+        if not self._buffered:
+            return
+        for name, writer in self._writers.items():
+            columns = self._columns[name]
+            if columns["index"]:
+                writer.write_table(
+                    self._pa.table(columns, schema=self._schemas[name])
+                )
+        self._clear()
+
+    def close(self) -> None:
+        """Write the remaining rows and close the tables."""
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
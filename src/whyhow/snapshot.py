@@ -0,0 +1,400 @@
+"""Binary graph snapshots loaded through memory mapping."""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Iterable, Iterator, Optional, Type, Union
+
+from whyhow.frame import NO_NAME, GraphFrame
+from whyhow.schemas.common import Graph, Node, Relationship, Triple
+
+MAGIC = b"WHYHOWGS"
+VERSION = 1
+
+# Magic, version and number of sections.
+_HEADER = struct.Struct("<8sII")
+# Name, offset and length of a section.
+_SECTION = struct.Struct("<8sQQ")
+_COUNT = struct.Struct("<Q")
+
+SECTIONS = ("meta", "strings", "labels", "nodes", "nprops", "edges", "eprops")
+
+SnapshotSource = Union[Graph, GraphFrame, Iterable[Triple]]
+
+
+def _int_bytes(values: "array[int]") -> bytes:
+    """Return the little-endian bytes of an int64 array."""
+    if sys.byteorder == "big":
+        values = array("q", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _string_table(strings: Iterable[str]) -> bytes:
+    """Encode strings as a count, end offsets and the UTF-8 data."""
+    encoded = [string.encode() for string in strings]
+    ends = array("q")
+    end = 0
+    for data in encoded:
+        end += len(data)
+        ends.append(end)
+    return _COUNT.pack(len(encoded)) + _int_bytes(ends) + b"".join(encoded)
+
+
+def _columns(columns: dict[str, dict[int, Any]]) -> bytes:
+    """Encode sparse property columns as JSON."""
+    try:
+        return json.dumps(
+            {
+                key: [list(column), list(column.values())]
+                for key, column in columns.items()
+            }
+        ).encode()
+    except TypeError as e:
+        raise ValueError(f"Properties must be JSON serializable: {e}") from e
+
+
+def write_snapshot(path: str | Path, graph: SnapshotSource) -> None:
+    """Write a graph or triples to a binary snapshot file.
+
+    The file holds sections that can be loaded independently: a string
+    table of types and names, the label sets, fixed-width int64 columns
+    of the nodes and of the edges, and their sparse properties as JSON.
+
+    Parameters
+    ----------
+    path : str | Path
+        The snapshot file. Overwritten if it exists.
+
+    graph : Graph | GraphFrame | Iterable[Triple]
+        The graph to write. Nodes of a `Graph` are deduplicated as in
+        `GraphFrame.from_graph`.
+
+    Raises
+    ------
+    ValueError
+        If a property value cannot be encoded as JSON.
+    """
+    if isinstance(graph, GraphFrame):
+        frame = graph
+    elif isinstance(graph, Graph):
+        frame = GraphFrame.from_graph(graph)
+    else:
+        frame = GraphFrame.from_triples(graph)
+
+    sections = {
+        "meta": json.dumps({"node_key": frame.node_key}).encode(),
+        "strings": _string_table(frame.strings.values),
+        "labels": _string_table(
+            json.dumps(list(labels)) for labels in frame.label_sets.values
+        ),
+        "nodes": (
+            _COUNT.pack(frame.num_nodes)
+            + _int_bytes(frame.node_labels)
+            + _int_bytes(frame.node_names)
+        ),
+        "nprops": _columns(frame.node_properties),
+        "edges": (
+            _COUNT.pack(frame.num_edges)
+            + _int_bytes(frame.edge_types)
+            + _int_bytes(frame.edge_starts)
+            + _int_bytes(frame.edge_ends)
+        ),
+        "eprops": _columns(frame.edge_properties),
+    }
+
+    # Sections start on 8 byte boundaries so that columns can be cast.
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    table = []
+    for name, data in sections.items():
+        offset += -offset % 8
+        table.append((name, offset, len(data)))
+        offset += len(data)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(sections)))
+        for name, offset, length in table:
+            f.write(_SECTION.pack(name.encode(), offset, length))
+        for (_, offset, _), data in zip(table, sections.values()):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+
+
+class Snapshot:
+    """Graph snapshot file mapped into memory.
+
+    Opening a snapshot only reads its section table. Columns are exposed
+    as memoryviews of the mapped file, strings are decoded when accessed
+    and a section is only paged in once it is used, so reading just the
+    nodes never touches the edges. Use it as a context manager, or call
+    `close`, once done; views taken from the columns must be released
+    first.
+
+    Parameters
+    ----------
+    path : str | Path
+        The snapshot file written by `write_snapshot`.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a snapshot or has an unsupported version.
+    """
+
+    def __init__(self, path: str | Path):
+        """Map the file and read its section table."""
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Every view of the map, released on close.
+        self._views: list[memoryview] = []
+        # Views of the sections and of their columns, created once.
+        self._sections_views: dict[str, memoryview] = {}
+        self._columns: dict[str, list[memoryview]] = {}
+        try:
+            self._sections = self._read_table()
+            meta = json.loads(bytes(self._section("meta")))
+            self.node_key = meta["node_key"]
+            self._strings = self._table("strings")
+            self._labels = self._table("labels")
+        except Exception:
+            self.close()
+            raise
+
+    def _read_table(self) -> dict[str, tuple[int, int]]:
+        """Read the offset and length of every section."""
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"{self.path} is not a graph snapshot")
+        magic, version, count = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a graph snapshot")
+        if version != VERSION:
+            raise ValueError(
+                f"Unsupported graph snapshot version {version}"
+                f" (expected {VERSION})"
+            )
+
+        sections = {}
+        for i in range(count):
+            name, offset, length = _SECTION.unpack_from(
+                self._mmap, _HEADER.size + i * _SECTION.size
+            )
+            sections[name.rstrip(b"\0").decode()] = (offset, length)
+        missing = set(SECTIONS) - set(sections)
+        if missing:
+            raise ValueError(
+                f"{self.path} has no {', '.join(sorted(missing))} section"
+            )
+        return sections
+
+    def _section(self, name: str) -> memoryview:
+        """Return a view of the bytes of a section."""
+        view = self._sections_views.get(name)
+        if view is None:
+            offset, length = self._sections[name]
+            end = offset + length
+            with memoryview(self._mmap) as whole:
+                view = whole[offset:end]
+            self._views.append(view)
+            self._sections_views[name] = view
+        return view
+
+    def _ints(self, view: memoryview, start: int, count: int) -> memoryview:
+        """Return `count` int64 values of a section as a view."""
+        end = start + 8 * count
+        ints = view[start:end]
+        if sys.byteorder == "big":
+            values = array("q", bytes(ints))
+            values.byteswap()
+            ints = memoryview(values.tobytes())
+        ints = ints.cast("q")
+        self._views.append(ints)
+        return ints
+
+    def _table(self, name: str) -> "_StringTable":
+        """Return a lazily decoded string table section."""
+        view = self._section(name)
+        (count,) = _COUNT.unpack_from(view)
+        ends = self._ints(view, _COUNT.size, count)
+        data_start = _COUNT.size + 8 * count
+        data = view[data_start:]
+        self._views.append(data)
+        return _StringTable(ends, data)
+
+    def _column_views(self, name: str, columns: int) -> list[memoryview]:
+        """Return the int64 columns of the node or edge section."""
+        views = self._columns.get(name)
+        if views is None:
+            view = self._section(name)
+            (count,) = _COUNT.unpack_from(view)
+            views = self._columns[name] = [
+                self._ints(view, _COUNT.size + 8 * count * i, count)
+                for i in range(columns)
+            ]
+        return views
+
+    def _properties(self, name: str) -> dict[str, dict[int, Any]]:
+        """Decode a sparse property section."""
+        return {
+            key: dict(zip(rows, values))
+            for key, (rows, values) in json.loads(
+                bytes(self._section(name))
+            ).items()
+        }
+
+    def _count(self, name: str) -> int:
+        """Return the number of rows of the node or edge section."""
+        (count,) = _COUNT.unpack_from(self._mmap, self._sections[name][0])
+        return int(count)
+
+    @property
+    def num_nodes(self) -> int:
+        """Return the number of nodes."""
+        return self._count("nodes")
+
+    @property
+    def num_edges(self) -> int:
+        """Return the number of edges."""
+        return self._count("edges")
+
+    def string(self, row: int) -> str:
+        """Return a relationship type or name by row."""
+        return self._strings[row]
+
+    def iter_nodes(self) -> Iterator[Node]:
+        """Yield the nodes, reading only the node sections."""
+        labels, names = self._column_views("nodes", 2)
+        properties = self._properties("nprops")
+        label_sets: dict[int, list[str]] = {}
+        for row in range(len(labels)):
+            if labels[row] not in label_sets:
+                label_sets[labels[row]] = json.loads(self._labels[labels[row]])
+            node_properties = {}
+            if names[row] != NO_NAME:
+                node_properties["name"] = self._strings[names[row]]
+            for key, column in properties.items():
+                if row in column:
+                    node_properties[key] = column[row]
+            yield Node(
+                labels=list(label_sets[labels[row]]),
+                properties=node_properties,
+            )
+
+    def iter_edges(self) -> Iterator[tuple[str, int, int, dict[str, Any]]]:
+        """Yield the type, start row, end row and properties of each edge.
+
+        Only the edge sections and the string table are read.
+        """
+        types, starts, ends = self._column_views("edges", 3)
+        properties = self._properties("eprops")
+        for row in range(len(types)):
+            yield (
+                self._strings[types[row]],
+                starts[row],
+                ends[row],
+                {
+                    key: column[row]
+                    for key, column in properties.items()
+                    if row in column
+                },
+            )
+
+    def to_frame(self) -> GraphFrame:
+        """Load the whole snapshot into a `GraphFrame`."""
+        node_labels, node_names = map(_copy, self._column_views("nodes", 2))
+        edge_types, edge_starts, edge_ends = map(
+            _copy, self._column_views("edges", 3)
+        )
+        return GraphFrame.from_columns(
+            strings=self._strings,
+            label_sets=(tuple(json.loads(labels)) for labels in self._labels),
+            node_labels=node_labels,
+            node_names=node_names,
+            node_properties=self._properties("nprops"),
+            edge_types=edge_types,
+            edge_starts=edge_starts,
+            edge_ends=edge_ends,
+            edge_properties=self._properties("eprops"),
+            node_key=self.node_key,
+        )
+
+    def to_graph(self) -> Graph:
+        """Load the snapshot as a `Graph`."""
+        nodes = list(self.iter_nodes())
+        relationships = [
+            Relationship(
+                type=relation,
+                start_node=nodes[start],
+                end_node=nodes[end],
+                properties=properties,
+            )
+            for relation, start, end, properties in self.iter_edges()
+        ]
+        return Graph.model_construct(relationships=relationships, nodes=nodes)
+
+    def to_triples(self) -> list[Triple]:
+        """Load the edges of the snapshot as triples.
+
+        Raises
+        ------
+        ValueError
+            If a node has no name.
+        """
+        return self.to_frame().to_triples()
+
+    def close(self) -> None:
+        """Release the column views and unmap the file."""
+        self._sections_views.clear()
+        self._columns.clear()
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        """Return the snapshot."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the snapshot."""
+        self.close()
+
+
+def _copy(ints: memoryview) -> "array[int]":
+    """Copy an int64 view into an array."""
+    values = array("q")
+    with ints.cast("B") as data:
+        values.frombytes(data)
+    return values
+
+
+class _StringTable:
+    """String table section decoded one string at a time."""
+
+    def __init__(self, ends: memoryview, data: memoryview):
+        """Initialize the table from its end offsets and UTF-8 data."""
+        self._ends = ends
+        self._data = data
+
+    def __len__(self) -> int:
+        """Return the number of strings."""
+        return len(self._ends)
+
+    def __getitem__(self, row: int) -> str:
+        """Decode the string at a row."""
+        start = self._ends[row - 1] if row else 0
+        end = self._ends[row]
+        return str(self._data[start:end], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        """Decode the strings in order."""
+        return (self[row] for row in range(len(self)))
@@ -0,0 +1,625 @@
+"""Local traversal of graphs and accumulated query results."""
+
+from array import array
+from collections import deque
+from itertools import accumulate
+from typing import Iterable, Iterator, Literal, Optional, Union
+
+from whyhow.apis.graph import AsyncGraphAPI, GraphAPI
+from whyhow.frame import NO_NAME, GraphFrame
+from whyhow.schemas.common import Graph
+from whyhow.schemas.graph import (
+    GetGraphResponse,
+    QueryGraphResponse,
+    QueryGraphReturn,
+    QueryGraphTripleResponse,
+    SpecificQueryGraphResponse,
+)
+
+Direction = Literal["out", "in", "both"]
+
+GraphResponse = Union[
+    GetGraphResponse,
+    QueryGraphResponse,
+    QueryGraphReturn,
+    SpecificQueryGraphResponse,
+]
+
+# Query sent to fetch the triples around entities missing locally.
+FETCH_QUERY = "What is related to {entities}?"
+
+# Edges kept outside of the CSR indexes before they are rebuilt, at least.
+MIN_PENDING_EDGES = 1024
+
+
+class _Adjacency:
+    """Compressed sparse rows of the edges leaving (or entering) nodes.
+
+    The neighbors of node `n` are ``nodes[offsets[n]:offsets[n + 1]]``,
+    reached through the edges at the same positions of ``edges``.
+    """
+
+    def __init__(
+        self, num_nodes: int, sources: "array[int]", targets: "array[int]"
+    ):
+        self.num_nodes = num_nodes
+        counts = [0] * (num_nodes + 1)
+        for source in sources:
+            counts[source + 1] += 1
+        self.offsets = array("q", accumulate(counts))
+
+        self.nodes = array("q", bytes(8 * len(sources)))
+        self.edges = array("q", bytes(8 * len(sources)))
+        positions = list(self.offsets)
+        for edge, (source, target) in enumerate(zip(sources, targets)):
+            position = positions[source]
+            self.nodes[position] = target
+            self.edges[position] = edge
+            positions[source] = position + 1
+
+
+class GraphIndex:
+    """Adjacency indexes answering traversal queries locally.
+
+    Edges are indexed in compressed sparse row (CSR) form in both
+    directions on top of a `GraphFrame`. Triples can be added at any
+    time, e.g. from every query response. The next query indexes them in
+    per-node lists, and the CSR indexes are only rebuilt once these hold
+    as many edges as the CSR, so many small additions cost amortized
+    constant time per edge.
+
+    Entities are referred to by name. A name shared by nodes of several
+    labels refers to all of them.
+
+    Parameters
+    ----------
+    frame : GraphFrame, optional
+        The graph to index. Defaults to an empty frame identifying nodes
+        by label and name.
+    """
+
+    def __init__(self, frame: Optional[GraphFrame] = None):
+        """Initialize the index."""
+        self.frame = frame if frame is not None else GraphFrame("name")
+        self._out = self._in = _Adjacency(0, array("q"), array("q"))
+        # (edge, neighbor) pairs of the edges added since the CSR was built.
+        self._out_pending: dict[int, list[tuple[int, int]]] = {}
+        self._in_pending: dict[int, list[tuple[int, int]]] = {}
+        self._rows_by_name: dict[str, list[int]] = {}
+        self._indexed_nodes = 0
+        self._indexed_edges = 0
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "GraphIndex":
+        """Index a graph."""
+        return cls(GraphFrame.from_graph(graph, node_key="name"))
+
+    @classmethod
+    def from_responses(
+        cls, responses: Iterable[GraphResponse]
+    ) -> "GraphIndex":
+        """Index the graphs or triples of API responses."""
+        index = cls()
+        for response in responses:
+            index.add_response(response)
+        return index
+
+    def add_response(self, response: GraphResponse) -> None:
+        """Add the graph or the triples of an API response."""
+        frame = GraphFrame.from_response(response, node_key="name")
+        self.add_frame(frame)
+
+    def add_frame(self, frame: GraphFrame) -> None:
+        """Add the nodes and edges of another frame."""
+        rows = [
+            self.frame.add_node(
+                list(frame.label_sets[frame.node_labels[row]]),
+                frame.get_node_properties(row),
+            )
+            for row in range(frame.num_nodes)
+        ]
+        for edge in range(frame.num_edges):
+            self.frame.add_edge(
+                frame.strings[frame.edge_types[edge]],
+                rows[frame.edge_starts[edge]],
+                rows[frame.edge_ends[edge]],
+                frame.get_edge_properties(edge),
+            )
+
+    def _build(self) -> None:
+        """Index the nodes and edges added since the last query."""
+        frame = self.frame
+        names = frame.strings.values
+        for row in range(self._indexed_nodes, frame.num_nodes):
+            name = frame.node_names[row]
+            if name != NO_NAME:
+                self._rows_by_name.setdefault(names[name], []).append(row)
+        self._indexed_nodes = frame.num_nodes
+
+        pending = frame.num_edges - len(self._out.edges)
+        if pending > max(MIN_PENDING_EDGES, len(self._out.edges)):
+            self._out = _Adjacency(
+                frame.num_nodes, frame.edge_starts, frame.edge_ends
+            )
+            self._in = _Adjacency(
+                frame.num_nodes, frame.edge_ends, frame.edge_starts
+            )
+            self._out_pending.clear()
+            self._in_pending.clear()
+        else:
+            starts, ends = frame.edge_starts, frame.edge_ends
+            for edge in range(self._indexed_edges, frame.num_edges):
+                start, end = starts[edge], ends[edge]
+                self._out_pending.setdefault(start, []).append((edge, end))
+                self._in_pending.setdefault(end, []).append((edge, start))
+        self._indexed_edges = frame.num_edges
+
+    def __contains__(self, name: object) -> bool:
+        """Return whether an entity is in the graph."""
+        self._build()
+        return name in self._rows_by_name
+
+    def _rows(self, name: str) -> list[int]:
+        """Return the node rows of an entity."""
+        self._build()
+        return self._rows_by_name.get(name, [])
+
+    def _relation_rows(
+        self, relations: Optional[Iterable[str]]
+    ) -> Optional[set[int]]:
+        """Return the string rows of relation names, None for all."""
+        if relations is None:
+            return None
+        rows = (self.frame.strings.find(relation) for relation in relations)
+        return {row for row in rows if row is not None}
+
+    def _steps(
+        self, row: int, relations: Optional[set[int]], direction: Direction
+    ) -> Iterator[tuple[int, int]]:
+        """Yield the (edge, neighbor) pairs of a node row."""
+        adjacencies = []
+        if direction in ("out", "both"):
+            adjacencies.append((self._out, self._out_pending))
+        if direction in ("in", "both"):
+            adjacencies.append((self._in, self._in_pending))
+
+        types = self.frame.edge_types
+        for adjacency, pending in adjacencies:
+            if row < adjacency.num_nodes:
+                start = adjacency.offsets[row]
+                end = adjacency.offsets[row + 1]
+                for position in range(start, end):
+                    edge = adjacency.edges[position]
+                    if relations is None or types[edge] in relations:
+                        yield edge, adjacency.nodes[position]
+            for edge, neighbor in pending.get(row, ()):
+                if relations is None or types[edge] in relations:
+                    yield edge, neighbor
+
+    def _name(self, row: int) -> Optional[str]:
+        """Return the name of a node row, if it has one."""
+        name = self.frame.node_names[row]
+        return None if name == NO_NAME else self.frame.strings[name]
+
+    def _triple(self, edge: int) -> QueryGraphTripleResponse:
+        """Return an edge as a query triple."""
+        frame = self.frame
+        return QueryGraphTripleResponse(
+            head=self._name(frame.edge_starts[edge]) or "",
+            relation=frame.strings[frame.edge_types[edge]],
+            tail=self._name(frame.edge_ends[edge]) or "",
+        )
+
+    def neighbors(
+        self,
+        name: str,
+        relations: Optional[Iterable[str]] = None,
+        direction: Direction = "both",
+    ) -> list[str]:
+        """Return the names of the entities next to an entity.
+
+        Parameters
+        ----------
+        name : str
+            The entity.
+
+        relations : Iterable[str], optional
+            Only follow relations of these types.
+
+        direction : {"out", "in", "both"}
+            Follow relations leaving the entity, entering it, or both.
+
+        Returns
+        -------
+        list[str]
+            The neighbors, in index order and without repeats.
+        """
+        relation_rows = self._relation_rows(relations)
+        found: dict[str, None] = {}
+        for row in self._rows(name):
+            for _, neighbor in self._steps(row, relation_rows, direction):
+                neighbor_name = self._name(neighbor)
+                if neighbor_name is not None:
+                    found[neighbor_name] = None
+        return list(found)
+
+    def k_hop(
+        self,
+        name: str,
+        k: int,
+        relations: Optional[Iterable[str]] = None,
+        direction: Direction = "both",
+    ) -> dict[str, int]:
+        """Return the entities at most `k` relations away from an entity.
+
+        Returns
+        -------
+        dict[str, int]
+            The number of hops to every entity reached, the entity itself
+            included at 0, in breadth-first order.
+        """
+        if k < 0:
+            raise ValueError("k must be at least 0")
+
+        relation_rows = self._relation_rows(relations)
+        depths = {row: 0 for row in self._rows(name)}
+        frontier = list(depths)
+        for depth in range(1, k + 1):
+            next_frontier = []
+            for row in frontier:
+                for _, neighbor in self._steps(
+                    row, relation_rows, direction
+                ):
+                    if neighbor not in depths:
+                        depths[neighbor] = depth
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+
+        hops: dict[str, int] = {}
+        for row, depth in depths.items():
+            row_name = self._name(row)
+            if row_name is not None:
+                hops.setdefault(row_name, depth)
+        return hops
+
+    def shortest_path(
+        self,
+        source: str,
+        target: str,
+        relations: Optional[Iterable[str]] = None,
+        direction: Direction = "both",
+    ) -> Optional[list[QueryGraphTripleResponse]]:
+        """Return the triples of a shortest path between two entities.
+
+        Returns
+        -------
+        list[QueryGraphTripleResponse], optional
+            The triples from `source` to `target`, as stored (a step taken
+            against a relation keeps its head and tail). Empty if both are
+            the same entity, None if `target` cannot be reached.
+        """
+        targets = set(self._rows(target))
+        if not targets:
+            return None
+
+        relation_rows = self._relation_rows(relations)
+        parents: dict[int, Optional[tuple[int, int]]] = {
+            row: None for row in self._rows(source)
+        }
+        queue = deque(parents)
+        while queue:
+            row = queue.popleft()
+            if row in targets:
+                path = []
+                step = parents[row]
+                while step is not None:
+                    edge, row = step
+                    path.append(self._triple(edge))
+                    step = parents[row]
+                return path[::-1]
+
+            for edge, neighbor in self._steps(row, relation_rows, direction):
+                if neighbor not in parents:
+                    parents[neighbor] = (edge, row)
+                    queue.append(neighbor)
+
+        return None
+
+    def subgraph(
+        self,
+        relations: Optional[Iterable[str]] = None,
+        entities: Optional[Iterable[str]] = None,
+    ) -> list[QueryGraphTripleResponse]:
+        """Return the triples of some relation types or between entities.
+
+        Parameters
+        ----------
+        relations : Iterable[str], optional
+            Only keep relations of these types.
+
+        entities : Iterable[str], optional
+            Only keep relations whose head and tail are both among these
+            entities.
+        """
+        self._build()
+        relation_rows = self._relation_rows(relations)
+        if entities is None:
+            types = self.frame.edge_types
+            edges: Iterable[int] = (
+                edge
+                for edge in range(self.frame.num_edges)
+                if relation_rows is None or types[edge] in relation_rows
+            )
+        else:
+            rows = {row for name in entities for row in self._rows(name)}
+            edges = sorted(
+                edge
+                for row in rows
+                for edge, neighbor in self._steps(row, relation_rows, "out")
+                if neighbor in rows
+            )
+        return [self._triple(edge) for edge in edges]
+
+
+class _BaseLocalGraph:
+    """Local index of a namespace shared by the sync and async wrappers."""
+
+    def __init__(
+        self, namespace: str, index: Optional[GraphIndex], complete: bool
+    ):
+        self.namespace = namespace
+        self.index = index if index is not None else GraphIndex()
+        self.complete = complete
+        # Entities fetched with all relations (None) or only some.
+        self.fetched: set[tuple[str, Optional[frozenset[str]]]] = set()
+
+    def _missing(
+        self, entities: Iterable[str], relations: Optional[Iterable[str]]
+    ) -> list[str]:
+        """Return the entities whose relations have not been fetched."""
+        if self.complete:
+            return []
+
+        subset = None if relations is None else frozenset(relations)
+        return [
+            entity
+            for entity in dict.fromkeys(entities)
+            if (entity, None) not in self.fetched
+            and (entity, subset) not in self.fetched
+        ]
+
+    def _fetched(
+        self, entities: list[str], relations: Optional[Iterable[str]]
+    ) -> None:
+        """Record that the relations of entities were fetched."""
+        subset = None if relations is None else frozenset(relations)
+        self.fetched.update((entity, subset) for entity in entities)
+
+    def _frontier(
+        self,
+        name: str,
+        depth: int,
+        relations: Optional[list[str]],
+        direction: Direction,
+    ) -> list[str]:
+        """Return the entities exactly `depth` hops away from an entity."""
+        if depth == 0:
+            return [name]
+        hops = self.index.k_hop(name, depth, relations, direction)
+        return [entity for entity, hop in hops.items() if hop == depth]
+
+    def _reset(self, namespace: str) -> None:
+        """Forget what was fetched once the graph of the namespace changed."""
+        if namespace == self.namespace:
+            self.index = GraphIndex()
+            self.complete = False
+            self.fetched.clear()
+
+
+class LocalGraph(_BaseLocalGraph):
+    """Traverse a namespace locally, asking the server only when needed.
+
+    Queries are answered from a `GraphIndex`. The relations of an entity
+    are fetched once, with a `query_graph_specific` call including
+    triples, the first time a query starts from it (or, for `k_hop`,
+    reaches it before the last hop). Entities missing from the same call
+    are fetched together. The index is dropped whenever the namespace is
+    changed through the same API.
+
+    Parameters
+    ----------
+    graph : GraphAPI
+        The graph API used to fetch missing entities.
+
+    namespace : str
+        The namespace of the graph.
+
+    index : GraphIndex, optional
+        Triples already known, e.g. from earlier query responses.
+
+    complete : bool
+        Whether `index` holds the whole graph, so that nothing is fetched.
+    """
+
+    def __init__(
+        self,
+        graph: GraphAPI,
+        namespace: str,
+        index: Optional[GraphIndex] = None,
+        complete: bool = False,
+    ) -> None:
+        """Initialize the local graph."""
+        super().__init__(namespace, index, complete)
+        self.graph = graph
+        graph.add_invalidation_callback(self._reset)
+
+    def close(self) -> None:
+        """Stop following the changes of the namespace."""
+        self.graph.remove_invalidation_callback(self._reset)
+
+    def fetch(
+        self,
+        entities: Iterable[str],
+        relations: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Fetch the relations of the entities not fetched yet."""
+        missing = self._missing(entities, relations)
+        if not missing:
+            return
+
+        response = self.graph.query_graph_specific(
+            self.namespace,
+            FETCH_QUERY.format(entities=", ".join(missing)),
+            entities=missing,
+            relations=list(relations or []),
+            include_triples=True,
+        )
+        self.index.add_response(response)
+        self._fetched(missing, relations)
+
+    def neighbors(
+        self,
+        name: str,
+        relations: Optional[Iterable[str]] = None,
+        direction: Direction = "both",
+    ) -> list[str]:
+        """Return the neighbors of an entity, see `GraphIndex.neighbors`."""
+        relations = None if relations is None else list(relations)
+        self.fetch([name], relations)
+        return self.index.neighbors(name, relations, direction)
+
+    def k_hop(
+        self,
+        name: str,
+        k: int,
+        relations: Optional[Iterable[str]] = None,
+        direction: Direction = "both",
+    ) -> dict[str, int]:
+        """Return the entities near an entity, see `GraphIndex.k_hop`.
+
+        At most one request is sent per hop.
+        """
+        relations = None if relations is None else list(relations)
+        for depth in range(k):
+            self.fetch(
+                self._frontier(name, depth, relations, direction), relations
+            )
+        return self.index.k_hop(name, k, relations, direction)
+
+    def shortest_path(
+        self,
+        source: str,
+        target: str,
+        relations: Optional[Iterable[str]] = None,
+        direction: Direction = "both",
+    ) -> Optional[list[QueryGraphTripleResponse]]:
+        """Return a shortest path, see `GraphIndex.shortest_path`.
+
+        Only the relations of both ends are fetched; the path is searched
+        among the triples known locally.
+        """
+        relations = None if relations is None else list(relations)
+        self.fetch([source, target], relations)
+        return self.index.shortest_path(source, target, relations, direction)
+
+
+class AsyncLocalGraph(_BaseLocalGraph):
+    """Traverse a namespace locally, asking the server only when needed.
+
+    Asynchronous counterpart of `LocalGraph`.
+
+    Parameters
+    ----------
+    graph : AsyncGraphAPI
+        The graph API used to fetch missing entities.
+
+    namespace : str
+        The namespace of the graph.
+
+    index : GraphIndex, optional
+        Triples already known, e.g. from earlier query responses.
+
+    complete : bool
+        Whether `index` holds the whole graph, so that nothing is fetched.
+    """
+
+    def __init__(
+        self,
+        graph: AsyncGraphAPI,
+        namespace: str,
+        index: Optional[GraphIndex] = None,
+        complete: bool = False,
+    ) -> None:
+        """Initialize the local graph."""
+        super().__init__(namespace, index, complete)
+        self.graph = graph
+        graph.add_invalidation_callback(self._reset)
+
+    def close(self) -> None:
+        """Stop following the changes of the namespace."""
+        self.graph.remove_invalidation_callback(self._reset)
+
+    async def fetch(
+        self,
+        entities: Iterable[str],
+        relations: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Fetch the relations of the entities not fetched yet."""
+        missing = self._missing(entities, relations)
+        if not missing:
+            return
+
+        response = await self.graph.query_graph_specific(
+            self.namespace,
+            FETCH_QUERY.format(entities=", ".join(missing)),
+            entities=missing,
+            relations=list(relations or []),
+            include_triples=True,
+        )
+        self.index.add_response(response)
+        self._fetched(missing, relations)
+
+    async def neighbors(
+        self,
+        name: str,
+        relations: Optional[Iterable[str]] = None,
+        direction: Direction = "both",
+    ) -> list[str]:
+        """Return the neighbors of an entity, see `GraphIndex.neighbors`."""
+        relations = None if relations is None else list(relations)
+        await self.fetch([name], relations)
+        return self.index.neighbors(name, relations, direction)
+
+    async def k_hop(
+        self,
+        name: str,
+        k: int,
+        relations: Optional[Iterable[str]] = None,
+        direction: Direction = "both",
+    ) -> dict[str, int]:
+        """Return the entities near an entity, see `GraphIndex.k_hop`.
+
+        At most one request is sent per hop.
+        """
+        relations = None if relations is None else list(relations)
+        for depth in range(k):
+            await self.fetch(
+                self._frontier(name, depth, relations, direction), relations
+            )
+        return self.index.k_hop(name, k, relations, direction)
+
+    async def shortest_path(
+        self,
+        source: str,
+        target: str,
+        relations: Optional[Iterable[str]] = None,
+        direction: Direction = "both",
+    ) -> Optional[list[QueryGraphTripleResponse]]:
+        """Return a shortest path, see `GraphIndex.shortest_path`.
+
+        Only the relations of both ends are fetched; the path is searched
+        among the triples known locally.
+        """
+        relations = None if relations is None else list(relations)
+        await self.fetch([source, target], relations)
+        return self.index.shortest_path(source, target, relations, direction)
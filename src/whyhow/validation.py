@@ -0,0 +1,231 @@
+"""Local validation of CSV documents against their graph schema."""
+
+import csv
+import difflib
+import json
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+from typing import Optional
+
+from whyhow.inference import NULL_VALUES, DistinctCounter
+from whyhow.schemas.base import BaseReturn
+from whyhow.schemas.common import Schema
+
+RESERVED_PROPERTY_COLUMNS = ("name", "namespace")
+
+# Non-blank values that still mean "no value", e.g. "N/A".
+NULL_TOKENS = NULL_VALUES - {""}
+
+
+class ColumnReport(BaseReturn):
+    """Schema for the statistics of one column used by the schema."""
+
+    name: str
+    rows: int = 0
+    empty: int = 0
+    nulls: int = 0
+    distinct: Optional[int] = None
+    duplicates: Optional[int] = None
+
+    @property
+    def empty_ratio(self) -> float:
+        """Return the fraction of rows where the column is blank."""
+        return self.empty / self.rows if self.rows else 0.0
+
+    @property
+    def null_ratio(self) -> float:
+        """Return the fraction of rows holding a null token like "N/A"."""
+        return self.nulls / self.rows if self.rows else 0.0
+
+
+class CSVValidationReport(BaseReturn):
+    """Schema for the result of validating a CSV against a schema."""
+
+    path: str
+    rows: int = 0
+    ragged_rows: int = 0
+    columns: list[ColumnReport] = []
+    errors: list[str] = []
+    warnings: list[str] = []
+
+    @property
+    def ok(self) -> bool:
+        """Return whether the CSV can be used with the schema."""
+        return not self.errors
+
+    def get_column(self, name: str) -> Optional[ColumnReport]:
+        """Return the report of a column by name if it exists."""
+        for column in self.columns:
+            if column.name == name:
+                return column
+        return None
+
+
+def _missing(kind: str, name: str, header: list[str]) -> str:
+    """Describe a schema reference to a column that does not exist."""
+    message = f"{kind} {name!r} does not match any column"
+    close = difflib.get_close_matches(name, header, n=1)
+    if close:
+        message += f", did you mean {close[0]!r}?"
+    return message
+
+
+def _check_schema(
+    schema: Schema, header: list[str]
+) -> tuple[list[str], list[str]]:
+    """Check the column references of a schema against a header."""
+    columns = set(header)
+    errors: list[str] = []
+    warnings: list[str] = []
+
+    duplicated = sorted({name for name in header if header.count(name) > 1})
+    for name in duplicated:
+        warnings.append(f"Column {name!r} appears more than once")
+
+    entity_names = set()
+    for entity in schema.entities:
+        entity_names.add(entity.name)
+        if entity.name not in columns:
+            errors.append(_missing("Entity", entity.name, header))
+
+        for column in entity.property_columns or []:
+            if column.lower() in RESERVED_PROPERTY_COLUMNS:
+                errors.append(
+                    f"Property column {column!r} of entity {entity.name!r}"
+                    " uses a reserved name"
+                )
+            elif column not in columns:
+                errors.append(
+                    _missing(
+                        f"Property column of entity {entity.name!r}",
+                        column,
+                        header,
+                    )
+                )
+
+    for pattern in schema.patterns:
+        for role, name in (("head", pattern.head), ("tail", pattern.tail)):
+            kind = f"Pattern {pattern.relation!r} {role}"
+            if name not in columns:
+                errors.append(_missing(kind, name, header))
+            elif name not in entity_names:
+                warnings.append(
+                    f"{kind} {name!r} is not an entity of the schema"
+                )
+
+    return errors, warnings
+
+
+def validate_csv(
+    csv_file: str | Path,
+    schema: Schema | str | Path,
+    chunk_size: int = 10_000,
+    sketch_size: int = 65_536,
+) -> CSVValidationReport:
+    """Validate a CSV document against a CSV graph schema.
+
+    The header is checked first: every entity, property column and
+    pattern head and tail must name a column, and property columns must
+    not use a reserved name. The rows are then streamed once, in chunks
+    that are transposed into columns, to count blank and null values of
+    every column used by the schema and duplicate values of the key
+    entities (the heads of the patterns, and entities with properties).
+
+    Parameters
+    ----------
+    csv_file : str | Path
+        The CSV document, with a header row.
+
+    schema : Schema | str | Path
+        The schema, or the JSON file holding it.
+
+    chunk_size : int
+        The number of rows processed at a time.
+
+    sketch_size : int
+        The number of hashes kept per key column. Duplicate counts are
+        exact below this many distinct values and estimated above.
+
+    Returns
+    -------
+    CSVValidationReport
+        The errors and warnings found, and the column statistics.
+
+    """
+    if not isinstance(schema, Schema):
+        with open(schema, encoding="utf-8-sig") as f:
+            schema = Schema(**json.load(f))
+
+    report = CSVValidationReport(path=str(csv_file))
+    with open(csv_file, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        report.errors, report.warnings = _check_schema(schema, header)
+
+        used: dict[str, None] = {}
+        keys: set[str] = set()
+        for entity in schema.entities:
+            used[entity.name] = None
+            used.update(dict.fromkeys(entity.property_columns or []))
+            if entity.property_columns:
+                keys.add(entity.name)
+        for pattern in schema.patterns:
+            used.update(dict.fromkeys((pattern.head, pattern.tail)))
+            keys.add(pattern.head)
+
+        indices = {name: header.index(name) for name in used if name in header}
+        stats = {name: ColumnReport(name=name) for name in indices}
+        sketches = {
+            name: DistinctCounter(sketch_size) for name in keys & set(indices)
+        }
+        width = len(header)
+
+        while chunk := list(islice(reader, chunk_size)):
+            ragged = [i for i, row in enumerate(chunk) if len(row) != width]
+            report.ragged_rows += len(ragged)
+            for i in ragged:
+                chunk[i] = (chunk[i] + [""] * width)[:width]
+
+            report.rows += len(chunk)
+            transposed = list(zip(*chunk)) if width else []
+            for name, index in indices.items():
+                column = stats[name]
+                sketch = sketches.get(name)
+                # Counting is done in C, leaving only the distinct values
+                # of the chunk to look at in Python.
+                values = []
+                for value, count in Counter(transposed[index]).items():
+                    stripped = value.strip()
+                    if not stripped:
+                        column.empty += count
+                    elif stripped.casefold() in NULL_TOKENS:
+                        column.nulls += count
+                    else:
+                        values.append(stripped)
+                if sketch is not None:
+                    sketch.update(values)
+
+    for name, column in stats.items():
+        column.rows = report.rows
+        filled = column.rows - column.empty - column.nulls
+        if report.rows and not filled:
+            report.warnings.append(f"Column {name!r} has no values")
+
+        sketch = sketches.get(name)
+        if sketch is not None:
+            column.distinct = min(len(sketch), filled)
+            column.duplicates = filled - column.distinct
+            if column.duplicates:
+                report.warnings.append(
+                    f"Key column {name!r} has {column.duplicates} duplicate"
+                    " values"
+                )
+
+    if report.ragged_rows:
+        report.warnings.append(
+            f"{report.ragged_rows} rows do not have {width} fields"
+        )
+
+    report.columns = list(stats.values())
+    return report
@@ -0,0 +1,396 @@
+"""Refresh-ahead warming of the query cache."""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import TracebackType
+from typing import Iterable, Mapping, Optional, Type
+
+from whyhow.apis.graph import AsyncGraphAPI, GraphAPI
+from whyhow.cache import CacheBackend, CacheKey, make_key
+from whyhow.schemas.graph import QueryGraphRequest
+
+logger = logging.getLogger(__name__)
+
+
+class _BaseWarmer:
+    """Scheduling state shared by the sync and async warmers."""
+
+    def __init__(
+        self,
+        cache: Optional[CacheBackend],
+        queries: Optional[Mapping[str, Iterable[str]]],
+        keys: Iterable[CacheKey],
+        top_k: Optional[int],
+        interval: Optional[float],
+        concurrency: int,
+        rebuild_delay: float,
+    ) -> None:
+        if cache is None:
+            raise ValueError("The graph API has no cache to warm.")
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        if interval is None:
+            interval = 0.8 * cache.ttl if cache.ttl is not None else 60.0
+
+        self.cache = cache
+        self.top_k = top_k
+        self.interval = interval
+        self.concurrency = concurrency
+        self.rebuild_delay = rebuild_delay
+
+        self._keys: dict[CacheKey, None] = dict.fromkeys(keys)
+        for namespace, namespace_queries in (queries or {}).items():
+            for query in namespace_queries:
+                key = make_key(
+                    namespace, "query", QueryGraphRequest(query=query)
+                )
+                self._keys[key] = None
+
+        self._learned: dict[str, list[CacheKey]] = {}
+        self._pending: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _learn(self) -> None:
+        """Sample the most frequently hit keys of the cache.
+
+        Namespaces missing from the sample (e.g. because they were just
+        invalidated) keep their previously learned keys.
+        """
+        if not self.top_k:
+            return
+
+        learned: dict[str, list[CacheKey]] = {}
+        for key in self.cache.top_keys(self.top_k):
+            learned.setdefault(key.namespace, []).append(key)
+
+        self._learned.update(learned)
+
+    def hot_keys(self, namespace: Optional[str] = None) -> list[CacheKey]:
+        """Return the keys to refresh, optionally for one namespace only."""
+        keys = dict(self._keys)
+        for namespace_keys in self._learned.values():
+            keys.update(dict.fromkeys(namespace_keys))
+
+        return [
+            key
+            for key in keys
+            if namespace is None or key.namespace == namespace
+        ]
+
+    def _schedule(self, namespace: str) -> None:
+        """Queue a namespace for warming after its graph changed."""
+        with self._lock:
+            self._pending[namespace] = time.monotonic() + self.rebuild_delay
+
+    def _take_due(self, now: float) -> list[str]:
+        """Pop the queued namespaces whose delay has elapsed."""
+        with self._lock:
+            due = [ns for ns, at in self._pending.items() if at <= now]
+            for namespace in due:
+                del self._pending[namespace]
+
+        return due
+
+    def _next_wakeup(self, next_cycle: float) -> float:
+        """Return the seconds until the next cycle or queued namespace."""
+        with self._lock:
+            wakeup = min([next_cycle, *self._pending.values()])
+
+        return max(0.0, wakeup - time.monotonic())
+
+
+class CacheWarmer(_BaseWarmer):
+    """Keep hot queries of a `GraphAPI` cache warm from a daemon thread.
+
+    Every `interval` seconds the warmer re-runs its hot queries so that
+    their cache entries are replaced before they expire. Namespaces
+    changed through the same API (`add_documents`, `create_graph*`) are
+    re-warmed as soon as the change returns, after `rebuild_delay`.
+
+    Parameters
+    ----------
+    graph : GraphAPI
+        The graph API whose `cache` is warmed.
+
+    queries : Mapping[str, Iterable[str]], optional
+        Hot `query_graph` queries per namespace.
+
+    keys : Iterable[CacheKey]
+        Additional hot cache keys, e.g. of specific queries.
+
+    top_k : int, optional
+        Also warm the `top_k` most frequently hit entries of the cache.
+
+    interval : float, optional
+        Seconds between refreshes. Defaults to 80% of the cache TTL, or 60
+        seconds when entries do not expire.
+
+    concurrency : int
+        The maximum number of refresh requests in flight, so that warming
+        never takes over the connection pool.
+
+    rebuild_delay : float
+        Seconds to wait after a namespace changed before re-warming it,
+        giving the server time to rebuild the graph.
+    """
+
+    def __init__(
+        self,
+        graph: GraphAPI,
+        queries: Optional[Mapping[str, Iterable[str]]] = None,
+        keys: Iterable[CacheKey] = (),
+        top_k: Optional[int] = None,
+        interval: Optional[float] = None,
+        concurrency: int = 2,
+        rebuild_delay: float = 0.0,
+    ) -> None:
+        """Initialize the warmer."""
+        super().__init__(
+            graph.cache,
+            queries,
+            keys,
+            top_k,
+            interval,
+            concurrency,
+            rebuild_delay,
+        )
+        self.graph = graph
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def warm(self, namespace: Optional[str] = None) -> int:
+        """Refresh the hot queries now and block until done.
+
+        Parameters
+        ----------
+        namespace : str, optional
+            Only refresh the queries of this namespace.
+
+        Returns
+        -------
+        int
+            The number of queries refreshed successfully.
+
+        """
+        if namespace is None:
+            self._learn()
+
+        keys = self.hot_keys(namespace)
+        if self._executor is not None:
+            return sum(self._executor.map(self._refresh, keys))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return sum(executor.map(self._refresh, keys))
+
+    def _refresh(self, key: CacheKey) -> bool:
+        try:
+            self.graph.refresh(key)
+        except Exception:
+            logger.warning("Failed to refresh %r", key, exc_info=True)
+            return False
+
+        return True
+
+    def _on_invalidate(self, namespace: str) -> None:
+        self._schedule(namespace)
+        self._wake.set()
+
+    def _run(self) -> None:
+        next_cycle = time.monotonic()
+        while not self._stop.is_set():
+            self._wake.wait(self._next_wakeup(next_cycle))
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+
+            now = time.monotonic()
+            if now >= next_cycle:
+                next_cycle = now + self.interval
+                self._take_due(now)
+                self.warm()
+                continue
+
+            for namespace in self._take_due(now):
+                self.warm(namespace)
+
+    def start(self) -> None:
+        """Start warming in a daemon thread."""
+        if self._thread is not None:
+            raise RuntimeError("The warmer is already running.")
+
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="whyhow-warmer"
+        )
+        self.graph.add_invalidation_callback(self._on_invalidate)
+        self._thread = threading.Thread(
+            target=self._run, name="whyhow-warmer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the daemon thread and wait for running refreshes."""
+        if self._thread is None:
+            return
+
+        self.graph.remove_invalidation_callback(self._on_invalidate)
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> "CacheWarmer":
+        """Start the warmer."""
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Stop the warmer."""
+        self.stop()
+
+
+class AsyncCacheWarmer(_BaseWarmer):
+    """Keep hot queries of an `AsyncGraphAPI` cache warm from a task.
+
+    The asyncio counterpart of `CacheWarmer`, taking the same parameters.
+    `start` must be called from within the running event loop.
+    """
+
+    def __init__(
+        self,
+        graph: AsyncGraphAPI,
+        queries: Optional[Mapping[str, Iterable[str]]] = None,
+        keys: Iterable[CacheKey] = (),
+        top_k: Optional[int] = None,
+        interval: Optional[float] = None,
+        concurrency: int = 2,
+        rebuild_delay: float = 0.0,
+    ) -> None:
+        """Initialize the warmer."""
+        super().__init__(
+            graph.cache,
+            queries,
+            keys,
+            top_k,
+            interval,
+            concurrency,
+            rebuild_delay,
+        )
+        self.graph = graph
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def warm(self, namespace: Optional[str] = None) -> int:
+        """Refresh the hot queries now.
+
+        Parameters
+        ----------
+        namespace : str, optional
+            Only refresh the queries of this namespace.
+
+        Returns
+        -------
+        int
+            The number of queries refreshed successfully.
+
+        """
+        if namespace is None:
+            self._learn()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(key: CacheKey) -> bool:
+            async with semaphore:
+                try:
+                    await self.graph.refresh(key)
+                except Exception:
+                    logger.warning("Failed to refresh %r", key, exc_info=True)
+                    return False
+
+                return True
+
+        results = await asyncio.gather(
+            *(refresh(key) for key in self.hot_keys(namespace))
+        )
+
+        return sum(results)
+
+    def _on_invalidate(self, namespace: str) -> None:
+        self._schedule(namespace)
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self, wake: asyncio.Event) -> None:
+        next_cycle = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(
+                    wake.wait(), self._next_wakeup(next_cycle)
+                )
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+
+            now = time.monotonic()
+            if now >= next_cycle:
+                next_cycle = now + self.interval
+                self._take_due(now)
+                await self.warm()
+                continue
+
+            for namespace in self._take_due(now):
+                await self.warm(namespace)
+
+    def start(self) -> None:
+        """Start warming in a task on the running event loop."""
+        if self._task is not None:
+            raise RuntimeError("The warmer is already running.")
+
+        self._wake = asyncio.Event()
+        self.graph.add_invalidation_callback(self._on_invalidate)
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(self._wake)
+        )
+
+    async def stop(self) -> None:
+        """Cancel the warming task."""
+        if self._task is None:
+            return
+
+        self.graph.remove_invalidation_callback(self._on_invalidate)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wake = None
+
+    async def __aenter__(self) -> "AsyncCacheWarmer":
+        """Start the warmer."""
+        self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Stop the warmer."""
+        await self.stop()
@@ -1,12 +1,23 @@
 """Tests focused on the graph API."""
 
+import asyncio
+import io
+import json
 import os
 
+import httpx
 import pytest
 
-from whyhow.client import WhyHow
+from whyhow.cache import QueryCache, SchemaCache
+from whyhow.client import AsyncWhyHow, WhyHow
+from whyhow.documents import MAX_UPLOAD_BYTES, preflight_documents
+from whyhow.manifest import DocumentManifest
 from whyhow.schemas.common import Graph, Node, Relationship
-from whyhow.schemas.graph import QueryGraphRequest, QueryGraphResponse
+from whyhow.schemas.graph import (
+    QueryGraphRequest,
+    QueryGraphResponse,
+    SpecificQueryGraphRequest,
+)
 
 # Set fake environment variables
 os.environ["WHYHOW_API_KEY"] = "fake_api_key"
@@ -106,3 +117,710 @@ class TestGraphAPIAddDocuments:
                 "something",
                 documents=[tmp_pdf_1, tmp_pdf_2],
             )
+
+    def test_handles_closed_on_http_error(
+        self, httpx_mock, tmp_path, monkeypatch
+    ):
+        """Test that every document is closed even if the upload fails."""
+        opened = []
+        real_open = open
+
+        def tracking_open(*args, **kwargs):
+            file = real_open(*args, **kwargs)
+            opened.append(file)
+            return file
+
+        monkeypatch.setattr(
+            "whyhow.multipart.open", tracking_open, raising=False
+        )
+        httpx_mock.add_response(method="POST", status_code=500)
+        client = WhyHow()
+        documents = []
+        for name in ["a.pdf", "b.pdf"]:
+            (tmp_path / name).write_bytes(b"%PDF-1.4")
+            documents.append(str(tmp_path / name))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            client.graph.add_documents("something", documents=documents)
+
+        assert len(opened) == 2
+        assert all(file.closed for file in opened)
+
+    def test_in_memory_documents(self, httpx_mock):
+        """Test that documents held in memory are uploaded and checked."""
+        httpx_mock.add_response(
+            method="POST",
+            json={"namespace": "something", "message": "Added"},
+        )
+        client = WhyHow()
+
+        message = client.graph.add_documents(
+            "something",
+            [("a.pdf", b"%PDF-1.4"), ("b.pdf", io.BytesIO(b"%PDF-1.4"))],
+        )
+
+        assert message == "Added"
+        body = httpx_mock.get_requests()[0].read()
+        assert b'filename="a.pdf"' in body
+        assert b'filename="b.pdf"' in body
+
+        with pytest.raises(
+            ValueError, match="Only PDFs and CSVs are supported"
+        ):
+            client.graph.add_documents("something", [("a.txt", b"text")])
+
+        with pytest.raises(ValueError, match="PDFs too large"):
+            client.graph.add_documents(
+                "something", [("a.pdf", bytes(MAX_UPLOAD_BYTES + 1))]
+            )
+        body = httpx_mock.get_requests()[0].read()
+        assert body.count(b"%PDF-1.4") == 2
+
+
+class TestGraphAPIAddDocumentsBulk:
+    """Tests for the `add_documents_bulk` method."""
+
+    def test_batches_uploaded(self, httpx_mock, tmp_path):
+        """Test that batches are uploaded and failures reported per batch."""
+
+        def callback(request):
+            if b"fail.csv" in request.read():
+                return httpx.Response(500)
+            return httpx.Response(
+                200, json={"namespace": "something", "message": "Added"}
+            )
+
+        httpx_mock.add_callback(callback, is_reusable=True)
+        documents = []
+        for name in ["a.pdf", "b.pdf", "c.pdf", "d.pdf"]:
+            (tmp_path / name).write_bytes(b"%PDF-1.4")
+            documents.append(str(tmp_path / name))
+        (tmp_path / "fail.csv").write_bytes(b"a,b\n1,2\n")
+        documents.append(str(tmp_path / "fail.csv"))
+        (tmp_path / "fake.pdf").write_bytes(b"a,b\n1,2\n")
+        documents.append(str(tmp_path / "fake.pdf"))
+        documents.append(str(tmp_path / "missing.pdf"))
+
+        result = WhyHow().graph.add_documents_bulk(
+            "something", documents, concurrency=2
+        )
+
+        assert len(result.batches) == 3
+        assert len(httpx_mock.get_requests()) == 3
+        assert [batch.documents for batch in result.failed] == [
+            [str(tmp_path / "fail.csv")]
+        ]
+        assert sorted(
+            document
+            for batch in result.batches
+            if batch.message == "Added"
+            for document in batch.documents
+        ) == sorted(documents[:4])
+        assert result.rejected == {
+            str(tmp_path / "fake.pdf"): "Content does not match the .pdf"
+            " extension",
+            str(tmp_path / "missing.pdf"): "Document does not exist",
+        }
+
+    def test_preflight_report(self, httpx_mock, tmp_path, monkeypatch):
+        """Test that a preflight report is uploaded without re-checking."""
+        httpx_mock.add_response(
+            method="POST",
+            json={"namespace": "something", "message": "Added"},
+        )
+        (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4")
+        report = preflight_documents([str(tmp_path / "a.pdf")])
+        monkeypatch.setattr(
+            "whyhow.apis.graph.preflight_documents", pytest.fail
+        )
+
+        result = WhyHow().graph.add_documents_bulk("something", report)
+
+        assert not result.rejected
+        assert len(result.batches) == 1
+
+    def test_upload_batch(self, httpx_mock, tmp_path):
+        """Test that a preflight batch is uploaded in one request."""
+        httpx_mock.add_response(
+            method="POST",
+            json={"namespace": "something", "message": "Added"},
+        )
+        (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4 a")
+        (tmp_path / "b.pdf").write_bytes(b"%PDF-1.4 b")
+        report = preflight_documents(
+            [str(tmp_path / name) for name in ("a.pdf", "b.pdf", "c.pdf")]
+        )
+        graph = WhyHow().graph
+
+        assert graph.upload_batch("something", report.valid) == "Added"
+        (request,) = httpx_mock.get_requests()
+        assert request.url.path == "/graphs/something/add_documents"
+        assert b"%PDF-1.4 b" in request.read()
+
+        with pytest.raises(ValueError, match="failed preflight"):
+            graph.upload_batch("something", report.documents)
+        with pytest.raises(ValueError, match="No documents"):
+            graph.upload_batch("something", [])
+
+    def test_manifest_skips_uploaded(self, httpx_mock, tmp_path):
+        """Test that a re-run only uploads new documents."""
+        httpx_mock.add_response(
+            method="POST",
+            json={"namespace": "something", "message": "Added"},
+            is_reusable=True,
+        )
+        manifest = DocumentManifest(tmp_path / "manifest.sqlite")
+        client = WhyHow()
+        documents = []
+        for name in ["a.pdf", "b.pdf"]:
+            (tmp_path / name).write_bytes(b"%PDF-1.4 " + name.encode())
+            documents.append(str(tmp_path / name))
+
+        client.graph.add_documents_bulk(
+            "something", documents, manifest=manifest
+        )
+        (tmp_path / "c.pdf").write_bytes(b"%PDF-1.4 c.pdf")
+        result = client.graph.add_documents_bulk(
+            "something",
+            documents + [str(tmp_path / "c.pdf")],
+            manifest=manifest,
+        )
+
+        assert result.skipped == documents
+        assert [batch.documents for batch in result.batches] == [
+            [str(tmp_path / "c.pdf")]
+        ]
+
+        forced = client.graph.add_documents_bulk(
+            "something", documents, manifest=manifest, force=True
+        )
+        assert not forced.skipped
+        assert len(httpx_mock.get_requests()) == 3
+
+
+class TestGraphAPICreateGraphFromCSV:
+    """Tests for the local CSV validation of `create_graph_from_csv`."""
+
+    def test_mismatch_raises_before_request(self, httpx_mock, tmp_path):
+        """Test that a CSV not matching the schema is never sent."""
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(
+            json.dumps(
+                {
+                    "entities": [
+                        {
+                            "name": "Name",
+                            "description": "",
+                            "property_columns": [],
+                        }
+                    ],
+                    "relations": [],
+                    "patterns": [],
+                }
+            )
+        )
+        csv_file = tmp_path / "people.csv"
+        csv_file.write_text("name,City\nAlice,Paris\n")
+
+        with pytest.raises(ValueError, match="did you mean 'name'"):
+            WhyHow().graph.create_graph_from_csv(
+                "something", str(schema_file), csv_file=str(csv_file)
+            )
+        assert not httpx_mock.get_requests()
+
+
+class TestGraphAPISchemaCache:
+    """Tests for the compiled schema cache."""
+
+    def test_schema_compiled_once(self, httpx_mock, tmp_path):
+        """Test that a schema sent to many namespaces is parsed once."""
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(
+            json.dumps(
+                {
+                    "entities": [{"name": "Person", "description": ""}],
+                    "relations": [{"name": "knows", "description": ""}],
+                    "patterns": [],
+                }
+            )
+        )
+        for namespace in ("ns1", "ns2"):
+            httpx_mock.add_response(
+                method="POST",
+                url="https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com"
+                f"/graphs/{namespace}/create_graph_from_schema",
+                json={"namespace": namespace, "message": "Creating"},
+            )
+        schema_cache = SchemaCache()
+        client = WhyHow()
+        client.graph.schema_cache = schema_cache
+
+        client.graph.create_graph_from_schema("ns1", str(schema_file))
+        client.graph.create_graph_from_schema("ns2", str(schema_file))
+
+        first, second = httpx_mock.get_requests()
+        assert first.content == second.content
+        body = json.loads(first.content)
+        assert body["graph_schema"]["entities"][0]["name"] == "Person"
+        assert first.headers["Content-Type"] == "application/json"
+        assert (schema_cache.hits, schema_cache.misses) == (1, 1)
+
+    def test_profile_not_rescanned(self, tmp_path, monkeypatch):
+        """Test that generate_schema does not re-profile unchanged files."""
+        tmp_csv = tmp_path / "people.csv"
+        tmp_csv.write_text("Name,City\nAlice,Paris\nBob,Paris\n")
+        client = WhyHow()
+        client.graph.schema_cache = SchemaCache()
+
+        schema = client.graph.generate_schema(
+            [str(tmp_csv)], mode="profile", max_workers=1
+        )
+        monkeypatch.setattr(
+            "whyhow.apis.graph.profile_documents", pytest.fail
+        )
+
+        assert schema == client.graph.generate_schema(
+            [str(tmp_csv)], mode="profile", max_workers=1
+        )
+
+
+class TestGraphAPICache:
+    """Tests for the opt-in query cache."""
+
+    def test_cache_hit_and_invalidation(self, httpx_mock):
+        """Test that repeats are cached until the namespace changes."""
+        httpx_mock.add_response(
+            method="POST",
+            url="https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com"
+            "/graphs/something/query",
+            json={"namespace": "something", "answer": "Alice knows Bob"},
+            is_reusable=True,
+        )
+        httpx_mock.add_response(
+            method="POST",
+            url="https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com"
+            "/graphs/something/create_graph",
+            json={"namespace": "something", "message": "Creating"},
+        )
+        cache = QueryCache()
+        client = WhyHow(cache=cache)
+
+        client.graph.query_graph("something", "Who does Alice know?")
+        client.graph.query_graph("something", "who does alice know? ")
+        assert len(httpx_mock.get_requests()) == 1
+        assert cache.hits == 1
+
+        client.graph.create_graph("something", ["Who does Alice know?"])
+        client.graph.query_graph("something", "Who does Alice know?")
+        assert len(httpx_mock.get_requests()) == 3
+
+    def test_failed_changes_keep_cache(self, httpx_mock, tmp_path):
+        """Test that failed uploads and creations do not invalidate."""
+        url = "https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com/graphs"
+        httpx_mock.add_response(
+            method="POST",
+            url=f"{url}/something/query",
+            json={"namespace": "something", "answer": "Alice knows Bob"},
+        )
+        for endpoint in ("create_graph", "add_documents"):
+            httpx_mock.add_response(
+                method="POST",
+                url=f"{url}/something/{endpoint}",
+                status_code=500,
+            )
+        tmp_pdf = tmp_path / "example.pdf"
+        tmp_pdf.write_bytes(b"%PDF-1.4 fake")
+        changed = []
+        client = WhyHow(cache=QueryCache())
+        client.graph.add_invalidation_callback(changed.append)
+
+        client.graph.query_graph("something", "Who does Alice know?")
+        with pytest.raises(httpx.HTTPStatusError):
+            client.graph.create_graph("something", ["Who?"])
+        with pytest.raises(httpx.HTTPStatusError):
+            client.graph.add_documents("something", [str(tmp_pdf)])
+        client.graph.query_graph("something", "Who does Alice know?")
+
+        assert changed == []
+        assert client.graph.cache.hits == 1
+
+    def test_invalidation_during_query(self, httpx_mock):
+        """Test that a response outdated while in flight is not cached."""
+        url = "https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com/graphs"
+        client = WhyHow(cache=QueryCache())
+        answers = iter(["Alice knows Bob", "Alice knows Carol"])
+
+        def answer(request):
+            response = {"namespace": "something", "answer": next(answers)}
+            if response["answer"] == "Alice knows Bob":
+                client.graph.create_graph("something", ["Who?"])
+            return httpx.Response(200, json=response)
+
+        httpx_mock.add_callback(
+            answer, url=f"{url}/something/query", is_reusable=True
+        )
+        httpx_mock.add_response(
+            url=f"{url}/something/create_graph",
+            json={"namespace": "something", "message": "Creating"},
+        )
+
+        first = client.graph.query_graph("something", "Who does Alice know?")
+        second = client.graph.query_graph("something", "Who does Alice know?")
+        third = client.graph.query_graph("something", "Who does Alice know?")
+
+        assert first.answer == "Alice knows Bob"
+        assert second.answer == third.answer == "Alice knows Carol"
+        assert client.graph.cache.hits == 1
+
+    def test_refresh_sends_original_query(self, httpx_mock):
+        """Test that refreshing a key sends the query as it was asked."""
+        httpx_mock.add_response(
+            method="POST",
+            url="https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com"
+            "/graphs/something/query",
+            json={"namespace": "something", "answer": "Alice knows Bob"},
+            is_reusable=True,
+        )
+        client = WhyHow(cache=QueryCache())
+
+        client.graph.query_graph("something", "Who does  Alice KNOW?")
+        (key,) = client.graph.cache.top_keys(1)
+        client.graph.refresh(key)
+
+        first, second = httpx_mock.get_requests()
+        assert json.loads(second.content) == json.loads(first.content)
+        assert json.loads(second.content)["query"] == "Who does  Alice KNOW?"
+
+
+class TestGraphAPIMapQueries:
+    """Tests for the thread-pool query methods."""
+
+    def test_map_queries(self, httpx_mock):
+        """Test that results keep input order and errors stay per item."""
+
+        def callback(request):
+            query = json.loads(request.read())["query"]
+            if query == "bad":
+                return httpx.Response(500)
+            return httpx.Response(
+                200, json={"namespace": "something", "answer": query.upper()}
+            )
+
+        httpx_mock.add_callback(callback, is_reusable=True)
+        client = WhyHow(max_workers=3)
+        queries = ["a", "b", "bad", "d", "e", "f"]
+
+        results = client.graph.map_queries("something", queries)
+
+        assert [
+            result.answer
+            for result in results
+            if not isinstance(result, Exception)
+        ] == ["A", "B", "D", "E", "F"]
+        assert isinstance(results[2], httpx.HTTPStatusError)
+
+    def test_map_specific_queries(self, httpx_mock):
+        """Test that entities and relations are sent per query."""
+        httpx_mock.add_response(
+            method="POST",
+            json={"namespace": "something", "answer": "ok"},
+            is_reusable=True,
+        )
+        client = WhyHow()
+        requests = [
+            SpecificQueryGraphRequest(query="q1", entities=["Alice"]),
+            SpecificQueryGraphRequest(query="q2", relations=["KNOWS"]),
+        ]
+
+        results = client.graph.map_specific_queries(
+            "something", requests, max_workers=2
+        )
+
+        assert [result.answer for result in results] == ["ok", "ok"]
+        sent = sorted(
+            (
+                SpecificQueryGraphRequest.model_validate_json(request.read())
+                for request in httpx_mock.get_requests()
+            ),
+            key=lambda request: request.query,
+        )
+        assert sent == requests
+
+    def test_iter_map_queries(self, httpx_mock):
+        """Test that the streaming variant yields every index once."""
+        httpx_mock.add_response(
+            method="POST",
+            json={"namespace": "something", "answer": "ok"},
+            is_reusable=True,
+        )
+        client = WhyHow()
+
+        indices = [
+            index
+            for index, _ in client.graph.iter_map_queries(
+                "something", (str(i) for i in range(20)), max_workers=4
+            )
+        ]
+
+        assert sorted(indices) == list(range(20))
+
+
+class TestAsyncGraphAPI:
+    """Tests for the `AsyncGraphAPI` class."""
+
+    @pytest.mark.asyncio
+    async def test_query_graph(self, httpx_mock):
+        """Test that the coroutine sends the correct request."""
+        query = "What friends does Alice have?"
+        fake_response_body = QueryGraphResponse(
+            namespace="something",
+            answer="Alice knows Bob",
+        )
+        httpx_mock.add_response(
+            method="POST",
+            json=fake_response_body.model_dump(),
+        )
+
+        async with AsyncWhyHow() as client:
+            result = await client.graph.query_graph(
+                namespace="something",
+                query=query,
+            )
+
+        assert result == fake_response_body
+
+        actual_request = httpx_mock.get_requests()[0]
+        actual_request_body = QueryGraphRequest.model_validate_json(
+            actual_request.read().decode()
+        )
+
+        assert actual_request.url.path == "/graphs/something/query"
+        assert actual_request_body == QueryGraphRequest(query=query)
+
+    @pytest.mark.asyncio
+    async def test_add_documents(self, httpx_mock, tmp_path):
+        """Test that documents are read and uploaded."""
+        tmp_pdf = tmp_path / "example.pdf"
+        tmp_pdf.write_bytes(b"%PDF-1.4 fake")
+        httpx_mock.add_response(
+            method="POST",
+            json={"namespace": "something", "message": "Documents added"},
+        )
+
+        async with AsyncWhyHow() as client:
+            message = await client.graph.add_documents(
+                "something", documents=[str(tmp_pdf)]
+            )
+
+            with pytest.raises(ValueError, match="No documents provided"):
+                await client.graph.add_documents("something", documents=[])
+
+        assert message == "Documents added"
+
+        actual_request = httpx_mock.get_requests()[0]
+        assert actual_request.url.path == "/graphs/something/add_documents"
+        assert b"%PDF-1.4 fake" in actual_request.read()
+
+    @pytest.mark.asyncio
+    async def test_generate_schema(self, tmp_path):
+        """Test that the schema is generated from the CSV header."""
+        tmp_csv = tmp_path / "example.csv"
+        tmp_csv.write_text("Name,City\nAlice,Paris\n")
+
+        async with AsyncWhyHow() as client:
+            schema = json.loads(
+                await client.graph.generate_schema([str(tmp_csv)])
+            )
+
+        assert [entity["name"] for entity in schema["entities"]] == [
+            "Name",
+            "City",
+        ]
+        assert schema["patterns"][0]["relation"] == "has_city"
+
+    @pytest.mark.asyncio
+    async def test_generate_schema_profile(self, tmp_path):
+        """Test that profiling keeps unique values out of the entities."""
+        tmp_csv = tmp_path / "example.csv"
+        tmp_csv.write_text(
+            "Name,City,Age\n"
+            + "".join(f"Person {i},City {i % 2},{i}\n" for i in range(10))
+        )
+
+        async with AsyncWhyHow() as client:
+            schema = json.loads(
+                await client.graph.generate_schema(
+                    [str(tmp_csv)], mode="profile"
+                )
+            )
+
+        assert [entity["name"] for entity in schema["entities"]] == [
+            "Name",
+            "City",
+        ]
+        assert schema["entities"][0]["property_columns"] == ["Age"]
+
+    @pytest.mark.asyncio
+    async def test_generate_schema_many(self, tmp_path):
+        """Test that several CSVs need profile mode and are merged."""
+        documents = []
+        for name, rows in [("people", "Name\nA\nB\n"), ("pets", "Pet\nC\n")]:
+            (tmp_path / f"{name}.csv").write_text(rows)
+            documents.append(str(tmp_path / f"{name}.csv"))
+
+        async with AsyncWhyHow() as client:
+            with pytest.raises(ValueError, match="Too many documents"):
+                await client.graph.generate_schema(documents)
+
+            schema = json.loads(
+                await client.graph.generate_schema(
+                    documents, mode="profile", max_workers=1
+                )
+            )
+
+        assert [entity["name"] for entity in schema["entities"]] == [
+            "Name",
+            "Pet",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_generate_schema_json(self, tmp_path):
+        """Test that JSON Lines documents can be profiled, not headed."""
+        tmp_jsonl = tmp_path / "people.jsonl"
+        tmp_jsonl.write_text(
+            "".join(
+                json.dumps({"id": i, "home": {"city": f"C{i % 2}"}}) + "\n"
+                for i in range(10)
+            )
+        )
+
+        async with AsyncWhyHow() as client:
+            with pytest.raises(ValueError, match="Only CSVs"):
+                await client.graph.generate_schema([str(tmp_jsonl)])
+
+            schema = json.loads(
+                await client.graph.generate_schema(
+                    [str(tmp_jsonl)], mode="profile"
+                )
+            )
+
+        assert [entity["name"] for entity in schema["entities"]] == [
+            "id",
+            "home.city",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_query_graph_many(self, httpx_mock):
+        """Test that results keep input order and errors stay per item."""
+
+        def callback(request):
+            query = json.loads(request.read())["query"]
+            if query == "bad":
+                return httpx.Response(500)
+            return httpx.Response(
+                200, json={"namespace": "something", "answer": query.upper()}
+            )
+
+        httpx_mock.add_callback(callback, is_reusable=True)
+        queries = ["a", "bad", "c", "d", "e"]
+
+        async with AsyncWhyHow() as client:
+            results = await client.graph.query_graph_many(
+                "something", queries, concurrency=2
+            )
+
+        assert len(results) == len(queries)
+        assert [
+            result.answer
+            for result in results
+            if not isinstance(result, Exception)
+        ] == ["A", "C", "D", "E"]
+        assert isinstance(results[1], httpx.HTTPStatusError)
+        assert len(httpx_mock.get_requests()) == len(queries)
+
+    @pytest.mark.asyncio
+    async def test_identical_queries_coalesced(self, httpx_mock):
+        """Test that identical in-flight queries share one request."""
+
+        async def callback(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(
+                200, json={"namespace": "something", "answer": "ok"}
+            )
+
+        httpx_mock.add_callback(callback, is_reusable=True)
+
+        async with AsyncWhyHow() as client:
+            results = await asyncio.gather(
+                *(client.graph.query_graph("something", "q") for _ in range(5))
+            )
+
+        assert [result.answer for result in results] == ["ok"] * 5
+        assert len({id(result) for result in results}) == 5
+        assert len(httpx_mock.get_requests()) == 1
+
+    @pytest.mark.asyncio
+    async def test_queries_after_invalidation_not_coalesced(
+        self, httpx_mock
+    ):
+        """Test that queries after an invalidation send a new request."""
+        url = "https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com/graphs"
+        answers = iter(["Alice knows Bob", "Alice knows Carol"])
+
+        async def callback(request):
+            answer = next(answers)
+            await asyncio.sleep(0.02)
+            return httpx.Response(
+                200, json={"namespace": "something", "answer": answer}
+            )
+
+        httpx_mock.add_callback(
+            callback, url=f"{url}/something/query", is_reusable=True
+        )
+        httpx_mock.add_response(
+            url=f"{url}/something/create_graph",
+            json={"namespace": "something", "message": "Creating"},
+        )
+
+        async with AsyncWhyHow(cache=QueryCache()) as client:
+            query = "Who does Alice know?"
+            before = asyncio.ensure_future(
+                client.graph.query_graph("something", query)
+            )
+            await asyncio.sleep(0.005)
+            await client.graph.create_graph("something", ["Who?"])
+            after = await client.graph.query_graph("something", query)
+            cached = await client.graph.query_graph("something", query)
+
+        assert (await before).answer == "Alice knows Bob"
+        assert after.answer == cached.answer == "Alice knows Carol"
+        assert len(httpx_mock.get_requests()) == 3
+
+    @pytest.mark.asyncio
+    async def test_iter_query_graph_many_bounded(self, httpx_mock):
+        """Test that no more than `concurrency` requests run at once."""
+        in_flight = 0
+        peak = 0
+
+        async def callback(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(
+                200, json={"namespace": "something", "answer": "ok"}
+            )
+
+        httpx_mock.add_callback(callback, is_reusable=True)
+
+        async with AsyncWhyHow() as client:
+            indices = [
+                index
+                async for index, _ in client.graph.iter_query_graph_many(
+                    "something", (str(i) for i in range(10)), concurrency=3
+                )
+            ]
+
+        assert sorted(indices) == list(range(10))
+        assert peak == 3
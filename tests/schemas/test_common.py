@@ -1,8 +1,22 @@
 """Tests for whyhow.schemas.common."""
 
 import pytest
-
-from whyhow.schemas.common import Entity, Graph, Node, Relationship, Triple
+from pydantic import ValidationError
+
+from whyhow.schemas.common import (
+    Entity,
+    Graph,
+    Node,
+    Relationship,
+    Schema,
+    SchemaEntity,
+    Triple,
+    TriplePattern,
+    entities_to_nodes,
+    graph_to_triples,
+    nodes_to_entities,
+    triples_to_graph,
+)
 
 
 class TestGraph:
@@ -43,6 +57,44 @@ class TestGraph:
         assert graph_implied.nodes == [node_1, node_2]
         assert graph_implied.relationships == [rel]
 
+    def test_implied_nodes_deduplicated(self):
+        """Test that equal nodes are listed once, in order of appearance."""
+        alice = {"labels": ["Person"], "properties": {"name": "Alice"}}
+        bob = {
+            "labels": ["Person"],
+            "properties": {"name": "Bob", "tags": ["x", {"y": 1}]},
+        }
+        graph = Graph.model_validate(
+            {
+                "relationships": [
+                    {"type": "KNOWS", "start_node": alice, "end_node": bob},
+                    {"type": "LIKES", "start_node": bob, "end_node": alice},
+                ]
+            }
+        )
+
+        assert graph.nodes == [Node(**alice), Node(**bob)]
+
+    def test_from_relationships(self):
+        """Test the bulk constructor and its node key."""
+        alice = Node(labels=["Person"], properties={"name": "Alice"})
+        older = Node(labels=["Person"], properties={"name": "Alice", "a": 1})
+        company = Node(labels=["Company"], properties={"name": "Alice"})
+        relationships = [
+            Relationship(type="KNOWS", start_node=alice, end_node=older),
+            Relationship(type="OWNS", start_node=older, end_node=company),
+        ]
+
+        graph = Graph.from_relationships(relationships)
+        by_name = Graph.from_relationships(
+            iter(relationships), node_key="name"
+        )
+
+        assert graph.nodes == [alice, older, company]
+        assert graph == Graph(relationships=relationships)
+        assert by_name.nodes == [alice, company]
+        assert by_name.relationships == relationships
+
 
 class TestEntity:
     """Tests for the Entity class."""
@@ -139,3 +191,250 @@ class TestTriple:
             ValueError, match="End node must have a name property"
         ):
             Triple.from_relationship(rel)
+
+
+class TestSchema:
+    """Tests for the indexed lookups of the Schema class."""
+
+    @pytest.fixture
+    def schema(self):
+        """Create a schema with a few entities and patterns."""
+        return Schema(
+            entities=[
+                {"name": name, "description": ""}
+                for name in ("Person", "City", "Company")
+            ],
+            relations=[
+                {"name": name, "description": ""}
+                for name in ("lives_in", "works_at", "knows")
+            ],
+            patterns=[
+                {
+                    "head": head,
+                    "relation": relation,
+                    "tail": tail,
+                    "description": "",
+                }
+                for head, relation, tail in [
+                    ("Person", "lives_in", "City"),
+                    ("Person", "works_at", "Company"),
+                    ("Person", "knows", "Person"),
+                    ("Company", "lives_in", "City"),
+                ]
+            ],
+        )
+
+    def test_lookups(self, schema):
+        """Test entity, relation and pattern lookups."""
+        assert schema.get_entity("City").name == "City"
+        assert schema.get_entity("Country") is None
+        assert schema.get_relation("knows").name == "knows"
+        assert [p.relation for p in schema.patterns_from("Person")] == [
+            "lives_in",
+            "works_at",
+            "knows",
+        ]
+        assert [p.head for p in schema.patterns_to("City")] == [
+            "Person",
+            "Company",
+        ]
+        assert len(schema.patterns_with("lives_in")) == 2
+        assert [
+            p.relation for p in schema.patterns_between("Person", "Company")
+        ] == ["works_at"]
+        assert schema.patterns_between("City", "Person") == []
+
+    def test_indexes_follow_changes(self, schema):
+        """Test that appends, replacements and renames are picked up."""
+        assert schema.get_entity("Country") is None
+
+        schema.entities.append(SchemaEntity(name="Country", description=""))
+        assert schema.get_entity("Country").name == "Country"
+
+        schema.get_entity("City").name = "Town"
+        assert schema.get_entity("City") is None
+        assert schema.get_entity("Town").name == "Town"
+
+        schema.patterns = [
+            TriplePattern(
+                head="City", relation="in", tail="Country", description=""
+            )
+        ]
+        assert schema.patterns_from("Person") == []
+        assert len(schema.patterns_from("City")) == 1
+
+        schema.entities[0] = SchemaEntity(name="Human", description="")
+        assert schema.get_entity("Human").name == "Human"
+        assert schema.get_entity("Person") is None
+
+        schema.patterns += [
+            TriplePattern(
+                head="City", relation="in", tail="Town", description=""
+            )
+        ]
+        assert [p.tail for p in schema.patterns_from("City")] == [
+            "Country",
+            "Town",
+        ]
+
+    def test_same_length_changes(self, schema):
+        """Test that changes keeping the length of a list are picked up."""
+        country = SchemaEntity(name="Country", description="")
+        assert schema.get_entity("Company") is not None
+
+        schema.entities.pop()
+        schema.entities.append(country)
+        assert schema.get_entity("Country") is country
+        assert schema.get_entity("Company") is None
+
+        pattern = TriplePattern(
+            head="City", relation="in", tail="Country", description=""
+        )
+        assert len(schema.patterns_from("Person")) == 3
+        schema.patterns[0] = pattern
+        assert len(schema.patterns_from("Person")) == 2
+        assert schema.patterns_from("City") == [pattern]
+
+        schema.patterns.reverse()
+        assert [p.relation for p in schema.patterns_from("Person")] == [
+            "knows",
+            "works_at",
+        ]
+
+    def test_builder_loop_keeps_index(self):
+        """Test that appending after lookups updates the index in place."""
+        schema = Schema()
+        schema.get_entity("Person")
+        index = schema.entities._indexes["name"]
+
+        for i in range(1000):
+            name = f"Entity {i % 500}"
+            if schema.get_entity(name) is None:
+                schema.entities.append(
+                    SchemaEntity(name=name, description="")
+                )
+
+        assert len(schema.entities) == 500
+        assert schema.entities._indexes["name"] is index
+        assert schema.get_entity("Entity 499") is schema.entities[-1]
+
+    def test_rename_found_under_new_name(self, schema):
+        """Test that a renamed item is found by its new name."""
+        assert schema.get_entity("City") is not None
+        assert [p.head for p in schema.patterns_to("City")] == [
+            "Person",
+            "Company",
+        ]
+
+        schema.entities[1].name = "Town"
+        schema.patterns[3].tail = "Town"
+
+        assert schema.get_entity("Town") is schema.entities[1]
+        assert [p.head for p in schema.patterns_to("Town")] == ["Company"]
+        assert [p.head for p in schema.patterns_to("City")] == ["Person"]
+
+    def test_indexes_ignored_in_equality(self, schema):
+        """Test that lookups do not change the equality of copies."""
+        other = schema.model_copy(deep=True)
+        assert schema == other
+
+        schema.get_entity("City")
+        schema.patterns_from("Person")
+
+        assert schema == other
+        assert other == schema
+
+        other.entities[0].name = "Human"
+        assert schema != other
+        assert schema.get_entity("Person") is not None
+        assert other.get_entity("Human") is other.entities[0]
+
+
+class TestBulkConversion:
+    """Tests for the bulk conversion functions."""
+
+    @pytest.fixture
+    def triples(self):
+        """Create triples sharing their nodes."""
+        return [
+            Triple(
+                head=head,
+                head_type="Person",
+                relationship="knows",
+                tail=tail,
+                tail_type="Person",
+                properties={"since": i},
+            )
+            for i, (head, tail) in enumerate(
+                [("Alice", "Bob"), ("Bob", "Alice"), ("Alice", "Carol")]
+            )
+        ]
+
+    def test_triples_round_trip(self, triples):
+        """Test that results match the per-object methods."""
+        graph = triples_to_graph(triples)
+
+        assert graph == Graph(
+            relationships=[triple.to_relationship() for triple in triples]
+        )
+        assert graph.relationships[0].start_node is graph.nodes[0]
+        assert graph.relationships[1].end_node is graph.nodes[0]
+        assert graph_to_triples(graph) == triples
+
+    def test_unnamed_node(self):
+        """Test that nodes without a name cannot become triples."""
+        node = Node(labels=["Person"], properties={})
+        graph = Graph(
+            relationships=[
+                Relationship(type="knows", start_node=node, end_node=node)
+            ]
+        )
+
+        with pytest.raises(ValueError, match="Start node"):
+            graph_to_triples(graph)
+
+    def test_entities_and_nodes(self):
+        """Test that equal entities share a node and back."""
+        entities = [
+            Entity(text="Alice", label="Person", properties={"age": 30}),
+            Entity(text="Bob", label="Person"),
+            Entity(text="Alice", label="Person", properties={"age": 30}),
+        ]
+
+        nodes = entities_to_nodes(entities)
+
+        assert nodes == [entity.to_node() for entity in entities]
+        assert nodes[0] is nodes[2]
+        assert nodes_to_entities(nodes) == entities
+
+    def test_outputs_behave_as_validated(self, triples):
+        """Test that unvalidated outputs match validated models."""
+        graph = triples_to_graph(triples)
+        converted = graph_to_triples(graph)
+        entities = nodes_to_entities(graph.nodes)
+
+        assert [t.model_dump() for t in converted] == [
+            Triple.from_relationship(r).model_dump()
+            for r in graph.relationships
+        ]
+        assert converted[0].model_fields_set == set(Triple.model_fields)
+        assert entities[0] == Entity.from_node(graph.nodes[0])
+        assert entities[0].properties is not graph.nodes[0].properties
+        for triple, relationship in zip(converted, graph.relationships):
+            assert triple.properties is not relationship.properties
+
+    def test_invalid_names(self):
+        """Test that names of the wrong type fail as in the methods."""
+        node = Node(labels=["Person"], properties={"name": 5})
+        graph = Graph(
+            relationships=[
+                Relationship(type="knows", start_node=node, end_node=node)
+            ]
+        )
+
+        with pytest.raises(ValidationError):
+            Triple.from_relationship(graph.relationships[0])
+        with pytest.raises(ValidationError):
+            graph_to_triples(graph)
+        with pytest.raises(ValidationError):
+            nodes_to_entities(graph.nodes)
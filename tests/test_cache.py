@@ -0,0 +1,388 @@
+"""Tests for the cache module."""
+
+import multiprocessing
+import os
+import sqlite3
+
+import pytest
+
+from whyhow.cache import (
+    QueryCache,
+    SchemaCache,
+    SQLiteQueryCache,
+    make_key,
+)
+from whyhow.schemas.graph import (
+    QueryGraphRequest,
+    QueryGraphResponse,
+    SpecificQueryGraphRequest,
+    SpecificQueryGraphResponse,
+)
+
+
+def _response(answer):
+    return QueryGraphResponse(namespace="ns", answer=answer)
+
+
+class TestMakeKey:
+    """Tests for the `make_key` function."""
+
+    def test_query_normalized(self):
+        """Test that whitespace and case do not change the key."""
+        key_1 = make_key("ns", "query", QueryGraphRequest(query="Who is X?"))
+        key_2 = make_key(
+            "ns", "query", QueryGraphRequest(query="  who  is x? ")
+        )
+
+        assert key_1 == key_2
+
+    def test_flags_and_namespace_distinguish(self):
+        """Test that flags and namespace are part of the key."""
+        request = QueryGraphRequest(query="q")
+
+        assert make_key("ns", "query", request) != make_key(
+            "other", "query", request
+        )
+        assert make_key("ns", "query", request) != make_key(
+            "ns", "query", QueryGraphRequest(query="q", include_triples=True)
+        )
+
+    def test_specific_order_insensitive(self):
+        """Test that entity and relation order does not matter."""
+        key_1 = make_key(
+            "ns",
+            "specific_query",
+            SpecificQueryGraphRequest(query="q", entities=["a", "b"]),
+        )
+        key_2 = make_key(
+            "ns",
+            "specific_query",
+            SpecificQueryGraphRequest(query="q", entities=["b", "a"]),
+        )
+
+        assert key_1 == key_2
+
+
+class TestQueryCache:
+    """Tests for the `QueryCache` class."""
+
+    def test_hit_and_miss(self):
+        """Test that counters track lookups."""
+        cache = QueryCache()
+        key = make_key("ns", "query", QueryGraphRequest(query="q"))
+
+        assert cache.get(key) is None
+        cache.set(key, _response("a"))
+
+        assert cache.get(key) == _response("a")
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_returns_copy(self):
+        """Test that mutating a returned response leaves the cache intact."""
+        cache = QueryCache()
+        key = make_key("ns", "query", QueryGraphRequest(query="q"))
+        cache.set(key, _response("a"))
+
+        cache.get(key).answer = "mutated"
+
+        assert cache.get(key).answer == "a"
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = QueryCache(maxsize=2)
+        keys = [
+            make_key("ns", "query", QueryGraphRequest(query=q)) for q in "abc"
+        ]
+        cache.set(keys[0], _response("a"))
+        cache.set(keys[1], _response("b"))
+        cache.get(keys[0])
+        cache.set(keys[2], _response("c"))
+
+        assert len(cache) == 2
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+
+    def test_ttl(self, monkeypatch):
+        """Test that entries expire after the TTL."""
+        now = [1000.0]
+        monkeypatch.setattr("whyhow.cache.time.monotonic", lambda: now[0])
+        cache = QueryCache(ttl=10)
+        key = make_key("ns", "query", QueryGraphRequest(query="q"))
+        cache.set(key, _response("a"))
+
+        now[0] += 5
+        assert cache.get(key) is not None
+
+        now[0] += 10
+        assert cache.get(key) is None
+        assert len(cache) == 0
+
+    def test_invalidate(self):
+        """Test that invalidation only drops the given namespace."""
+        cache = QueryCache()
+        key_1 = make_key("ns", "query", QueryGraphRequest(query="q"))
+        key_2 = make_key("other", "query", QueryGraphRequest(query="q"))
+        cache.set(key_1, _response("a"))
+        cache.set(key_2, _response("b"))
+
+        cache.invalidate("ns")
+
+        assert cache.get(key_1) is None
+        assert cache.get(key_2) is not None
+
+    def test_keeps_request(self):
+        """Test that the original request is stored with the response."""
+        cache = QueryCache()
+        request = QueryGraphRequest(query="Who is  X?")
+        key = make_key("ns", "query", request)
+
+        assert cache.get_request(key) is None
+        cache.set(key, _response("a"), request)
+        cache.set(key, _response("b"))
+
+        assert cache.get_request(key) == request
+        assert cache.get_request(key) is not request
+
+    def test_maxsize_validated(self):
+        """Test that an empty cache cannot be configured."""
+        with pytest.raises(ValueError, match="maxsize"):
+            QueryCache(maxsize=0)
+
+
+def _write_entries(path, worker, count):
+    cache = SQLiteQueryCache(path)
+    for i in range(count):
+        key = make_key("ns", "query", QueryGraphRequest(query=f"{worker}-{i}"))
+        cache.set(key, _response(f"{worker}-{i}"))
+
+
+class TestSQLiteQueryCache:
+    """Tests for the `SQLiteQueryCache` class."""
+
+    def test_roundtrip_across_instances(self, tmp_path):
+        """Test that entries persist and keep their response type."""
+        path = tmp_path / "cache.sqlite"
+        query_key = make_key("ns", "query", QueryGraphRequest(query="q"))
+        specific_key = make_key(
+            "ns",
+            "specific_query",
+            SpecificQueryGraphRequest(query="q", entities=["Alice"]),
+        )
+        specific = SpecificQueryGraphResponse(
+            namespace="ns", answer="b", triples=[{"head": "Alice"}]
+        )
+
+        cache = SQLiteQueryCache(path)
+        cache.set(query_key, _response("a"))
+        cache.set(specific_key, specific)
+
+        reopened = SQLiteQueryCache(path)
+        assert reopened.get(query_key) == _response("a")
+        assert reopened.get(specific_key) == specific
+        assert reopened.hits == 2
+
+    def test_keeps_request(self, tmp_path):
+        """Test that requests are stored, also in databases without them."""
+        path = tmp_path / "cache.sqlite"
+        connection = sqlite3.connect(path)
+        connection.execute("""
+            CREATE TABLE responses (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+        connection.close()
+        request = SpecificQueryGraphRequest(
+            query="Who is Alice?", entities=["Alice"]
+        )
+        key = make_key("ns", "specific_query", request)
+
+        SQLiteQueryCache(path).set(key, _response("a"), request)
+        reopened = SQLiteQueryCache(path)
+
+        assert reopened.get_request(key) == request
+        reopened.set(key, _response("b"))
+        assert reopened.get_request(key) == request
+
+    def test_ttl(self, tmp_path, monkeypatch):
+        """Test that expired entries are misses, deleted by the next set."""
+        now = [1000.0]
+        monkeypatch.setattr("whyhow.cache.time.time", lambda: now[0])
+        cache = SQLiteQueryCache(tmp_path / "cache.sqlite", ttl=10)
+        key = make_key("ns", "query", QueryGraphRequest(query="q"))
+        other = make_key("ns", "query", QueryGraphRequest(query="other"))
+        cache.set(key, _response("a"))
+
+        now[0] += 11
+
+        assert cache.get(key) is None
+        assert len(cache) == 1
+
+        cache.set(other, _response("b"))
+
+        assert len(cache) == 1
+        assert cache.total_bytes == len(_response("b").model_dump_json())
+
+    def test_max_bytes_lru(self, tmp_path, monkeypatch):
+        """Test that the least recently used entries are evicted."""
+        now = [1000.0]
+        monkeypatch.setattr("whyhow.cache.time.time", lambda: now[0])
+        size = len(_response("x").model_dump_json())
+        cache = SQLiteQueryCache(
+            tmp_path / "cache.sqlite",
+            max_bytes=size * 2,
+            ttl=None,
+            access_interval=0,
+        )
+        keys = [
+            make_key("ns", "query", QueryGraphRequest(query=q)) for q in "abc"
+        ]
+        for key, answer in zip(keys[:2], "ab"):
+            now[0] += 1
+            cache.set(key, _response(answer))
+
+        now[0] += 1
+        cache.get(keys[0])
+        now[0] += 1
+        cache.set(keys[2], _response("c"))
+
+        assert cache.total_bytes <= size * 2
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[2]) is not None
+
+    def test_oversized_value_drops_entry(self, tmp_path):
+        """Test that a value over the budget replaces the entry by nothing."""
+        size = len(_response("x").model_dump_json())
+        cache = SQLiteQueryCache(tmp_path / "cache.sqlite", max_bytes=size)
+        key = make_key("ns", "query", QueryGraphRequest(query="a"))
+        cache.set(key, _response("x"))
+
+        cache.set(key, _response("x" * size))
+
+        assert cache.get(key) is None
+        assert len(cache) == 0
+
+    def test_hits_do_not_write(self, tmp_path, monkeypatch):
+        """Test that hits are written once per access interval."""
+        now = [1000.0]
+        monkeypatch.setattr("whyhow.cache.time.time", lambda: now[0])
+        cache = SQLiteQueryCache(tmp_path / "cache.sqlite", ttl=None)
+        keys = [
+            make_key("ns", "query", QueryGraphRequest(query=q)) for q in "ab"
+        ]
+        cache.set(keys[0], _response("a"))
+        cache.set(keys[1], _response("b"))
+        changes = cache._connection().total_changes
+
+        for _ in range(3):
+            now[0] += 1
+            assert cache.get(keys[1]) is not None
+        assert cache.get(keys[0]) is not None
+
+        assert cache._connection().total_changes == changes
+        assert cache.hits == 4
+
+        now[0] += 60
+        cache.get(keys[0])
+
+        assert cache._connection().total_changes == changes + 2
+        assert cache.top_keys(2) == [keys[1], keys[0]]
+
+    def test_invalidate(self, tmp_path):
+        """Test that invalidation only drops the given namespace."""
+        cache = SQLiteQueryCache(tmp_path / "cache.sqlite")
+        key_1 = make_key("ns", "query", QueryGraphRequest(query="q"))
+        key_2 = make_key("other", "query", QueryGraphRequest(query="q"))
+        cache.set(key_1, _response("a"))
+        cache.set(key_2, _response("b"))
+
+        cache.invalidate("ns")
+
+        assert cache.get(key_1) is None
+        assert cache.get(key_2) is not None
+
+    def test_concurrent_processes(self, tmp_path):
+        """Test that several processes can write to the same cache."""
+        path = tmp_path / "cache.sqlite"
+        SQLiteQueryCache(path)
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_write_entries, args=(path, worker, 20))
+            for worker in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert all(process.exitcode == 0 for process in processes)
+        assert len(SQLiteQueryCache(path)) == 60
+
+
+class TestSchemaCache:
+    """Tests for the `SchemaCache` class."""
+
+    def test_keyed_by_content(self, tmp_path, monkeypatch):
+        """Test that files are hashed once and copies share values."""
+        original = tmp_path / "schema.json"
+        copy = tmp_path / "copy.json"
+        original.write_text("{}")
+        copy.write_text("{}")
+        hashed = []
+        monkeypatch.setattr(
+            "whyhow.cache.hash_file",
+            lambda path: hashed.append(path) or "digest",
+        )
+        cache = SchemaCache()
+        compiled = []
+
+        for path in (original, original, copy):
+            cache.get_or_compile(
+                ("schema", cache.digest(path)),
+                lambda: compiled.append(path) or len(compiled),
+            )
+
+        assert len(hashed) == 2
+        assert compiled == [original]
+        assert (cache.hits, cache.misses) == (2, 1)
+
+    def test_change_is_detected(self, tmp_path):
+        """Test that a changed size or mtime leads to a new digest."""
+        path = tmp_path / "schema.json"
+        path.write_text("{}")
+        cache = SchemaCache()
+        digest = cache.digest(path)
+
+        path.write_text('{"a": 1}')
+        os.utime(path, ns=(0, 0))
+
+        assert cache.digest(path) != digest
+
+    def test_lru_eviction(self):
+        """Test that the least recently used value is evicted."""
+        cache = SchemaCache(maxsize=2)
+        cache.get_or_compile("a", lambda: 1)
+        cache.get_or_compile("b", lambda: 2)
+        cache.get_or_compile("a", lambda: 1)
+        cache.get_or_compile("c", lambda: 3)
+
+        assert len(cache) == 2
+        assert cache.get_or_compile("b", lambda: 4) == 4
+
+    def test_errors_not_cached(self):
+        """Test that a failed compilation is retried."""
+        cache = SchemaCache()
+
+        def fail():
+            raise ValueError("invalid schema")
+
+        with pytest.raises(ValueError):
+            cache.get_or_compile("a", fail)
+        assert cache.get_or_compile("a", lambda: 1) == 1
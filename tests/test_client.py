@@ -5,7 +5,8 @@ from unittest.mock import Mock
 import pytest
 from httpx import Client
 
-from whyhow.client import WhyHow
+from whyhow.apis.graph import AsyncGraphAPI
+from whyhow.client import AsyncWhyHow, WhyHow
 
 
 class TestWhyHow:
@@ -41,6 +42,18 @@ class TestWhyHow:
 
         assert client.httpx_client is fake_httpx_client_class.return_value
 
+    def test_limits_sized_to_max_workers(self, monkeypatch):
+        """Test that the connection pool grows with the worker count."""
+        fake_httpx_client_class = Mock(return_value=Mock(spec=Client))
+        monkeypatch.setattr("whyhow.client.Client", fake_httpx_client_class)
+
+        client = WhyHow(api_key="key", max_workers=64)
+
+        _, kwargs = fake_httpx_client_class.call_args
+        assert kwargs["limits"].max_connections == 100
+        assert kwargs["limits"].max_keepalive_connections == 64
+        assert client.graph.max_workers == 64
+
     def test_base_url_twice(self):
         """Test that an error raised when base_url is set twice."""
         with pytest.raises(
@@ -50,3 +63,34 @@ class TestWhyHow:
                 api_key="key",
                 httpx_kwargs={"base_url": "https://example.com"},
             )
+
+
+class TestAsyncWhyHow:
+    """Tests for the AsyncWhyHow class."""
+
+    def test_graph_attached(self, monkeypatch):
+        """Test that the async graph API shares the async httpx client."""
+        monkeypatch.setenv("OPENAI_API_KEY", "key")
+        monkeypatch.setenv("PINECONE_API_KEY", "key")
+        monkeypatch.setenv("NEO4J_USER", "user")
+        monkeypatch.setenv("NEO4J_PASSWORD", "password")
+        monkeypatch.setenv("NEO4J_URL", "url")
+
+        client = AsyncWhyHow(api_key="key")
+
+        assert isinstance(client.graph, AsyncGraphAPI)
+        assert client.graph.client is client.httpx_client
+
+    @pytest.mark.asyncio
+    async def test_context_manager(self, monkeypatch):
+        """Test that leaving the context closes the httpx client."""
+        monkeypatch.setenv("OPENAI_API_KEY", "key")
+        monkeypatch.setenv("PINECONE_API_KEY", "key")
+        monkeypatch.setenv("NEO4J_USER", "user")
+        monkeypatch.setenv("NEO4J_PASSWORD", "password")
+        monkeypatch.setenv("NEO4J_URL", "url")
+
+        async with AsyncWhyHow(api_key="key") as client:
+            assert not client.httpx_client.is_closed
+
+        assert client.httpx_client.is_closed
@@ -0,0 +1,126 @@
+"""Tests for the documents module."""
+
+import hashlib
+from pathlib import Path
+
+from whyhow.documents import (
+    MAX_PDFS_PER_UPLOAD,
+    MAX_UPLOAD_BYTES,
+    inspect_document,
+    pack_documents,
+    preflight_documents,
+    sniff_kind,
+)
+
+MB = 1024 * 1024
+
+
+class TestPackDocuments:
+    """Tests for the `pack_documents` function."""
+
+    def test_limits_respected(self):
+        """Test that every batch satisfies the upload limits."""
+        sizes = [5 * MB, 4 * MB, 3 * MB, 2 * MB, 1 * MB, 1 * MB, 1 * MB]
+        documents = [
+            (Path(f"doc{i}.pdf"), size) for i, size in enumerate(sizes)
+        ]
+
+        batches, rejected = pack_documents(documents)
+        size_of = dict(documents)
+
+        assert not rejected
+        assert sorted(p for batch in batches for p in batch) == sorted(size_of)
+        for batch in batches:
+            assert len(batch) <= MAX_PDFS_PER_UPLOAD
+            assert sum(size_of[p] for p in batch) <= MAX_UPLOAD_BYTES
+
+    def test_first_fit_decreasing(self):
+        """Test that the largest documents are placed first."""
+        documents = [
+            (Path("small.pdf"), 1 * MB),
+            (Path("big.pdf"), 6 * MB),
+            (Path("medium.pdf"), 4 * MB),
+        ]
+
+        batches, _ = pack_documents(documents)
+
+        assert batches == [
+            [Path("big.pdf"), Path("small.pdf")],
+            [Path("medium.pdf")],
+        ]
+
+    def test_csv_alone_and_rejections(self):
+        """Test that CSVs get their own batch and bad files are rejected."""
+        documents = [
+            (Path("a.csv"), 10),
+            (Path("b.pdf"), 10),
+            (Path("c.txt"), 10),
+            (Path("d.pdf"), MAX_UPLOAD_BYTES + 1),
+        ]
+
+        batches, rejected = pack_documents(documents)
+
+        assert [Path("a.csv")] in batches
+        assert [Path("b.pdf")] in batches
+        assert set(rejected) == {"c.txt", "d.pdf"}
+
+
+class TestPreflight:
+    """Tests for the preflight checks."""
+
+    def test_sniff_kind(self):
+        """Test that PDFs and text are told apart from binaries."""
+        assert sniff_kind(b"%PDF-1.7\n") == "pdf"
+        assert sniff_kind(b"\n\n%PDF-1.4") == "pdf"
+        assert sniff_kind("name,city\nZoë,Köln\n".encode()) == "csv"
+        assert sniff_kind("name,city\nZoë,Köln\n".encode("latin-1")) == "csv"
+        assert sniff_kind(b"\x89PNG\r\n\x1a\n\x00") is None
+        assert sniff_kind(b"GIF89a\x01\x00\x01") is None
+        assert sniff_kind(b"\x1f\x8b\x08\x08\x94\x02\x03\x04data") is None
+        assert sniff_kind(b"") is None
+
+    def test_inspect_document(self, tmp_path):
+        """Test that size, digest and kind come from a single pass."""
+        path = tmp_path / "a.pdf"
+        content = b"%PDF-1.4" + b"x" * 100
+        path.write_bytes(content)
+
+        info = inspect_document(path, chunk_size=16)
+
+        assert info.error is None
+        assert info.kind == "pdf"
+        assert info.size == len(content)
+        assert info.sha256 == hashlib.sha256(content).hexdigest()
+        assert inspect_document(path, compute_hash=False).sha256 is None
+
+    def test_non_utf8_csv(self, tmp_path):
+        """Test that CSVs in other encodings pass like in add_documents."""
+        path = tmp_path / "people.csv"
+        path.write_bytes("name,city\nZoë,Köln\n".encode("latin-1"))
+
+        info = inspect_document(path)
+
+        assert info.error is None
+        assert info.kind == "csv"
+
+    def test_preflight_documents(self, tmp_path):
+        """Test that every document is reported, in input order."""
+        (tmp_path / "a.csv").write_bytes(b"a,b\n1,2\n")
+        (tmp_path / "b.pdf").write_bytes(b"not a pdf")
+        (tmp_path / "c.csv").write_bytes(b"")
+        (tmp_path / "d.txt").write_bytes(b"text")
+        documents = [
+            str(tmp_path / name)
+            for name in ["a.csv", "b.pdf", "c.csv", "d.txt", "e.pdf"]
+        ]
+
+        report = preflight_documents(documents, max_workers=2)
+
+        assert [info.path for info in report.documents] == documents
+        assert [info.path for info in report.valid] == documents[:1]
+        assert [info.error for info in report.invalid] == [
+            "Content does not match the .pdf extension",
+            "Document is empty",
+            "Only PDFs and CSVs are supported",
+            "Document does not exist",
+        ]
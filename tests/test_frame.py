@@ -0,0 +1,145 @@
+"""Tests for the frame module."""
+
+import pytest
+
+from whyhow.frame import GraphFrame
+from whyhow.schemas.common import Graph, Node, Relationship, Triple
+from whyhow.schemas.graph import (
+    GetGraphResponse,
+    QueryGraphResponse,
+    SpecificQueryGraphResponse,
+)
+
+ALICE = Node(labels=["Person"], properties={"name": "Alice", "age": 30})
+BOB = Node(labels=["Person"], properties={"name": "Bob"})
+ACME = Node(labels=["Company"], properties={"name": "Acme"})
+ANONYMOUS = Node(labels=["Person"], properties={"id": 7})
+
+GRAPH = Graph(
+    relationships=[
+        Relationship(
+            type="KNOWS",
+            start_node=ALICE,
+            end_node=BOB,
+            properties={"since": 2020},
+        ),
+        Relationship(type="WORKS_AT", start_node=BOB, end_node=ACME),
+        Relationship(type="WORKS_AT", start_node=ALICE, end_node=ACME),
+    ],
+    nodes=[ALICE, BOB, ACME, ANONYMOUS],
+)
+
+
+class TestGraphFrame:
+    """Tests for the `GraphFrame` class."""
+
+    def test_columns(self):
+        """Test that strings are interned and properties are sparse."""
+        frame = GraphFrame.from_graph(GRAPH)
+
+        assert (frame.num_nodes, frame.num_edges) == (4, 3)
+        assert frame.strings.values == [
+            "Alice",
+            "Bob",
+            "Acme",
+            "KNOWS",
+            "WORKS_AT",
+        ]
+        assert frame.label_sets.values == [("Person",), ("Company",)]
+        assert list(frame.node_labels) == [0, 0, 1, 0]
+        assert list(frame.node_names) == [0, 1, 2, -1]
+        assert list(frame.edge_starts) == [0, 1, 0]
+        assert list(frame.edge_ends) == [1, 2, 2]
+        assert frame.node_properties == {"age": {0: 30}, "id": {3: 7}}
+        assert frame.edge_properties == {"since": {0: 2020}}
+
+    def test_graph_round_trip(self):
+        """Test that converting back gives an equal graph."""
+        assert GraphFrame.from_graph(GRAPH).to_graph() == GRAPH
+        assert GraphFrame.from_relationships(
+            GRAPH.relationships
+        ).to_graph() == Graph.from_relationships(GRAPH.relationships)
+
+    def test_triples(self):
+        """Test the conversion to and from triples."""
+        triples = [
+            Triple.from_relationship(rel) for rel in GRAPH.relationships
+        ]
+        frame = GraphFrame.from_triples(triples)
+
+        assert frame.num_nodes == 3
+        assert frame.to_triples() == triples
+
+    def test_responses(self):
+        """Test frames built from query and graph responses."""
+        query = QueryGraphResponse(
+            namespace="ns",
+            answer="",
+            triples=[
+                {"head": "Alice", "relation": "knows", "tail": "Bob"},
+                {"head": "Bob", "relation": "knows", "tail": "Alice"},
+            ],
+        )
+        specific = SpecificQueryGraphResponse(
+            namespace="ns",
+            answer="",
+            triples=[
+                {
+                    "head": "Alice",
+                    "head_type": "Person",
+                    "relation": "knows",
+                    "tail": "Bob",
+                }
+            ],
+        )
+
+        frame = GraphFrame.from_response(query)
+        assert frame.num_nodes == 2
+        assert frame.get_node(0).labels == ["Entity"]
+        assert frame.to_query_triples() == query.triples
+        assert GraphFrame.from_response(specific).get_node(0).labels == [
+            "Person"
+        ]
+        assert (
+            GraphFrame.from_response(
+                GetGraphResponse(
+                    namespace="ns",
+                    status="success",
+                    documents=[],
+                    graph=GRAPH,
+                )
+            ).to_graph()
+            == GRAPH
+        )
+
+    def test_node_key(self):
+        """Test that a node key merges nodes with the same name."""
+        older = Node(labels=["Person"], properties={"name": "Bob", "a": 1})
+        frame = GraphFrame(node_key="name")
+
+        assert frame.add_node(BOB.labels, BOB.properties) == frame.add_node(
+            older.labels, older.properties
+        )
+
+    def test_errors(self):
+        """Test invalid edges and unnamed nodes."""
+        frame = GraphFrame()
+        row = frame.add_node(ANONYMOUS.labels, ANONYMOUS.properties)
+
+        with pytest.raises(ValueError, match="existing nodes"):
+            frame.add_edge("KNOWS", row, 1)
+
+        frame.add_edge("KNOWS", row, row)
+        with pytest.raises(ValueError, match="must have a name"):
+            frame.to_triples()
+
+    def test_invalid_response_triple(self):
+        """Test that dict triples without head, relation or tail fail."""
+        response = SpecificQueryGraphResponse(
+            namespace="something",
+            answer="",
+            triples=[{"head": "Alice", "tail": "Bob"}],
+        )
+
+        with pytest.raises(ValueError, match="has no relation"):
+            GraphFrame.from_response(response)
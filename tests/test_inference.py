@@ -0,0 +1,299 @@
+"""Tests for the inference module."""
+
+import json
+
+import pytest
+
+from whyhow.inference import (
+    DistinctCounter,
+    classify_value,
+    find_join_columns,
+    flatten_record,
+    header_schema,
+    infer_schema,
+    iter_json_records,
+    merge_schemas,
+    profile_csv,
+    profile_documents,
+    profile_json,
+)
+
+RECORDS = [
+    {
+        "id": i,
+        "address": {"city": ["Paris", "Rome"][i % 2], "zip": f"{1000 + i}"},
+        "languages": ["en", "fr"][: 1 + i % 2],
+        "vip": i % 3 == 0,
+        "nickname": None if i % 4 else f"N{i}",
+    }
+    for i in range(40)
+]
+
+
+@pytest.fixture
+def people_csv(tmp_path):
+    """Create a CSV with key, categorical, numeric and free-text columns."""
+    path = tmp_path / "people.csv"
+    lines = ["Name,City,Age,Joined,Bio,Notes,"]
+    for i in range(200):
+        city = ["Paris", "Rome", "Oslo"][i % 3]
+        notes = "vip" if i % 10 == 0 else ""
+        lines.append(
+            f"Person {i},{city},{20 + i % 50},2024-01-{1 + i % 28:02d},"
+            f'"Bio number {i}",{notes},'
+        )
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.fixture
+def shop_csvs(tmp_path):
+    """Create related customer, order and product tables."""
+    customers = tmp_path / "customers.csv"
+    customers.write_text(
+        "customer_id,Country,Email\n"
+        + "".join(
+            f"{i},{['FR', 'IT'][i % 2]},c{i}@example.com\n" for i in range(40)
+        )
+    )
+    products = tmp_path / "products.csv"
+    products.write_text(
+        "product,Country,Price\n"
+        + "".join(f"P{i},{['FR', 'DE'][i % 2]},{i}.5\n" for i in range(30))
+    )
+    orders = tmp_path / "orders.csv"
+    orders.write_text(
+        "order_id,customer_id,product,Total\n"
+        + "".join(f"{i},{i % 40},P{i % 30},{i}.0\n" for i in range(300))
+    )
+    return [customers, products, orders]
+
+
+class TestClassifyValue:
+    """Tests for the `classify_value` function."""
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("", "empty"),
+            (" N/A ", "empty"),
+            ("yes", "boolean"),
+            ("42", "integer"),
+            ("-1,234", "integer"),
+            ("$406.00", "float"),
+            ("2024-02-29", "date"),
+            ("2024-02-30", "string"),
+            ("Paris", "string"),
+            ("$", "string"),
+        ],
+    )
+    def test_types(self, value, expected):
+        """Test the narrowest type of single values."""
+        assert classify_value(value) == expected
+
+
+class TestDistinctCounter:
+    """Tests for the `DistinctCounter` class."""
+
+    def test_exact_then_estimated(self):
+        """Test that counts are exact below k and close above."""
+        counter = DistinctCounter(k=256)
+        for i in range(100):
+            counter.add(str(i % 50))
+        assert len(counter) == 50
+
+        for i in range(20_000):
+            counter.add(str(i))
+        assert 16_000 < len(counter) < 24_000
+
+
+class TestProfileCSV:
+    """Tests for the `profile_csv` function."""
+
+    def test_profile(self, people_csv):
+        """Test the statistics of every named column."""
+        profile = profile_csv(people_csv)
+
+        assert profile.rows == profile.profiled_rows == 200
+        assert [column.name for column in profile.columns] == [
+            "Name",
+            "City",
+            "Age",
+            "Joined",
+            "Bio",
+            "Notes",
+        ]
+        city = profile.get_column("City")
+        assert (city.type, city.distinct, city.null_ratio) == (
+            "string",
+            3,
+            0.0,
+        )
+        assert profile.get_column("Age").type == "integer"
+        assert profile.get_column("Joined").type == "date"
+        assert profile.get_column("Notes").null_ratio == 0.9
+
+    def test_reservoir_sample(self, people_csv):
+        """Test that a sample profiles fewer rows but counts all of them."""
+        profile = profile_csv(people_csv, sample_size=50)
+
+        assert profile.rows == 200
+        assert profile.profiled_rows == 50
+        assert profile == profile_csv(people_csv, sample_size=50)
+
+
+class TestInferSchema:
+    """Tests for the `infer_schema` function."""
+
+    def test_entities_and_properties(self, people_csv):
+        """Test that only repeated text columns become entities."""
+        schema = infer_schema(profile_csv(people_csv))
+
+        key, *others = schema["entities"]
+        assert key["name"] == "Name"
+        assert key["property_columns"] == ["Age", "Joined", "Bio"]
+        assert [entity["name"] for entity in others] == ["City", "Notes"]
+        assert [pattern["relation"] for pattern in schema["patterns"]] == [
+            "has_city",
+            "has_notes",
+        ]
+
+    def test_header_schema_keeps_dots(self):
+        """Test that header mode names relations after the raw columns."""
+        schema = header_schema(["Name", "Home City", "a.b"])
+
+        assert [pattern["relation"] for pattern in schema["patterns"]] == [
+            "has_home_city",
+            "has_a.b",
+        ]
+
+
+class TestMergeSchemas:
+    """Tests for the multi-document schema functions."""
+
+    def test_join_columns(self, shop_csvs):
+        """Test that shared key columns are detected as joins."""
+        profiles = profile_documents(shop_csvs, max_workers=1)
+
+        assert find_join_columns(profiles) == ["customer_id", "product"]
+
+    def test_merge(self, shop_csvs):
+        """Test that entities are unified and documents linked."""
+        schema = merge_schemas(profile_documents(shop_csvs, max_workers=1))
+
+        assert [entity.name for entity in schema.entities] == [
+            "customer_id",
+            "Country",
+            "product",
+            "order_id",
+        ]
+        assert schema.get_entity("customer_id").property_columns == [
+            "Email"
+        ]
+        assert schema.get_entity("order_id").property_columns == ["Total"]
+        assert [
+            (pattern.head, pattern.relation, pattern.tail)
+            for pattern in schema.patterns
+        ] == [
+            ("customer_id", "has_country", "Country"),
+            ("product", "has_country", "Country"),
+            ("order_id", "has_product", "product"),
+            ("order_id", "has_customer_id", "customer_id"),
+        ]
+        assert [relation.name for relation in schema.relations] == [
+            "has_country",
+            "has_product",
+            "has_customer_id",
+        ]
+
+    def test_process_pool_is_deterministic(self, shop_csvs):
+        """Test that the pool returns the same result as a serial run."""
+        serial = profile_documents(shop_csvs, max_workers=1)
+
+        assert profile_documents(shop_csvs, max_workers=3) == serial
+
+
+class TestJSONRecords:
+    """Tests for the JSON record stream functions."""
+
+    @pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+    def test_iter_records(self, tmp_path, suffix):
+        """Test that records are parsed across chunk boundaries."""
+        path = tmp_path / f"records{suffix}"
+        if suffix == ".json":
+            path.write_text(json.dumps(RECORDS, indent=2))
+        else:
+            path.write_text("\n".join(json.dumps(r) for r in RECORDS))
+
+        assert list(iter_json_records(path, chunk_size=7)) == RECORDS
+
+    @pytest.mark.parametrize(
+        "content, error",
+        [
+            ('[{"a": 1} {"b": 2}]', "expected ','"),
+            ('[{"a": 1},', "unterminated"),
+            ("[1, 2]", "must be JSON objects"),
+            ('{"a": ', "invalid JSON"),
+        ],
+    )
+    def test_invalid(self, tmp_path, content, error):
+        """Test that malformed documents raise a ValueError."""
+        path = tmp_path / "bad.json"
+        path.write_text(content)
+
+        with pytest.raises(ValueError, match=error):
+            list(iter_json_records(path))
+
+    def test_error_offset(self, tmp_path):
+        """Test that errors give their offset and bad files are not read."""
+        path = tmp_path / "bad.jsonl"
+        path.write_text('{"a": 1}\n{"b": x}\n')
+
+        with pytest.raises(ValueError, match="at character 15"):
+            list(iter_json_records(path))
+
+        path.write_text('{"a": 1}\n{"b": "' + "x" * 10_000 + '"}\n')
+        records = iter_json_records(path, chunk_size=16, max_record_size=100)
+
+        assert next(records) == {"a": 1}
+        with pytest.raises(ValueError, match="longer than 100 characters"):
+            next(records)
+
+    def test_flatten_record(self):
+        """Test that nested values get dotted paths."""
+        assert list(flatten_record(RECORDS[1])) == [
+            ("id", 1),
+            ("address.city", "Rome"),
+            ("address.zip", "1001"),
+            ("languages", "en"),
+            ("languages", "fr"),
+            ("vip", False),
+            ("nickname", None),
+        ]
+
+    def test_profile_and_infer(self, tmp_path):
+        """Test that JSON profiles produce the CSV schema structure."""
+        path = tmp_path / "records.jsonl"
+        path.write_text("\n".join(json.dumps(r) for r in RECORDS))
+
+        profile = profile_json(path)
+        schema = infer_schema(profile)
+
+        assert profile.rows == 40
+        assert profile.get_column("languages").count == 60
+        assert profile.get_column("nickname").null_ratio == 0.75
+        assert profile.get_column("vip").type == "boolean"
+        assert schema["entities"][0]["name"] == "id"
+        assert schema["entities"][0]["property_columns"] == [
+            "address.zip",
+            "vip",
+            "nickname",
+        ]
+        assert [entity["name"] for entity in schema["entities"][1:]] == [
+            "address.city",
+            "languages",
+        ]
+        assert {pattern["relation"] for pattern in schema["patterns"]} == {
+            "has_address_city",
+            "has_languages",
+        }
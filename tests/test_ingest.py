@@ -0,0 +1,117 @@
+"""Tests for the ingest module."""
+
+import httpx
+import pytest
+
+from whyhow.client import WhyHow
+from whyhow.ingest import IngestPipeline, iter_documents
+from whyhow.manifest import DocumentManifest
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """Set the credentials required by the client."""
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+    monkeypatch.setenv("PINECONE_API_KEY", "key")
+    monkeypatch.setenv("NEO4J_USER", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "password")
+    monkeypatch.setenv("NEO4J_URL", "url")
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Create a nested tree of documents."""
+    root = tmp_path / "corpus"
+    for i in range(7):
+        folder = root / f"part{i % 3}" / "pdfs"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"doc{i}.pdf").write_bytes(b"%PDF-1.4 " + bytes([i]) * i)
+    (root / "table.csv").write_text("a,b\n1,2\n")
+    (root / "fake.pdf").write_bytes(b"\x00\x01")
+    (root / "notes.txt").write_text("ignored")
+    return root
+
+
+def _added(request):
+    return httpx.Response(
+        200, json={"namespace": "something", "message": "Added"}
+    )
+
+
+class TestIterDocuments:
+    """Tests for the `iter_documents` function."""
+
+    def test_walk(self, corpus):
+        """Test that supported documents are found in a stable order."""
+        documents = list(iter_documents(corpus))
+
+        assert len(documents) == 9
+        assert documents == list(iter_documents(corpus))
+        assert all(path.suffix in {".pdf", ".csv"} for path in documents)
+
+
+class TestIngestPipeline:
+    """Tests for the `IngestPipeline` class."""
+
+    def test_run_and_resume(self, env, httpx_mock, corpus, tmp_path):
+        """Test that a second run skips everything already uploaded."""
+        httpx_mock.add_callback(_added, is_reusable=True)
+        checkpoint = tmp_path / "checkpoint.sqlite"
+        progress = []
+
+        stats = IngestPipeline(
+            WhyHow().graph,
+            "something",
+            corpus,
+            checkpoint=checkpoint,
+            upload_workers=2,
+            queue_size=2,
+            pack_window=4,
+            progress=progress.append,
+        ).run()
+
+        assert stats.files_uploaded == 8
+        assert list(stats.rejected) == [str(corpus / "fake.pdf")]
+        assert not stats.failed
+        assert stats.bytes_uploaded > 0
+        assert stats.files_per_second > 0
+        assert len(progress) == stats.batches_uploaded
+        assert len(httpx_mock.get_requests()) == stats.batches_uploaded
+        assert len(DocumentManifest(checkpoint)) == 8
+
+        (corpus / "new.pdf").write_bytes(b"%PDF-1.4 new")
+        resumed = IngestPipeline(
+            WhyHow().graph, "something", corpus, checkpoint=checkpoint
+        ).run()
+
+        assert resumed.files_skipped == 8
+        assert resumed.files_uploaded == 1
+
+    def test_retries(self, env, httpx_mock, corpus, tmp_path):
+        """Test that transient failures are retried and others are not."""
+        calls = []
+
+        def flaky(request):
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(503)
+            if b"table.csv" in request.read():
+                return httpx.Response(400)
+            return _added(request)
+
+        httpx_mock.add_callback(flaky, is_reusable=True)
+
+        stats = IngestPipeline(
+            WhyHow().graph,
+            "something",
+            corpus,
+            checkpoint=tmp_path / "checkpoint.sqlite",
+            upload_workers=1,
+            backoff=0.0,
+        ).run()
+
+        assert stats.batches_retried == 1
+        assert [batch.documents for batch in stats.failed] == [
+            [str(corpus / "table.csv")]
+        ]
+        assert stats.files_uploaded == 7
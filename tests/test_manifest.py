@@ -0,0 +1,74 @@
+"""Tests for the manifest module."""
+
+import hashlib
+import os
+
+from whyhow.manifest import DocumentManifest, hash_file
+
+
+def test_hash_file(tmp_path):
+    """Test that the streamed digest matches hashing the whole file."""
+    path = tmp_path / "doc.pdf"
+    content = os.urandom(100_000)
+    path.write_bytes(content)
+
+    assert hash_file(path, chunk_size=4096) == (
+        hashlib.sha256(content).hexdigest()
+    )
+
+
+class TestDocumentManifest:
+    """Tests for the `DocumentManifest` class."""
+
+    def test_record_and_lookup(self, tmp_path):
+        """Test that recorded documents are found per namespace."""
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(b"%PDF-1.4 a")
+        manifest = DocumentManifest(tmp_path / "manifest.sqlite")
+
+        uploaded, sha256 = manifest.lookup("ns", path)
+        assert not uploaded
+
+        manifest.record("ns", path, sha256)
+
+        assert manifest.lookup("ns", path) == (True, sha256)
+        assert not manifest.lookup("other", path)[0]
+
+    def test_fast_path_skips_hashing(self, tmp_path, monkeypatch):
+        """Test that unchanged size and mtime avoid hashing."""
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(b"%PDF-1.4 a")
+        manifest = DocumentManifest(tmp_path / "manifest.sqlite")
+        manifest.record("ns", path)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("hashed")
+
+        monkeypatch.setattr("whyhow.manifest.hash_file", fail)
+
+        assert manifest.lookup("ns", path)[0]
+
+    def test_same_content_elsewhere(self, tmp_path):
+        """Test that a copy of an uploaded document counts as uploaded."""
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(b"%PDF-1.4 a")
+        copy = tmp_path / "copy.pdf"
+        copy.write_bytes(b"%PDF-1.4 a")
+        changed = tmp_path / "changed.pdf"
+        changed.write_bytes(b"%PDF-1.4 b")
+        manifest = DocumentManifest(tmp_path / "manifest.sqlite")
+        manifest.record("ns", path)
+
+        assert manifest.lookup("ns", copy)[0]
+        assert not manifest.lookup("ns", changed)[0]
+
+    def test_forget(self, tmp_path):
+        """Test that a namespace can be forgotten."""
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(b"%PDF-1.4 a")
+        manifest = DocumentManifest(tmp_path / "manifest.sqlite")
+        manifest.record("ns", path)
+
+        manifest.forget("ns")
+
+        assert len(manifest) == 0
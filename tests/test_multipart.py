@@ -0,0 +1,121 @@
+"""Tests for the multipart module."""
+
+import asyncio
+import io
+import mmap
+from email.parser import BytesParser
+
+import pytest
+
+from whyhow.multipart import MultipartEncoder
+
+
+def _parse(encoder, body):
+    message = BytesParser().parsebytes(
+        f"Content-Type: {encoder.headers['Content-Type']}\r\n\r\n".encode()
+        + body
+    )
+    return [
+        (
+            part.get_filename(),
+            part.get_content_type(),
+            part.get_payload(decode=True),
+        )
+        for part in message.get_payload()
+    ]
+
+
+class TestMultipartEncoder:
+    """Tests for the `MultipartEncoder` class."""
+
+    @pytest.fixture
+    def files(self, tmp_path):
+        """Create a PDF spanning several chunks and a small CSV."""
+        pdf = tmp_path / "big.pdf"
+        pdf.write_bytes(b"%PDF-" + bytes(range(256)) * 40)
+        csv = tmp_path / 'we"ird.csv'
+        csv.write_text("a,b\n1,2\n")
+        return [("documents", pdf), ("documents", csv)]
+
+    def test_sync_body(self, files):
+        """Test that the streamed body is valid multipart data."""
+        progress = []
+        encoder = MultipartEncoder(
+            files,
+            chunk_size=1024,
+            progress=lambda sent, total: progress.append((sent, total)),
+        )
+
+        chunks = list(encoder.iter_bytes())
+        body = b"".join(chunks)
+
+        assert len(body) == encoder.content_length
+        assert encoder.bytes_sent == encoder.content_length
+        assert max(len(chunk) for chunk in chunks) <= 1024
+        assert progress[-1] == (len(body), len(body))
+        assert _parse(encoder, body) == [
+            ("big.pdf", "application/pdf", files[0][1].read_bytes()),
+            ("we%22ird.csv", "text/csv", b"a,b\n1,2\n"),
+        ]
+
+    def test_async_body(self, files):
+        """Test that the async body matches the sync body."""
+        encoder = MultipartEncoder(files, chunk_size=1024)
+
+        async def collect():
+            return [chunk async for chunk in encoder.aiter_bytes()]
+
+        body = b"".join(asyncio.run(collect()))
+        sync_body = b"".join(encoder.iter_bytes())
+
+        assert body == sync_body
+
+    def test_close_midway(self, files):
+        """Test that closing an abandoned upload closes the open file."""
+        encoder = MultipartEncoder(files, chunk_size=1024)
+        iterator = encoder.iter_bytes()
+        next(iterator)
+        next(iterator)
+        file = encoder._file
+
+        encoder.close()
+
+        assert file.closed
+        assert encoder._file is None
+
+    def test_in_memory_sources(self, tmp_path):
+        """Test that buffers are sent as zero-copy views of themselves."""
+        content = b"%PDF-" + bytes(range(256)) * 10
+        mapped_file = tmp_path / "mapped.pdf"
+        mapped_file.write_bytes(content)
+        stream = io.BytesIO(b"skip" + content)
+        stream.seek(4)
+
+        with open(mapped_file, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            encoder = MultipartEncoder(
+                [
+                    ("documents", ("bytes.pdf", content)),
+                    ("documents", ("view.pdf", memoryview(content))),
+                    ("documents", ("mmap.pdf", mapped)),
+                    ("documents", ("stream.pdf", stream)),
+                ],
+                chunk_size=1024,
+            )
+            with encoder:
+                chunks = list(encoder.iter_bytes())
+                body = b"".join(chunks)
+                zero_copy = any(isinstance(c, memoryview) for c in chunks)
+                # Slices of the mmap must go before it can be closed.
+                del chunks
+
+        assert zero_copy
+        assert len(body) == encoder.content_length
+        assert [part[2] for part in _parse(encoder, body)] == [content] * 4
+        assert not stream.closed
+
+    def test_unsized_source(self):
+        """Test that content of unknown size is rejected up front."""
+        with pytest.raises(ValueError, match="must be bytes"):
+            MultipartEncoder([("documents", ("a.pdf", "text"))])
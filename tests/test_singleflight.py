@@ -0,0 +1,121 @@
+"""Tests for the singleflight module."""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from whyhow.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for the `SingleFlight` class."""
+
+    def test_coalesces_concurrent_calls(self):
+        """Test that concurrent callers of one key share one call."""
+        group = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(group.do, "key", fn) for _ in range(5)]
+            while group._calls.get("key") is None or (
+                group._calls["key"].callers < 5
+            ):
+                pass
+            release.set()
+            results = [future.result() for future in futures]
+
+        assert len(calls) == 1
+        assert results == [("result", True)] * 5
+
+    def test_errors_propagate(self):
+        """Test that every waiter sees the leader's exception."""
+        group = SingleFlight()
+        release = threading.Event()
+
+        def fn():
+            release.wait(5)
+            raise RuntimeError("boom")
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(group.do, "key", fn) for _ in range(3)]
+            while group._calls.get("key") is None or (
+                group._calls["key"].callers < 3
+            ):
+                pass
+            release.set()
+            for future in futures:
+                with pytest.raises(RuntimeError, match="boom"):
+                    future.result()
+
+        assert not group._calls
+
+    def test_sequential_calls_not_shared(self):
+        """Test that calls that do not overlap both run."""
+        group = SingleFlight()
+
+        assert group.do("key", lambda: 1) == (1, False)
+        assert group.do("key", lambda: 2) == (2, False)
+
+
+class TestAsyncSingleFlight:
+    """Tests for the `AsyncSingleFlight` class."""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_concurrent_calls(self):
+        """Test that concurrent callers of one key share one call."""
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(
+            *(group.do("key", fn) for _ in range(5))
+        )
+
+        assert len(calls) == 1
+        assert results == [("result", True)] * 5
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate(self):
+        """Test that every waiter sees the leader's exception."""
+        group = AsyncSingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            *(group.do("key", fn) for _ in range(3)), return_exceptions=True
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        await asyncio.sleep(0)
+        assert not group._calls
+
+    @pytest.mark.asyncio
+    async def test_leader_cancellation(self):
+        """Test that cancelling the first caller spares the others."""
+        group = AsyncSingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.01)
+            return "result"
+
+        leader = asyncio.ensure_future(group.do("key", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(group.do("key", fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == ("result", True)
@@ -0,0 +1,147 @@
+"""Tests for the sinks module."""
+
+import io
+import json
+import sys
+
+import pytest
+
+from whyhow.schemas.graph import (
+    QueryGraphChunkResponse,
+    QueryGraphResponse,
+    QueryGraphTripleResponse,
+    SpecificQueryGraphResponse,
+)
+from whyhow.sinks import NDJSONSink, ParquetSink, ResultSink
+
+RESPONSE = QueryGraphResponse(
+    namespace="test",
+    answer="Alice knows Bob.",
+    triples=[
+        QueryGraphTripleResponse(head="Alice", relation="knows", tail="Bob"),
+        QueryGraphTripleResponse(head="Bob", relation="knows", tail="Carol"),
+    ],
+    chunks=[
+        QueryGraphChunkResponse(
+            head="Alice",
+            relation="knows",
+            tail="Bob",
+            chunk_ids=["c1", "c2"],
+            chunk_texts=["Alice met Bob.", "They are friends."],
+        )
+    ],
+)
+SPECIFIC = SpecificQueryGraphResponse(
+    namespace="test",
+    answer="Nobody.",
+    triples=[{"head": "Carol", "relation": "knows", "tail": "Dave"}],
+)
+
+
+class TestResultSink:
+    """Tests for the ResultSink base class."""
+
+    def test_abstract(self):
+        """Test that the base class cannot be instantiated."""
+        with pytest.raises(TypeError):
+            ResultSink()
+
+
+class TestNDJSONSink:
+    """Tests for the NDJSONSink class."""
+
+    def test_write(self, tmp_path):
+        """Test that each result is written as a line."""
+        path = tmp_path / "results.ndjson"
+        with NDJSONSink(path) as sink:
+            sink.write(RESPONSE, query="Who knows Bob?")
+            sink.write(ValueError("boom"), query="Fail", index=5)
+            sink.write(SPECIFIC)
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+
+        assert [line["index"] for line in lines] == [0, 5, 2]
+        assert lines[0]["query"] == "Who knows Bob?"
+        assert lines[0]["answer"] == "Alice knows Bob."
+        assert lines[0]["triples"][1] == {
+            "head": "Bob",
+            "relation": "knows",
+            "tail": "Carol",
+        }
+        assert lines[0]["chunks"][0]["chunk_ids"] == ["c1", "c2"]
+        assert lines[1]["error"] == "ValueError: boom"
+        assert lines[1]["answer"] is None
+        assert lines[2]["triples"] == SPECIFIC.triples
+        assert lines[2]["chunks"] == []
+
+    def test_append_and_stream(self, tmp_path):
+        """Test appending to a file and writing to an open stream."""
+        path = tmp_path / "results.ndjson"
+        for _ in range(2):
+            with NDJSONSink(path, append=True) as sink:
+                sink.write(RESPONSE)
+        assert len(path.read_text().splitlines()) == 2
+
+        stream = io.StringIO()
+        with NDJSONSink(stream) as sink:
+            sink.write_all([RESPONSE, SPECIFIC], queries=["a", "b"])
+
+        assert not stream.closed
+        assert stream.getvalue().count("\n") == 2
+
+
+class TestParquetSink:
+    """Tests for the ParquetSink class."""
+
+    def test_tables(self, tmp_path):
+        """Test that results are flattened into joined tables."""
+        pq = pytest.importorskip("pyarrow.parquet")
+
+        with ParquetSink(tmp_path / "out", batch_size=2) as sink:
+            sink.write_all(
+                [RESPONSE, RuntimeError("timeout"), SPECIFIC, RESPONSE],
+                queries=["q0", "q1", "q2", "q3"],
+            )
+
+        results = pq.read_table(tmp_path / "out" / "results.parquet")
+        triples = pq.read_table(tmp_path / "out" / "triples.parquet")
+        chunks = pq.read_table(tmp_path / "out" / "chunks.parquet")
+
+        assert results.column("query").to_pylist() == ["q0", "q1", "q2", "q3"]
+        assert results.column("error").to_pylist()[:2] == [
+            None,
+            "RuntimeError: timeout",
+        ]
+        assert triples.column("index").to_pylist() == [0, 0, 2, 3, 3]
+        assert triples.column("position").to_pylist() == [0, 1, 0, 0, 1]
+        assert triples.column("tail").to_pylist()[2] == "Dave"
+        assert chunks.num_rows == 2
+        assert chunks.column("chunk_texts").to_pylist()[0] == [
+            "Alice met Bob.",
+            "They are friends.",
+        ]
+        # One row group per batch of two results.
+        file = pq.ParquetFile(tmp_path / "out" / "results.parquet")
+        assert file.num_row_groups == 2
+
+    def test_empty(self, tmp_path):
+        """Test that empty tables are still written."""
+        pq = pytest.importorskip("pyarrow.parquet")
+
+        ParquetSink(tmp_path).close()
+
+        assert pq.read_table(tmp_path / "triples.parquet").num_rows == 0
+
+    def test_invalid_batch_size(self, tmp_path):
+        """Test that the batch size must be positive."""
+        pytest.importorskip("pyarrow")
+
+        with pytest.raises(ValueError, match="batch_size"):
+            ParquetSink(tmp_path, batch_size=0)
+
+    def test_missing_pyarrow(self, tmp_path, monkeypatch):
+        """Test the error raised without pyarrow."""
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+        with pytest.raises(ImportError, match=r"whyhow\[parquet\]"):
+            ParquetSink(tmp_path)
@@ -0,0 +1,156 @@
+"""Tests for the snapshot module."""
+
+import mmap
+import struct
+from datetime import date
+
+import pytest
+
+from whyhow.frame import GraphFrame
+from whyhow.schemas.common import Graph, Node, Relationship, Triple
+from whyhow.snapshot import Snapshot, write_snapshot
+
+ALICE = Node(labels=["Person", "Admin"], properties={"name": "Alice"})
+BOB = Node(labels=["Person"], properties={"name": "Bob", "tags": ["x"]})
+ACME = Node(labels=["Company"], properties={"name": "Acmé", "size": 3.5})
+UNNAMED = Node(labels=["Person"], properties={"id": 7})
+
+GRAPH = Graph(
+    relationships=[
+        Relationship(
+            type="KNOWS",
+            start_node=ALICE,
+            end_node=BOB,
+            properties={"since": 2020},
+        ),
+        Relationship(type="WORKS_AT", start_node=BOB, end_node=ACME),
+    ],
+    nodes=[ALICE, BOB, ACME, UNNAMED],
+)
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    """Write the example graph to a snapshot."""
+    path = tmp_path / "graph.whyhow"
+    write_snapshot(path, GRAPH)
+    return path
+
+
+class TestSnapshot:
+    """Tests for `write_snapshot` and the `Snapshot` class."""
+
+    def test_graph_round_trip(self, snapshot_file):
+        """Test that a graph is loaded back equal to the original."""
+        with Snapshot(snapshot_file) as snapshot:
+            assert (snapshot.num_nodes, snapshot.num_edges) == (4, 2)
+            assert snapshot.to_graph() == GRAPH
+            assert snapshot.to_frame().to_graph() == GRAPH
+
+    def test_triples_round_trip(self, tmp_path):
+        """Test that triples are loaded back equal to the original."""
+        triples = [
+            Triple(
+                head="Alice",
+                head_type="Person",
+                relationship="knows",
+                tail=tail,
+                tail_type="Person",
+                properties={"weight": i},
+            )
+            for i, tail in enumerate(["Bob", "Carol", "Bob"])
+        ]
+        path = tmp_path / "triples.whyhow"
+        write_snapshot(path, iter(triples))
+
+        with Snapshot(path) as snapshot:
+            assert snapshot.to_triples() == triples
+
+    def test_frame_round_trip(self, snapshot_file, tmp_path):
+        """Test that columns are kept and loaded frames still deduplicate."""
+        frame = GraphFrame.from_graph(GRAPH, node_key="name")
+        path = tmp_path / "frame.whyhow"
+        write_snapshot(path, frame)
+
+        with Snapshot(path) as snapshot:
+            loaded = snapshot.to_frame()
+
+        assert loaded.node_key == "name"
+        assert loaded.strings.values == frame.strings.values
+        assert loaded.node_names == frame.node_names
+        assert loaded.edge_ends == frame.edge_ends
+        assert loaded.add_node(["Person"], {"name": "Bob"}) == 1
+        assert loaded.num_nodes == 4
+
+    def test_sections_read_independently(self, snapshot_file):
+        """Test that nodes load even if the edge properties are corrupt."""
+        with Snapshot(snapshot_file) as snapshot:
+            offset, length = snapshot._sections["eprops"]
+        with open(snapshot_file, "r+b") as f:
+            f.seek(offset)
+            f.write(b"!" * length)
+
+        with Snapshot(snapshot_file) as snapshot:
+            assert list(snapshot.iter_nodes()) == GRAPH.nodes
+            with pytest.raises(ValueError):
+                list(snapshot.iter_edges())
+
+    def test_views_reused(self, snapshot_file):
+        """Test that reading again does not map more views."""
+        with Snapshot(snapshot_file) as snapshot:
+            snapshot.to_graph()
+            views = len(snapshot._views)
+            for _ in range(3):
+                list(snapshot.iter_nodes())
+                list(snapshot.iter_edges())
+                snapshot.to_frame()
+
+            assert len(snapshot._views) == views
+
+    def test_closed_on_invalid_meta(self, snapshot_file, monkeypatch):
+        """Test that the file is unmapped if its sections cannot be read."""
+        with Snapshot(snapshot_file) as snapshot:
+            offset, length = snapshot._sections["meta"]
+        with open(snapshot_file, "r+b") as f:
+            f.seek(offset)
+            f.write(b"!" * length)
+        maps = []
+        original = mmap.mmap
+
+        def mapped(*args, **kwargs):
+            maps.append(original(*args, **kwargs))
+            return maps[-1]
+
+        monkeypatch.setattr("whyhow.snapshot.mmap.mmap", mapped)
+
+        with pytest.raises(ValueError):
+            Snapshot(snapshot_file)
+        assert maps[0].closed
+
+    @pytest.mark.parametrize(
+        "header, error",
+        [
+            (b"NOTAGRAPH", "not a graph snapshot"),
+            (struct.pack("<8sII", b"WHYHOWGS", 99, 0), "version 99"),
+            (struct.pack("<8sII", b"WHYHOWGS", 1, 0), "has no"),
+        ],
+    )
+    def test_invalid_files(self, tmp_path, header, error):
+        """Test that other files are rejected."""
+        path = tmp_path / "bad.whyhow"
+        path.write_bytes(header + b"\0" * 16)
+
+        with pytest.raises(ValueError, match=error):
+            Snapshot(path)
+
+    def test_unserializable_property(self, tmp_path):
+        """Test that properties must be JSON values."""
+        node = Node(labels=["Day"], properties={"date": date(2024, 1, 1)})
+        graph = Graph(
+            relationships=[
+                Relationship(type="NEXT", start_node=node, end_node=node)
+            ]
+        )
+
+        with pytest.raises(ValueError, match="JSON serializable"):
+            write_snapshot(tmp_path / "graph.whyhow", graph)
@@ -0,0 +1,225 @@
+"""Tests for the traversal module."""
+
+import json
+
+import httpx
+import pytest
+
+from whyhow.client import AsyncWhyHow, WhyHow
+from whyhow.schemas.common import Graph, Triple
+from whyhow.schemas.graph import QueryGraphResponse
+from whyhow.traversal import AsyncLocalGraph, GraphIndex, LocalGraph
+
+EDGES = [
+    ("Alice", "knows", "Bob"),
+    ("Bob", "knows", "Carol"),
+    ("Carol", "works_at", "Acme"),
+    ("Alice", "works_at", "Acme"),
+    ("Dave", "knows", "Eve"),
+]
+
+
+@pytest.fixture
+def index():
+    """Index a small graph built from triples."""
+    return GraphIndex.from_responses(
+        [
+            QueryGraphResponse(
+                namespace="something",
+                answer="",
+                triples=[
+                    {"head": head, "relation": relation, "tail": tail}
+                    for head, relation, tail in EDGES
+                ],
+            )
+        ]
+    )
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """Set the credentials required by the client."""
+    monkeypatch.setenv("WHYHOW_API_KEY", "key")
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+    monkeypatch.setenv("PINECONE_API_KEY", "key")
+    monkeypatch.setenv("NEO4J_USER", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "password")
+    monkeypatch.setenv("NEO4J_URL", "url")
+
+
+def _route(request):
+    """Answer the mocked requests of the local graph tests."""
+    if request.url.path.endswith("/create_graph"):
+        return httpx.Response(
+            200, json={"namespace": "something", "message": "Creating"}
+        )
+
+    entities = set(json.loads(request.content)["entities"])
+    return httpx.Response(
+        200,
+        json={
+            "namespace": "something",
+            "answer": "",
+            "triples": [
+                {"head": head, "relation": relation, "tail": tail}
+                for head, relation, tail in EDGES
+                if head in entities or tail in entities
+            ],
+        },
+    )
+
+
+class TestGraphIndex:
+    """Tests for the `GraphIndex` class."""
+
+    def test_neighbors(self, index):
+        """Test neighbors by direction and relation."""
+        assert index.neighbors("Alice") == ["Bob", "Acme"]
+        assert index.neighbors("Bob", direction="in") == ["Alice"]
+        assert index.neighbors("Acme", relations=["works_at"]) == [
+            "Carol",
+            "Alice",
+        ]
+        assert index.neighbors("Alice", relations=["likes"]) == []
+        assert index.neighbors("Zoe") == []
+
+    def test_k_hop(self, index):
+        """Test breadth-first distances."""
+        assert index.k_hop("Alice", 1) == {"Alice": 0, "Bob": 1, "Acme": 1}
+        assert index.k_hop("Alice", 2, direction="out") == {
+            "Alice": 0,
+            "Bob": 1,
+            "Acme": 1,
+            "Carol": 2,
+        }
+        with pytest.raises(ValueError, match="at least 0"):
+            index.k_hop("Alice", -1)
+
+    def test_shortest_path(self, index):
+        """Test that paths are returned as stored triples."""
+        path = index.shortest_path("Bob", "Acme", relations=["knows"])
+        assert path is None
+
+        path = index.shortest_path("Bob", "Acme")
+        assert [(t.head, t.relation, t.tail) for t in path] == [
+            ("Bob", "knows", "Carol"),
+            ("Carol", "works_at", "Acme"),
+        ]
+        assert index.shortest_path("Alice", "Alice") == []
+        assert index.shortest_path("Alice", "Eve") is None
+
+    def test_subgraph(self, index):
+        """Test relation and entity filters."""
+        assert [t.head for t in index.subgraph(["works_at"])] == [
+            "Carol",
+            "Alice",
+        ]
+        assert [
+            (t.head, t.tail) for t in index.subgraph(entities=["Alice", "Bob"])
+        ] == [("Alice", "Bob")]
+
+    def test_incremental(self, index):
+        """Test that added triples are indexed on the next query."""
+        index.add_response(
+            QueryGraphResponse(
+                namespace="something",
+                answer="",
+                triples=[{"head": "Eve", "relation": "knows", "tail": "Bob"}],
+            )
+        )
+
+        assert "Eve" in index
+        assert len(index.shortest_path("Alice", "Dave")) == 3
+
+    def test_many_small_additions(self, index, monkeypatch):
+        """Test that edges added one at a time do not rebuild the CSR."""
+        monkeypatch.setattr("whyhow.traversal.MIN_PENDING_EDGES", 8)
+        chain = [(f"N{i}", "next", f"N{i + 1}") for i in range(40)]
+        built = []
+        for i, (head, relation, tail) in enumerate(chain):
+            index.add_response(
+                QueryGraphResponse(
+                    namespace="something",
+                    answer="",
+                    triples=[
+                        {"head": head, "relation": relation, "tail": tail}
+                    ],
+                )
+            )
+            assert index.neighbors(tail, direction="in") == [head]
+            built.append(len(index._out.edges))
+
+        fresh = GraphIndex(index.frame)
+
+        assert sorted(set(built)) == [0, 9, 19, 39]
+        assert index.k_hop("N0", 40) == fresh.k_hop("N0", 40)
+        assert len(index.shortest_path("N0", "N40")) == 40
+        assert index.neighbors("Bob") == ["Carol", "Alice"]
+
+    def test_from_graph(self):
+        """Test that graphs with typed nodes are indexed by name."""
+        graph = Graph(
+            relationships=[
+                Triple(
+                    head=head,
+                    head_type="Person",
+                    relationship=relation,
+                    tail=tail,
+                    tail_type="Company" if tail == "Acme" else "Person",
+                ).to_relationship()
+                for head, relation, tail in EDGES
+            ]
+        )
+
+        assert GraphIndex.from_graph(graph).neighbors("Acme") == [
+            "Carol",
+            "Alice",
+        ]
+
+
+class TestLocalGraph:
+    """Tests for the `LocalGraph` class."""
+
+    def test_fetch_only_when_needed(self, env, httpx_mock):
+        """Test that known entities are answered without the server."""
+        httpx_mock.add_callback(_route, is_reusable=True)
+        client = WhyHow()
+        local = LocalGraph(client.graph, "something")
+
+        assert local.neighbors("Alice") == ["Bob", "Acme"]
+        assert local.neighbors("Bob") == ["Carol", "Alice"]
+        assert local.k_hop("Alice", 1) == {"Alice": 0, "Bob": 1, "Acme": 1}
+        assert local.neighbors("Zoe") == []
+        assert local.neighbors("Zoe") == []
+        assert len(httpx_mock.get_requests()) == 3
+
+        assert local.k_hop("Alice", 2) == {
+            "Alice": 0,
+            "Bob": 1,
+            "Acme": 1,
+            "Carol": 2,
+        }
+        (request,) = httpx_mock.get_requests()[3:]
+        assert json.loads(request.content)["entities"] == ["Acme"]
+
+        client.graph.create_graph("something", ["Who knows Alice?"])
+        local.neighbors("Alice")
+        assert len(httpx_mock.get_requests()) == 6
+        local.close()
+
+
+class TestAsyncLocalGraph:
+    """Tests for the `AsyncLocalGraph` class."""
+
+    @pytest.mark.asyncio
+    async def test_shortest_path(self, env, httpx_mock):
+        """Test that both ends are fetched in one request."""
+        httpx_mock.add_callback(_route, is_reusable=True)
+        async with AsyncWhyHow() as client:
+            local = AsyncLocalGraph(client.graph, "something")
+
+            path = await local.shortest_path("Alice", "Carol")
+
+        assert len(path) == 2
+        (request,) = httpx_mock.get_requests()
+        assert json.loads(request.content)["entities"] == ["Alice", "Carol"]
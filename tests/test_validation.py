@@ -0,0 +1,107 @@
+"""Tests for the validation module."""
+
+import pytest
+
+from whyhow.schemas.common import Schema
+from whyhow.validation import validate_csv
+
+SCHEMA = Schema(
+    entities=[
+        {
+            "name": "Name",
+            "description": "A person",
+            "property_columns": ["Age"],
+        },
+        {"name": "City", "description": "A city"},
+    ],
+    relations=[{"name": "lives_in", "description": ""}],
+    patterns=[
+        {
+            "head": "Name",
+            "relation": "lives_in",
+            "tail": "City",
+            "description": "",
+        }
+    ],
+)
+
+
+@pytest.fixture
+def people_csv(tmp_path):
+    """Create a CSV with blanks, null tokens, duplicates and ragged rows."""
+    path = tmp_path / "people.csv"
+    path.write_text(
+        "Name,City,Age\n"
+        "Alice,Paris,30\n"
+        "Bob,N/A,41\n"
+        "Alice,Rome,\n"
+        "Carol,Oslo\n"
+        " ,Rome,20\n"
+    )
+    return path
+
+
+class TestValidateCSV:
+    """Tests for the `validate_csv` function."""
+
+    def test_statistics(self, people_csv):
+        """Test the column statistics and the resulting warnings."""
+        report = validate_csv(people_csv, SCHEMA, chunk_size=2)
+
+        assert report.ok
+        assert (report.rows, report.ragged_rows) == (5, 1)
+        name = report.get_column("Name")
+        assert (name.empty, name.distinct, name.duplicates) == (1, 3, 1)
+        assert report.get_column("City").null_ratio == 0.2
+        assert report.get_column("Age").empty_ratio == 0.4
+        assert report.get_column("City").duplicates is None
+        assert report.warnings == [
+            "Key column 'Name' has 1 duplicate values",
+            "1 rows do not have 3 fields",
+        ]
+
+    def test_schema_file(self, people_csv, tmp_path):
+        """Test that the schema can be read from its JSON file."""
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(SCHEMA.model_dump_json())
+
+        assert validate_csv(people_csv, schema_file) == validate_csv(
+            people_csv, SCHEMA
+        )
+
+    def test_header_errors(self, tmp_path):
+        """Test typos, reserved names and pattern columns."""
+        path = tmp_path / "people.csv"
+        path.write_text("name,Town,namespace,Name\nAlice,Paris,x,y\n")
+        schema = Schema(
+            entities=[
+                {
+                    "name": "Nmae",
+                    "description": "",
+                    "property_columns": ["namespace"],
+                },
+                {"name": "Name", "description": ""},
+            ],
+            relations=[],
+            patterns=[
+                {
+                    "head": "name",
+                    "relation": "lives_in",
+                    "tail": "City",
+                    "description": "",
+                }
+            ],
+        )
+
+        report = validate_csv(path, schema)
+
+        assert not report.ok
+        assert report.errors == [
+            "Entity 'Nmae' does not match any column, did you mean 'Name'?",
+            "Property column 'namespace' of entity 'Nmae' uses a reserved"
+            " name",
+            "Pattern 'lives_in' tail 'City' does not match any column",
+        ]
+        assert report.warnings == [
+            "Pattern 'lives_in' head 'name' is not an entity of the schema"
+        ]
@@ -0,0 +1,137 @@
+"""Tests for the warmer module."""
+
+import asyncio
+import time
+
+import pytest
+
+from whyhow.cache import QueryCache, make_key
+from whyhow.client import AsyncWhyHow, WhyHow
+from whyhow.schemas.graph import QueryGraphRequest
+from whyhow.warmer import AsyncCacheWarmer, CacheWarmer
+
+QUERY_URL = (
+    "https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com"
+    "/graphs/something/query"
+)
+CREATE_URL = (
+    "https://43nq5c1b4c.execute-api.us-east-2.amazonaws.com"
+    "/graphs/something/create_graph"
+)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """Set the credentials required by the clients."""
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+    monkeypatch.setenv("PINECONE_API_KEY", "key")
+    monkeypatch.setenv("NEO4J_USER", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "password")
+    monkeypatch.setenv("NEO4J_URL", "url")
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not met in time")
+        time.sleep(0.01)
+
+
+class TestCacheWarmer:
+    """Tests for the `CacheWarmer` class."""
+
+    def test_requires_cache(self, env):
+        """Test that warming a graph API without cache is rejected."""
+        with pytest.raises(ValueError, match="no cache"):
+            CacheWarmer(WhyHow().graph)
+
+    def test_warm_fills_cache(self, env, httpx_mock):
+        """Test that configured hot queries end up in the cache."""
+        httpx_mock.add_response(
+            url=QUERY_URL,
+            json={"namespace": "something", "answer": "ok"},
+            is_reusable=True,
+        )
+        cache = QueryCache()
+        client = WhyHow(cache=cache)
+        warmer = CacheWarmer(client.graph, queries={"something": ["a", "b"]})
+
+        assert warmer.warm() == 2
+
+        client.graph.query_graph("something", "a")
+        client.graph.query_graph("something", "b")
+        assert cache.hits == 2
+        assert len(httpx_mock.get_requests()) == 2
+
+    def test_learned_top_k(self, env, httpx_mock):
+        """Test that frequently hit entries are picked up."""
+        httpx_mock.add_response(
+            url=QUERY_URL,
+            json={"namespace": "something", "answer": "ok"},
+            is_reusable=True,
+        )
+        client = WhyHow(cache=QueryCache())
+        for query in ["hot", "hot", "hot", "cold"]:
+            client.graph.query_graph("something", query)
+
+        warmer = CacheWarmer(client.graph, top_k=1)
+        warmer.warm()
+
+        assert warmer.hot_keys() == [
+            make_key("something", "query", QueryGraphRequest(query="hot"))
+        ]
+
+    def test_rewarm_after_create_graph(self, env, httpx_mock):
+        """Test that a changed namespace is re-warmed in the background."""
+        httpx_mock.add_response(
+            url=QUERY_URL,
+            json={"namespace": "something", "answer": "ok"},
+            is_reusable=True,
+        )
+        httpx_mock.add_response(
+            url=CREATE_URL,
+            json={"namespace": "something", "message": "Creating"},
+        )
+        cache = QueryCache()
+        client = WhyHow(cache=cache)
+
+        with CacheWarmer(
+            client.graph, queries={"something": ["a"]}, interval=3600
+        ):
+            _wait_for(lambda: len(cache) == 1)
+            client.graph.create_graph("something", ["a"])
+            _wait_for(lambda: len(httpx_mock.get_requests()) == 3)
+            _wait_for(lambda: len(cache) == 1)
+
+        assert not client.graph._invalidation_callbacks
+
+
+class TestAsyncCacheWarmer:
+    """Tests for the `AsyncCacheWarmer` class."""
+
+    @pytest.mark.asyncio
+    async def test_rewarm_after_create_graph(self, env, httpx_mock):
+        """Test that the warming task refreshes a changed namespace."""
+        httpx_mock.add_response(
+            url=QUERY_URL,
+            json={"namespace": "something", "answer": "ok"},
+            is_reusable=True,
+        )
+        httpx_mock.add_response(
+            url=CREATE_URL,
+            json={"namespace": "something", "message": "Creating"},
+        )
+        cache = QueryCache()
+
+        async with AsyncWhyHow(cache=cache) as client:
+            async with AsyncCacheWarmer(
+                client.graph, queries={"something": ["a"]}, interval=3600
+            ):
+                while len(cache) < 1:
+                    await asyncio.sleep(0.01)
+                await client.graph.create_graph("something", ["a"])
+                while len(httpx_mock.get_requests()) < 3:
+                    await asyncio.sleep(0.01)
+
+            assert not client.graph._invalidation_callbacks